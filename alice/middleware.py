@@ -1,10 +1,18 @@
+from collections import Counter, defaultdict
 from hashlib import sha256
+import json
+import logging
+import re
 
 from django.conf import settings
+from django.db import connection
 from django.http import HttpResponseBadRequest
 from django.utils.crypto import constant_time_compare
 
 
+sql_logger = logging.getLogger('alice.sql')
+
+
 class SignatureRejectionMiddleware(object):
     """ Rejects requests that are not signed by a known server """
 
@@ -49,3 +57,82 @@ class SignatureRejectionMiddleware(object):
             if constant_time_compare(generated, offered):
                 request.server_name = server_name
                 return True
+
+
+class SQLInstrumentationMiddleware(object):
+    """
+    Records the queries run while working out a response, to catch N+1 queries
+
+    Enabled for every request with the `SQL_INSTRUMENTATION` setting, or for a request signed by a known
+    server (see `SignatureRejectionMiddleware`, which must come first) with an `X-SQL-Instrumentation`
+    header. The response gets `X-Query-Count` and `X-SQL-Time` (in milliseconds) headers, and a JSON line
+    with those and the SQL shapes run more than once is logged to `alice.sql`.
+
+    Queries are those of the default database. Those run while a streaming response is consumed, after
+    the middleware has seen it, aren't counted.
+    """
+
+    HEADER = 'HTTP_X_SQL_INSTRUMENTATION'
+    # number of repeated SQL shapes logged, most often run first
+    TOP_SHAPES = 5
+    # literals, and lists of them, in SQL
+    LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+    def _enabled(self, request):
+        if getattr(settings, 'SQL_INSTRUMENTATION', False):
+            return True
+        return bool(request.META.get(self.HEADER)) and bool(getattr(request, 'server_name', None))
+
+    def process_request(self, request):
+        if not self._enabled(request):
+            return None
+        request._sql_instrumentation = (connection.force_debug_cursor, connection.queries_log)
+        connection.force_debug_cursor = True
+        # a log of the request's queries alone, as the connection's own is capped and may already be full
+        connection.queries_log = []
+        return None
+
+    def _shape(self, sql):
+        """ SQL with literals left out, so queries differing only in their parameters have the same shape """
+
+        return self.LISTS.sub('(...)', self.LITERALS.sub('?', sql))
+
+    def _repeated_shapes(self, queries):
+        """ [{"count", "ms", "sql"}] of the shapes of queries run more than once, most often run first """
+
+        counts = Counter()
+        seconds = defaultdict(float)
+        for query in queries:
+            shape = self._shape(query['sql'])
+            counts[shape] += 1
+            seconds[shape] += float(query['time'])
+        return [
+            {'count': count, 'ms': round(seconds[shape] * 1000, 1), 'sql': shape}
+            for shape, count in counts.most_common(self.TOP_SHAPES)
+            if count > 1
+        ]
+
+    def process_response(self, request, response):
+        instrumentation = getattr(request, '_sql_instrumentation', None)
+        if instrumentation is None:
+            return response
+        force_debug_cursor, queries_log = instrumentation
+        queries = connection.queries_log
+        connection.force_debug_cursor = force_debug_cursor
+        connection.queries_log = queries_log
+        queries_log.extend(queries)
+        del request._sql_instrumentation
+
+        sql_ms = round(sum(float(query['time']) for query in queries) * 1000, 1)
+        response['X-Query-Count'] = len(queries)
+        response['X-SQL-Time'] = sql_ms
+        sql_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'queries': len(queries),
+            'sql_ms': sql_ms,
+            'repeated': self._repeated_shapes(queries),
+        }))
+        return response
@@ -4,8 +4,8 @@ from django.test import TestCase, Client, override_settings, RequestFactory
 from django.core.urlresolvers import reverse
 
 from ..authenticators import AlicePermission
+from ..client import AliceClient
 from ..middleware import SignatureRejectionMiddleware
-from .client import AliceClient
 
 
 class BaseSignatureTestCase(TestCase):
@@ -0,0 +1,94 @@
+import json
+from unittest import mock
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from users.factories import UserFactory
+from users.models import User
+from ..client import AliceClient
+from ..middleware import SQLInstrumentationMiddleware
+
+
+@override_settings(UI_SECRET=AliceClient.SECRET)
+class SQLInstrumentationMiddlewareTestCase(TestCase):
+
+    url = reverse('is-logged-in')
+
+    def setUp(self):
+        self.client = AliceClient()
+        self.client.force_login(UserFactory.create())
+        self.middleware = SQLInstrumentationMiddleware()
+
+    def test_not_instrumented_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Query-Count'))
+
+    def test_instrumented_when_signed_server_asks(self):
+        with mock.patch('alice.middleware.sql_logger') as sql_logger:
+            response = self.client.get(self.url, HTTP_X_SQL_INSTRUMENTATION='1')
+
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertGreaterEqual(float(response['X-SQL-Time']), 0)
+        line = json.loads(sql_logger.info.call_args[0][0])
+        self.assertEqual(
+            (line['method'], line['path'], line['status'], line['queries']),
+            ('GET', self.url, 200, int(response['X-Query-Count'])),
+        )
+        self.assertFalse(connection.force_debug_cursor)
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_counts_queries_once_connection_log_is_full(self):
+        self.addCleanup(connection.queries_log.clear)
+        connection.queries_log.extend({'sql': 'SELECT 1', 'time': '0.000'} for _ in range(connection.queries_limit))
+        request = RequestFactory().get(self.url)
+
+        with mock.patch('alice.middleware.sql_logger'):
+            self.middleware.process_request(request)
+            for _ in range(3):
+                User.objects.count()
+            response = self.middleware.process_response(request, HttpResponse())
+
+        self.assertEqual(response['X-Query-Count'], '3')
+        # the connection's own log has them too
+        self.assertEqual(len(connection.queries_log), connection.queries_limit)
+        self.assertIn('COUNT(*)', connection.queries_log[-1]['sql'])
+
+    @override_settings(DEBUG=True, API_DEBUG=True)
+    def test_not_instrumented_for_unsigned_requests(self):
+        client = Client()
+        response = client.get(self.url, HTTP_X_SQL_INSTRUMENTATION='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Query-Count'))
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    def test_instrumented_by_setting(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('X-Query-Count'))
+        self.assertTrue(response.has_header('X-SQL-Time'))
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            self.middleware._shape(
+                "SELECT \"name\" FROM \"mi_sector\" WHERE (\"id\" = 58 AND \"code\" IN ('E006', 'it''s', 12))"
+            ),
+            'SELECT "name" FROM "mi_sector" WHERE ("id" = ? AND "code" IN (...))',
+        )
+
+    def test_repeated_shapes(self):
+        queries = [
+            {'sql': 'SELECT * FROM "wins_notification" WHERE "win_id" = \'{}\''.format(i), 'time': '0.002'}
+            for i in range(3)
+        ] + [
+            {'sql': 'SELECT * FROM "mi_target" WHERE "id" = {}'.format(i), 'time': '0.001'}
+            for i in range(2)
+        ] + [
+            {'sql': 'SELECT COUNT(*) FROM "wins_win"', 'time': '0.010'},
+        ]
+        self.assertEqual(self.middleware._repeated_shapes(queries), [
+            {'count': 3, 'ms': 6.0, 'sql': 'SELECT * FROM "wins_notification" WHERE "win_id" = ?'},
+            {'count': 2, 'ms': 2.0, 'sql': 'SELECT * FROM "mi_target" WHERE "id" = ?'},
+        ])
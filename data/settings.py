@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 MIDDLEWARE_CLASSES = [
     'django.middleware.security.SecurityMiddleware',
     'alice.middleware.SignatureRejectionMiddleware',
+    'alice.middleware.SQLInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -92,6 +93,32 @@ DATABASES = {
 }
 
 
+# Caches
+# `mi` is shared by all processes, for MI responses and the version stamps
+# they are checked against. Create its table with `manage.py createcachetable`
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'mi': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'mi_cache',
+    },
+}
+
+# seconds MI responses are kept in the `mi` cache, 0 to not cache them
+MI_RESPONSE_CACHE_TIMEOUT = int(os.getenv("MI_RESPONSE_CACHE_TIMEOUT", 24 * 60 * 60))
+# identical MI requests wait up to MI_RESPONSE_LOCK_WAIT seconds for the first
+# to be worked out, which holds a lock for at most MI_RESPONSE_LOCK_TIMEOUT
+MI_RESPONSE_LOCK_WAIT = int(os.getenv("MI_RESPONSE_LOCK_WAIT", 20))
+MI_RESPONSE_LOCK_TIMEOUT = int(os.getenv("MI_RESPONSE_LOCK_TIMEOUT", 60))
+# when above 0, MI requests may be answered with a response up to this many
+# seconds old while it is worked out again in the background
+MI_RESPONSE_MAX_STALENESS = int(os.getenv("MI_RESPONSE_MAX_STALENESS", 0))
+# most stale responses refreshed in the background at once, per worker process
+MI_RESPONSE_REFRESH_THREADS = int(os.getenv("MI_RESPONSE_REFRESH_THREADS", 2))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
 
@@ -186,6 +213,10 @@ IGNORE_USERS = [
 # allow access to API in browser for dev
 API_DEBUG = bool(os.getenv("API_DEBUG", False))
 
+# count and time the SQL of every request, rather than only of those asking
+# for it, see alice.middleware.SQLInstrumentationMiddleware
+SQL_INSTRUMENTATION = bool(os.getenv("SQL_INSTRUMENTATION", False))
+
 
 # Sentry
 RAVEN_CONFIG = {
@@ -1,4 +1,12 @@
+import os
+
 import gunicorn
 
 
 gunicorn.SERVER_SOFTWARE = "Wonderland/1.0"
+
+# Views keep no state between requests, so threaded workers are supported.
+# A slow MI request then holds a thread rather than a whole process.
+# Set GUNICORN_WORKER_CLASS=sync to go back to single threaded workers.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
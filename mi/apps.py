@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MiConfig(AppConfig):
     name = 'mi'
+
+    def ready(self):
+        from mi import signals  # noqa
@@ -0,0 +1,61 @@
+"""
+Cache shared by all processes serving MI, and version stamps kept in it
+
+A version stamp is a random token that is replaced whenever the data it stands
+for changes. Anything derived from that data and stored or held alongside the
+stamp it was derived at can tell it is stale by comparing stamps, without
+having to be found and deleted.
+
+"""
+import uuid
+
+from django.core.cache import caches
+
+
+MI_CACHE_ALIAS = 'mi'
+WIN_DATA_VERSION_KEY = 'mi-win-data-version'
+WIN_TOTALS_VERSION_KEY = 'mi-win-totals-version'
+
+
+def mi_cache():
+    """ The cache shared by MI across processes """
+
+    return caches[MI_CACHE_ALIAS]
+
+
+def get_version(key):
+    """ Current version stamp stored at the given key, created if missing """
+
+    cache = mi_cache()
+    version = cache.get(key)
+    if version is None:
+        # nothing stamped yet (or evicted), anything held against the key may be stale
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """ Replace the version stamp at the given key, marking anything derived at older stamps as stale """
+
+    mi_cache().set(key, uuid.uuid4().hex, None)
+
+
+def get_win_data_version():
+    """ Version stamp of Wins, customer responses, notifications and targets """
+
+    return get_version(WIN_DATA_VERSION_KEY)
+
+
+def get_win_totals_version():
+    """ Version stamp of the totals of Wins by day, which change with Wins and customer responses alone """
+
+    return get_version(WIN_TOTALS_VERSION_KEY)
+
+
+def bump_win_data_version(totals=True):
+    """ Mark data derived from Wins as stale, and their totals by day too unless told they're unchanged """
+
+    bump_version(WIN_DATA_VERSION_KEY)
+    if totals:
+        bump_version(WIN_TOTALS_VERSION_KEY)
@@ -0,0 +1,112 @@
+"""
+Columnar snapshot of the financial year's `WinSummary` rows, for MI computation
+
+MI endpoints only ever need a handful of fields of each summary row, and only
+to sum values and numbers by HVC/non-HVC, confirmation, campaign or month. The
+snapshot holds those fields as compact typed arrays, one per field, with HVCs,
+countries and months as integer codes into lookup lists. The rollup cube of
+`mi.cube` is summed from it in one pass.
+
+The snapshot is loaded in one query, streamed straight into the arrays, and kept
+for as long as the financial year and the win data version stamp (see
+`mi.cache`) stay the same.
+
+"""
+from array import array
+import threading
+
+from mi.cache import get_win_data_version
+from mi.models import WinSummary
+from mi.utils import get_financial_start_date
+
+
+BREAKDOWN_FIELDS = ('export_value', 'non_export_value', 'number')
+
+# order of the condition codes, see `WinColumns.condition`
+BREAKDOWN_CONDITIONS = ('hvc_confirmed', 'hvc_unconfirmed', 'non_hvc_confirmed', 'non_hvc_unconfirmed')
+
+_win_columns = None
+_win_columns_lock = threading.Lock()
+
+
+def breakdown_sums_at(binned_sums, offset):
+    """ Sums keyed as by `_breakdown_sums` of views, from sums binned by condition starting at `offset` """
+
+    return {
+        '{}_{}'.format(condition_name, field): binned_sums[field][offset + condition]
+        for condition, condition_name in enumerate(BREAKDOWN_CONDITIONS)
+        for field in BREAKDOWN_FIELDS
+    }
+
+
+class WinColumns:
+    """
+    `WinSummary` rows held column by column
+
+    `hvc`, `country` and `month` hold codes into the `hvcs`, `countries` and `months` lists, `sector` holds
+    CDMS sector ids as they are. `condition` holds each row's index into `BREAKDOWN_CONDITIONS`.
+    """
+
+    def __init__(self, rows, key=None):
+        self.key = key
+
+        self.hvcs = []
+        self.countries = []
+        self.months = []
+        self.codes = {'hvc': {}, 'country': {}, 'month': {}}
+
+        self.hvc = array('l')
+        self.sector = array('l')
+        self.country = array('l')
+        self.month = array('l')
+        self.confirmed = array('b')
+        self.condition = array('b')
+        self.number = array('q')
+        self.export_value = array('q')
+        self.non_export_value = array('q')
+
+        for month, hvc, sector, country, confirmed, number, export_value, non_export_value in rows:
+            self.hvc.append(self._code('hvc', self.hvcs, hvc or ''))
+            self.sector.append(sector)
+            self.country.append(self._code('country', self.countries, country))
+            self.month.append(self._code('month', self.months, month))
+            self.confirmed.append(confirmed)
+            self.condition.append((0 if hvc else 2) + (0 if confirmed else 1))
+            self.number.append(number)
+            self.export_value.append(export_value)
+            self.non_export_value.append(non_export_value)
+
+    def __len__(self):
+        return len(self.hvc)
+
+    def _code(self, column_name, values, value):
+        codes = self.codes[column_name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+
+def _load_win_columns(key):
+    financial_year, _ = key
+    rows = WinSummary.objects.filter(financial_year=financial_year).order_by('id').values_list(
+        'month', 'hvc', 'sector', 'country', 'confirmed', 'number', 'export_value', 'non_export_value',
+    )
+    # streamed into the columns, rather than held as a list of tuples alongside them
+    return WinColumns(rows.iterator(), key=key)
+
+
+def get_win_columns():
+    """ `WinColumns` of the current financial year, reloaded if the year or win data version has changed """
+
+    global _win_columns
+
+    key = (get_financial_start_date().year, get_win_data_version())
+    columns = _win_columns
+    if columns is None or columns.key != key:
+        with _win_columns_lock:
+            if _win_columns is None or _win_columns.key != key:
+                _win_columns = _load_win_columns(key)
+            columns = _win_columns
+    return columns
@@ -0,0 +1,194 @@
+"""
+Rollup cube of the financial year's wins, at every level of the MI hierarchy
+
+Leaf cells hold the sums of `BREAKDOWN_FIELDS` by month and by condition (HVC/non-HVC, confirmed or not,
+see `mi.columns.BREAKDOWN_CONDITIONS`) of each campaign's HVC wins, each CDMS sector's non-HVC wins and
+each country's wins. They're worked out in one pass over the columnar snapshot of `mi.columns`, and
+rolled up the hierarchy from there: campaigns to HVC Groups, campaigns of their targets and the non-HVC
+wins of their sectors to Sector Teams, countries to Overseas Regions, and everything to the UK-wide total.
+
+The cube is built once per win columns snapshot and hierarchy snapshot, and MI endpoints add up its
+cells rather than going over the summary rows themselves.
+
+"""
+from collections import OrderedDict
+import threading
+
+from mi.columns import BREAKDOWN_CONDITIONS, BREAKDOWN_FIELDS, breakdown_sums_at
+
+CONDITIONS = len(BREAKDOWN_CONDITIONS)
+HVC_CONDITIONS = (0, 1)
+NON_HVC_CONDITIONS = (2, 3)
+CONFIRMED_CONDITIONS = (0, 2)
+
+_cube = None
+_cube_lock = threading.Lock()
+
+
+class CubeCell:
+    """
+    Sums of each of `BREAKDOWN_FIELDS` by month and condition
+
+    Sums are flat lists with the sum for a month and condition at `month * CONDITIONS + condition`,
+    months being indexes into `months`, the months the cube covers.
+    """
+
+    def __init__(self, months, sums=None):
+        self.months = months
+        if sums is None:
+            sums = {field: [0] * (len(months) * CONDITIONS) for field in BREAKDOWN_FIELDS}
+        self.sums = sums
+
+    def __add__(self, other):
+        return CubeCell(self.months, {
+            field: [a + b for a, b in zip(self.sums[field], other.sums[field])]
+            for field in BREAKDOWN_FIELDS
+        })
+
+    def _only(self, conditions):
+        return CubeCell(self.months, {
+            field: [value if i % CONDITIONS in conditions else 0 for i, value in enumerate(sums)]
+            for field, sums in self.sums.items()
+        })
+
+    def hvc(self):
+        """ Cell of the HVC wins alone """
+
+        return self._only(HVC_CONDITIONS)
+
+    def non_hvc(self):
+        """ Cell of the non-HVC wins alone """
+
+        return self._only(NON_HVC_CONDITIONS)
+
+    def breakdown_sums(self):
+        """ Sums of `BREAKDOWN_FIELDS` for each of `BREAKDOWN_CONDITIONS`, keyed as by `_breakdown_sums` of views """
+
+        condition_sums = {}
+        for field, sums in self.sums.items():
+            condition_sums[field] = [sum(sums[condition::CONDITIONS]) for condition in range(CONDITIONS)]
+        return breakdown_sums_at(condition_sums, 0)
+
+    def month_sums(self):
+        """ `breakdown_sums` for each month with wins, by month """
+
+        numbers = self.sums['number']
+        return {
+            month: breakdown_sums_at(self.sums, code * CONDITIONS)
+            for code, month in enumerate(self.months)
+            if any(numbers[code * CONDITIONS:(code + 1) * CONDITIONS])
+        }
+
+    def confirmed_export_value(self):
+        export_values = self.sums['export_value']
+        return sum(
+            export_values[month * CONDITIONS + condition]
+            for month in range(len(self.months))
+            for condition in CONFIRMED_CONDITIONS
+        )
+
+
+class RollupCube:
+    """
+    `CubeCell`s of wins for every level of the hierarchy
+
+    Cubes of the financial year's wins are built from the columnar snapshot, those of other date ranges
+    from the day index of `mi.day_index`.
+
+    `campaigns`, `non_hvc_sectors` and `countries` hold the leaf cells of campaign ids, CDMS sector ids and
+    country codes with wins. `hvc_groups`, `sector_teams` and `overseas_regions` hold a cell for each id of
+    the hierarchy snapshot, and `uk` is the cell of all wins.
+    """
+
+    def __init__(self, key, months, campaigns, non_hvc_sectors, countries, hierarchy):
+        self.key = key
+        self.months = months
+        self.campaigns = campaigns
+        self.non_hvc_sectors = non_hvc_sectors
+        self.countries = countries
+
+        self.hvc_groups = OrderedDict(
+            (group.id, self.campaigns_total(group.campaign_ids))
+            for group in hierarchy.hvc_groups.values()
+        )
+        self.sector_teams = OrderedDict(
+            (team.id, self.total(
+                [self.campaigns_total(team.campaign_ids)] +
+                [self.non_hvc_sectors[sector_id] for sector_id in team.sector_ids if sector_id in self.non_hvc_sectors]
+            ))
+            for team in hierarchy.sector_teams.values()
+        )
+        self.overseas_regions = OrderedDict(
+            (region.id, self.total(self.country(code) for code in region.country_ids))
+            for region in hierarchy.overseas_regions.values()
+        )
+        self.uk = self.total(self.countries.values())
+
+    @classmethod
+    def from_columns(cls, columns, hierarchy):
+        """ Cube of the rows of a `mi.columns.WinColumns` snapshot """
+
+        campaigns, non_hvc_sectors, countries = cls._leaf_cells(columns)
+        return cls((columns.key, hierarchy.version), columns.months, campaigns, non_hvc_sectors, countries, hierarchy)
+
+    @staticmethod
+    def _leaf_cells(columns):
+        """ Leaf cells by campaign, non-HVC sector and country, in one pass over the columns """
+
+        campaigns, non_hvc_sectors, countries = {}, {}, {}
+        field_columns = [(field, getattr(columns, field)) for field in BREAKDOWN_FIELDS]
+        for i in range(len(columns)):
+            campaign_id = columns.hvcs[columns.hvc[i]]
+            if campaign_id:
+                leaf_cells = ((campaigns, campaign_id), (countries, columns.countries[columns.country[i]]))
+            else:
+                leaf_cells = ((non_hvc_sectors, columns.sector[i]), (countries, columns.countries[columns.country[i]]))
+            cell_bin = columns.month[i] * CONDITIONS + columns.condition[i]
+            for cells, key in leaf_cells:
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = CubeCell(columns.months)
+                for field, column in field_columns:
+                    cell.sums[field][cell_bin] += column[i]
+        return campaigns, non_hvc_sectors, countries
+
+    def empty(self):
+        return CubeCell(self.months)
+
+    def total(self, cells):
+        """ Cell adding up the given cells """
+
+        total = self.empty()
+        for cell in cells:
+            total = total + cell
+        return total
+
+    def campaign(self, campaign_id):
+        """ Cell of the campaign's HVC wins """
+
+        return self.campaigns.get(campaign_id) or self.empty()
+
+    def campaigns_total(self, campaign_ids):
+        """ Cell of the HVC wins of all given campaigns """
+
+        return self.total(self.campaigns[c] for c in set(campaign_ids) if c in self.campaigns)
+
+    def country(self, code):
+        """ Cell of the country's HVC and non-HVC wins """
+
+        return self.countries.get(code) or self.empty()
+
+
+def get_rollup_cube(columns, hierarchy):
+    """ `RollupCube` of the given snapshots, rebuilt if either has been reloaded since it was last built """
+
+    global _cube
+
+    key = (columns.key, hierarchy.version)
+    cube = _cube
+    if cube is None or cube.key != key:
+        with _cube_lock:
+            if _cube is None or _cube.key != key:
+                _cube = RollupCube.from_columns(columns, hierarchy)
+            cube = _cube
+    return cube
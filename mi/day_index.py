@@ -0,0 +1,146 @@
+"""
+Prefix-sum index of wins by day, for MI over any date range
+
+For each leaf of the rollup cube (campaign, non-HVC CDMS sector and country, see `mi.cube`) the index holds
+the days with wins, in order, and running totals of `BREAKDOWN_FIELDS` by condition up to each of those
+days. The total of any range of days is the difference of two running totals, found by bisecting the days,
+so a cube for a date range is worked out without going over wins again.
+
+The index covers all wins, is loaded in one query and kept for as long as the win totals version stamp (see
+`mi.cache`) stays the same, so it isn't reloaded as notifications or targets change. Day totals are streamed
+in date order and added to the running totals as they come, so nothing but the index itself is held while
+it is built.
+
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import datetime
+import threading
+
+from mi.cache import get_win_totals_version
+from mi.columns import BREAKDOWN_FIELDS
+from mi.cube import CONDITIONS, CubeCell, RollupCube
+from mi.models import WinSummary
+from mi.utils import get_month_start, month_iterator
+from wins.models import Win
+
+_day_index = None
+_day_index_lock = threading.Lock()
+
+
+class PrefixSums:
+    """
+    Running totals of `BREAKDOWN_FIELDS` by condition, over the days a leaf of the cube has wins
+
+    `days` holds the ordinals of those days in order. For each field, the total by condition of the wins
+    before the i-th day is at `i * CONDITIONS + condition`, so the last entries are the overall totals.
+    """
+
+    def __init__(self, day_sums=None):
+        self.days = array('l')
+        self.totals = {field: array('q', [0] * CONDITIONS) for field in BREAKDOWN_FIELDS}
+        for day in sorted(day_sums or ()):
+            for condition in range(CONDITIONS):
+                self.add(day, condition, [(field, sums[condition]) for field, sums in day_sums[day].items()])
+
+    def add(self, day, condition, field_values):
+        """ Add (field, value) pairs of wins of a day and condition, days being added in order """
+
+        if not self.days or self.days[-1] != day:
+            self.days.append(day)
+            for totals in self.totals.values():
+                totals.extend(totals[-CONDITIONS:])
+        position = len(self.days) * CONDITIONS + condition
+        for field, value in field_values:
+            self.totals[field][position] += value
+
+    def range_sums(self, first_day, last_day):
+        """ Sums of each field by condition for wins from the first to the last day ordinal, inclusive """
+
+        start = bisect_left(self.days, first_day) * CONDITIONS
+        end = bisect_right(self.days, last_day) * CONDITIONS
+        return {
+            field: [totals[end + condition] - totals[start + condition] for condition in range(CONDITIONS)]
+            for field, totals in self.totals.items()
+        }
+
+
+class DayIndex:
+    """ `PrefixSums` of wins for each leaf of the rollup cube, from `mi.models.DayTotal` rows in date order """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        # last cube worked out, as a dashboard asks for the same range of several endpoints in a row
+        self._last_cube = None
+
+        self.leaves = {'campaigns': {}, 'non_hvc_sectors': {}, 'countries': {}}
+        campaigns, non_hvc_sectors, countries = (
+            self.leaves['campaigns'], self.leaves['non_hvc_sectors'], self.leaves['countries'])
+        for row in rows:
+            hvc = row.hvc or ''
+            condition = (0 if hvc else 2) + (0 if row.confirmed else 1)
+            day = row.date.toordinal()
+            field_values = [(field, getattr(row, field)) for field in BREAKDOWN_FIELDS]
+            leaves = (
+                (campaigns, hvc) if hvc else (non_hvc_sectors, row.sector),
+                (countries, row.country),
+            )
+            for leaf_sums, key in leaves:
+                prefix_sums = leaf_sums.get(key)
+                if prefix_sums is None:
+                    prefix_sums = leaf_sums[key] = PrefixSums()
+                prefix_sums.add(day, condition, field_values)
+
+    def cube(self, date_from, date_to, hierarchy):
+        """ `RollupCube` of wins from one date to the other, inclusive, by month """
+
+        cube_key = (self.version, hierarchy.version, date_from, date_to)
+        cube = self._last_cube
+        if cube is not None and cube.key == cube_key:
+            return cube
+
+        months = [datetime.date(year, month, 1) for year, month in month_iterator(date_from, date_to)]
+        month_bounds = []
+        for month in months:
+            next_month = get_month_start(month + datetime.timedelta(days=31))
+            month_bounds.append((
+                max(month, date_from).toordinal(),
+                min(next_month - datetime.timedelta(days=1), date_to).toordinal(),
+            ))
+
+        leaf_cells = {}
+        for dimension, leaves in self.leaves.items():
+            cells = leaf_cells[dimension] = {}
+            for key, prefix_sums in leaves.items():
+                cell = CubeCell(months)
+                for code, (first_day, last_day) in enumerate(month_bounds):
+                    for field, sums in prefix_sums.range_sums(first_day, last_day).items():
+                        cell.sums[field][code * CONDITIONS:(code + 1) * CONDITIONS] = sums
+                # leaves without wins in the range are left out, as those of the columnar snapshot
+                if any(cell.sums['number']):
+                    cells[key] = cell
+
+        cube = self._last_cube = RollupCube(
+            cube_key,
+            months,
+            leaf_cells['campaigns'],
+            leaf_cells['non_hvc_sectors'],
+            leaf_cells['countries'],
+            hierarchy,
+        )
+        return cube
+
+
+def get_day_index():
+    """ `DayIndex` of all wins, reloaded if the win totals version has changed """
+
+    global _day_index
+
+    version = get_win_totals_version()
+    day_index = _day_index
+    if day_index is None or day_index.version != version:
+        with _day_index_lock:
+            if _day_index is None or _day_index.version != version:
+                _day_index = DayIndex(WinSummary.objects.day_totals(Win.objects.all()), version=version)
+            day_index = _day_index
+    return day_index
@@ -0,0 +1,191 @@
+"""
+In-process snapshot of the MI organisational hierarchy
+
+Overseas Regions, Countries, Sector Teams, Parent Sectors, Sectors, HVC Groups,
+Targets and HVC names change rarely, but MI endpoints look them up many times
+per request. `get_hierarchy` returns an immutable snapshot of all of them,
+loaded in a fixed handful of queries, with the lookups MI needs precomputed.
+
+The snapshot is tagged with a version stamp kept in the MI cache. Saving or
+deleting any of the models above replaces the stamp (see `mi.signals`), and the
+snapshot is reloaded lazily the next time it is asked for.
+
+"""
+from collections import defaultdict, namedtuple, OrderedDict
+import threading
+from types import MappingProxyType
+
+from mi.cache import bump_version, get_version
+from mi.models import (
+    Country,
+    HVCGroup,
+    OverseasRegion,
+    ParentSector,
+    Sector,
+    SectorTeam,
+    Target,
+)
+from wins.models import HVC
+
+
+VERSION_CACHE_KEY = 'mi-hierarchy-version'
+
+OverseasRegionInfo = namedtuple(
+    'OverseasRegionInfo', ['id', 'name', 'country_ids', 'campaign_ids', 'targets'])
+CountryInfo = namedtuple(
+    'CountryInfo', ['id', 'code', 'name', 'overseas_region_id', 'targets'])
+SectorTeamInfo = namedtuple(
+    'SectorTeamInfo', ['id', 'name', 'sector_ids', 'campaign_ids', 'targets', 'hvc_group_ids'])
+ParentSectorInfo = namedtuple(
+    'ParentSectorInfo', ['id', 'name', 'sector_team_id', 'sector_ids'])
+SectorInfo = namedtuple(
+    'SectorInfo', ['id', 'name', 'sector_team_id', 'parent_sector_id'])
+HVCGroupInfo = namedtuple(
+    'HVCGroupInfo', ['id', 'name', 'sector_team_id', 'campaign_ids', 'targets'])
+TargetInfo = namedtuple(
+    'TargetInfo', ['id', 'campaign_id', 'target', 'name', 'sector_team_id', 'hvc_group_id', 'country_id'])
+
+Hierarchy = namedtuple('Hierarchy', [
+    'version',
+    # id -> *Info mappings, in id order
+    'overseas_regions',
+    'countries',
+    'sector_teams',
+    'parent_sectors',
+    'sectors',
+    'hvc_groups',
+    'targets',
+    # precomputed lookups
+    'campaign_to_target',
+    'campaign_to_name',
+    'sector_to_team',
+    'country_to_region',
+])
+
+_hierarchy = None
+_hierarchy_lock = threading.Lock()
+
+
+def _frozen(mapping):
+    return MappingProxyType(OrderedDict(mapping))
+
+
+def _load_hierarchy(version):
+    """ Build a `Hierarchy` from the database """
+
+    campaign_to_name = dict(HVC.objects.values_list('campaign_id', 'name'))
+
+    targets = OrderedDict()
+    targets_by = defaultdict(list)
+    for t in Target.objects.order_by('id'):
+        target = TargetInfo(
+            id=t.id,
+            campaign_id=t.campaign_id,
+            target=t.target,
+            # fall back on the code for campaigns without an HVC
+            name=campaign_to_name.get(t.campaign_id, t.campaign_id),
+            sector_team_id=t.sector_team_id,
+            hvc_group_id=t.hvc_group_id,
+            country_id=t.country_id,
+        )
+        targets[target.id] = target
+        targets_by['sector_team', target.sector_team_id].append(target)
+        targets_by['hvc_group', target.hvc_group_id].append(target)
+        targets_by['country', target.country_id].append(target)
+
+    def campaign_ids(targets):
+        return tuple(t.campaign_id for t in targets)
+
+    sectors = OrderedDict()
+    sector_ids_by = defaultdict(list)
+    for s in Sector.objects.order_by('id'):
+        sectors[s.id] = SectorInfo(s.id, s.name, s.sector_team_id, s.parent_sector_id)
+        sector_ids_by['sector_team', s.sector_team_id].append(s.id)
+        sector_ids_by['parent_sector', s.parent_sector_id].append(s.id)
+
+    parent_sectors = OrderedDict(
+        (p.id, ParentSectorInfo(p.id, p.name, p.sector_team_id, tuple(sector_ids_by['parent_sector', p.id])))
+        for p in ParentSector.objects.order_by('id')
+    )
+
+    hvc_groups = OrderedDict()
+    hvc_group_ids_by_team = defaultdict(list)
+    for g in HVCGroup.objects.order_by('id'):
+        group_targets = tuple(targets_by['hvc_group', g.id])
+        hvc_groups[g.id] = HVCGroupInfo(g.id, g.name, g.sector_team_id, campaign_ids(group_targets), group_targets)
+        hvc_group_ids_by_team[g.sector_team_id].append(g.id)
+
+    sector_teams = OrderedDict()
+    for t in SectorTeam.objects.order_by('id'):
+        team_targets = tuple(targets_by['sector_team', t.id])
+        sector_teams[t.id] = SectorTeamInfo(
+            id=t.id,
+            name=t.name,
+            sector_ids=tuple(sector_ids_by['sector_team', t.id]),
+            campaign_ids=campaign_ids(team_targets),
+            targets=team_targets,
+            hvc_group_ids=tuple(hvc_group_ids_by_team[t.id]),
+        )
+
+    countries = OrderedDict()
+    countries_by_region = defaultdict(list)
+    for c in Country.objects.order_by('id'):
+        country = CountryInfo(
+            id=c.id,
+            code=c.country.code,
+            name=c.country.name,
+            overseas_region_id=c.overseas_region_id,
+            targets=tuple(targets_by['country', c.id]),
+        )
+        countries[c.id] = country
+        countries_by_region[c.overseas_region_id].append(country)
+
+    overseas_regions = OrderedDict()
+    for r in OverseasRegion.objects.order_by('id'):
+        region_countries = countries_by_region[r.id]
+        region_targets = tuple(t for c in region_countries for t in c.targets)
+        overseas_regions[r.id] = OverseasRegionInfo(
+            id=r.id,
+            name=r.name,
+            country_ids=tuple(c.code for c in region_countries),
+            campaign_ids=campaign_ids(region_targets),
+            targets=region_targets,
+        )
+
+    return Hierarchy(
+        version=version,
+        overseas_regions=_frozen(overseas_regions),
+        countries=_frozen(countries),
+        sector_teams=_frozen(sector_teams),
+        parent_sectors=_frozen(parent_sectors),
+        sectors=_frozen(sectors),
+        hvc_groups=_frozen(hvc_groups),
+        targets=_frozen(targets),
+        campaign_to_target=_frozen((t.campaign_id, t) for t in targets.values()),
+        campaign_to_name=_frozen(campaign_to_name),
+        sector_to_team=_frozen((s.id, sector_teams[s.sector_team_id]) for s in sectors.values()),
+        country_to_region=_frozen(
+            (c.code, overseas_regions[c.overseas_region_id]) for c in countries.values()
+        ),
+    )
+
+
+def bump_hierarchy_version():
+    """ Mark any loaded hierarchy snapshots as stale """
+
+    bump_version(VERSION_CACHE_KEY)
+
+
+def get_hierarchy():
+    """ Current `Hierarchy` snapshot, reloaded if the version stamp has changed """
+
+    global _hierarchy
+
+    version = get_version(VERSION_CACHE_KEY)
+    hierarchy = _hierarchy
+    if hierarchy is None or hierarchy.version != version:
+        with _hierarchy_lock:
+            if _hierarchy is None or _hierarchy.version != version:
+                _hierarchy = _load_hierarchy(version)
+            hierarchy = _hierarchy
+    return hierarchy
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mi.cache import bump_win_data_version
+from mi.models import WinSummary
+from wins.models import Win
+
+
+class Command(BaseCommand):
+    """
+    Bring the stored `Win.is_confirmed` flag in step with customer responses
+
+    MI reads whether a Win is confirmed from the flag rather than joining customer responses, so Wins that
+    were confirmed or had their response changed without going through the usual code paths are put right,
+    and the `WinSummary` table is rebuilt from the corrected flags.
+    """
+
+    def handle(self, *args, **options):
+        wins = Win.objects.including_inactive()
+        with transaction.atomic():
+            confirmed = wins.filter(
+                is_confirmed=False,
+                confirmation__agree_with_win=True,
+            ).update(is_confirmed=True)
+            unconfirmed = wins.filter(
+                is_confirmed=True,
+            ).exclude(
+                confirmation__agree_with_win=True,
+            ).update(is_confirmed=False)
+
+        if confirmed or unconfirmed:
+            WinSummary.objects.rebuild()
+            bump_win_data_version()
+        self.stdout.write(
+            'Marked {} wins confirmed and {} wins unconfirmed'.format(confirmed, unconfirmed)
+        )
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from alice.client import AliceClient
+from mi.cache import bump_win_data_version
+from mi.hierarchy import get_hierarchy
+from mi.management.endpoints import endpoint_paths, measure
+from mi.views.batch_views import BatchView
+from users.models import User
+from wins.models import Win
+
+# MI user requests are made as
+BENCHMARK_USER_EMAIL = 'mi-benchmark@example.com'
+
+
+class Command(BaseCommand):
+    """
+    Request every MI endpoint through HTTP, as the MI server would, and record how long each takes, the
+    queries it runs and the peak of Python allocations, optionally writing a JSON report to compare runs by
+
+    Endpoints of entities are requested for the first entity. The batch endpoint is asked for all the
+    others at once. With `--cold` the win data version is bumped before each request, so responses are
+    worked out from scratch rather than served from the MI response cache.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='work out every response from scratch, invalidating cached MI responses',
+        )
+        parser.add_argument(
+            '--query', default='',
+            help='query string to request endpoints with e.g. "from=2016-04-01&to=2016-09-30"',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='number of times to request each endpoint, the fastest request is recorded',
+        )
+        parser.add_argument('--output', help='file to write the JSON report to')
+        parser.add_argument('--compare', help='JSON report of an earlier run to compare times against')
+
+    def _client(self):
+        """ `AliceClient` signing requests as the MI server, logged in as an MI user """
+
+        user = User.objects.filter(email=BENCHMARK_USER_EMAIL).first()
+        if user is None:
+            user = User.objects.create_user(email=BENCHMARK_USER_EMAIL, name='MI benchmark', password=None)
+        user.groups.add(Group.objects.get(name='mi_group'))
+
+        client = AliceClient()
+        client.SECRET = settings.MI_SECRET
+        client.force_login(user)
+        return client
+
+    def _request(self, client, view_class, path, paths, cold):
+        if cold:
+            bump_win_data_version()
+        if issubclass(view_class, BatchView):
+            return client.post(path, json.dumps({'paths': paths}), content_type='application/json')
+        return client.get(path)
+
+    def _benchmark(self, client, view_class, path, paths, options):
+        runs = []
+        for _ in range(max(options['repeat'], 1)):
+            response, seconds, peak, queries = measure(
+                lambda: self._request(client, view_class, path, paths, options['cold']),
+            )
+            runs.append((seconds, peak, queries, response.status_code))
+        seconds, peak, queries, status_code = min(runs)
+        return OrderedDict([
+            ('view', view_class.__name__),
+            ('status', status_code),
+            ('ms', round(seconds * 1000, 1)),
+            ('queries', queries),
+            ('peak_kib', round(peak / 1024, 1)),
+        ])
+
+    def _compared(self, result, earlier):
+        if earlier is None:
+            return ''
+        if not earlier['ms']:
+            return ', was {} ms'.format(earlier['ms'])
+        return ', was {} ms ({:+.0f}%)'.format(earlier['ms'], (result['ms'] / earlier['ms'] - 1) * 100)
+
+    def handle(self, *args, **options):
+        earlier = {}
+        if options['compare']:
+            try:
+                with open(options['compare']) as report_file:
+                    earlier = json.load(report_file)['endpoints']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError('Could not read report {}: {}'.format(options['compare'], exc))
+
+        client = self._client()
+        query = '?' + options['query'] if options['query'] else ''
+        endpoints = [(view_class, path + query) for view_class, path in endpoint_paths(get_hierarchy())]
+        paths = [path for view_class, path in endpoints if not issubclass(view_class, BatchView)]
+
+        results = OrderedDict()
+        for view_class, path in endpoints:
+            result = results[path] = self._benchmark(client, view_class, path, paths, options)
+            self.stdout.write('{} {}: {} {} ms, {} queries, peak {} KiB{}'.format(
+                result['view'], path, result['status'], result['ms'], result['queries'], result['peak_kib'],
+                self._compared(result, earlier.get(path)),
+            ))
+
+        report = OrderedDict([
+            ('created', timezone.now().isoformat()),
+            ('database', connection.vendor),
+            ('wins', Win.objects.count()),
+            ('cold', options['cold']),
+            ('query', options['query']),
+            ('repeat', options['repeat']),
+            ('endpoints', results),
+        ])
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+        total_ms = sum(result['ms'] for result in results.values())
+        self.stdout.write('Total {:.1f} ms over {} endpoints of {} wins'.format(total_ms, len(results), report['wins']))
@@ -0,0 +1,88 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from mi.hierarchy import get_hierarchy
+from mi.management.endpoints import endpoint_entities, get_endpoint, mi_endpoints
+
+# plan lines of a full scan of wins_win, by database vendor
+SEQUENTIAL_SCANS = {
+    'postgresql': re.compile(r'Seq Scan on wins_win\b'),
+    'sqlite': re.compile(r'\bSCAN (TABLE )?wins_win\b(?! USING)'),
+}
+EXPLAIN = {
+    'postgresql': 'EXPLAIN {}',
+    'sqlite': 'EXPLAIN QUERY PLAN {}',
+}
+
+
+class Command(BaseCommand):
+    """
+    Work out every MI endpoint against the current database, EXPLAIN the queries they run and flag those
+    scanning `wins_win` sequentially
+
+    Query plans depend on the data, so this is only telling when run against a copy of production data.
+    Endpoints are worked out for one entity each (the first of the hierarchy) unless asked for all of them.
+    Snapshots shared by endpoints are loaded by, and their queries shown for, the first endpoint needing them.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all-entities', action='store_true',
+            help='work out endpoints for every team, group, region and country rather than the first',
+        )
+        parser.add_argument(
+            '--query', default='',
+            help='query string to work out endpoints with e.g. "from=2016-04-01&to=2016-09-30"',
+        )
+
+    def _explain(self, sql):
+        """ Query plan of the SQL, as lines of text """
+
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN[connection.vendor].format(sql))
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def _captured_queries(self, view_class, kwargs, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = get_endpoint(view_class, kwargs, query)
+        return response, queries.captured_queries
+
+    def handle(self, *args, **options):
+        sequential_scan = SEQUENTIAL_SCANS[connection.vendor]
+        verbose = options['verbosity'] > 1
+
+        hierarchy = get_hierarchy()
+        explained, flagged = 0, 0
+        for view_class, kwarg_names in mi_endpoints():
+            entities = list(endpoint_entities(kwarg_names, hierarchy))
+            if not options['all_entities']:
+                entities = entities[:1]
+
+            for kwargs in entities:
+                name = '{} {}'.format(view_class.__name__, kwargs or '')
+                try:
+                    response, queries = self._captured_queries(view_class, kwargs, options['query'])
+                except Exception as exc:
+                    self.stdout.write('{}: failed {!r}'.format(name, exc))
+                    continue
+                self.stdout.write('{}: {} {} queries'.format(name, response.status_code, len(queries)))
+
+                for captured in queries:
+                    sql = captured['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    plan = self._explain(sql)
+                    explained += 1
+                    scans = any(sequential_scan.search(line) for line in plan)
+                    flagged += scans
+                    if scans or verbose:
+                        self.stdout.write('  {}{} ({}s)'.format(
+                            'SEQUENTIAL SCAN OF wins_win: ' if scans else '', sql, captured['time'],
+                        ))
+                        for line in plan:
+                            self.stdout.write('    {}'.format(line))
+
+        self.stdout.write('{} of {} queries scan wins_win sequentially'.format(flagged, explained))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from mi.hierarchy import get_hierarchy
+from mi.management.endpoints import endpoint_entities, get_endpoint, mi_endpoints
+from mi.models import FrozenResponse
+from mi.utils import get_financial_start_date
+
+
+class Command(BaseCommand):
+    """
+    Work out the MI of a closed financial year for every endpoint and entity, and store it as `FrozenResponse`s
+
+    MI endpoints then serve the year's responses, asked for with a `year` query parameter, from those.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('year', type=int, help='starting year of the financial year e.g. 2016 for 2016/17')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year >= get_financial_start_date().year:
+            raise CommandError('Financial year {} is not closed yet'.format(year))
+        if FrozenResponse.objects.filter(financial_year=year).exists():
+            raise CommandError('Financial year {} is already frozen'.format(year))
+
+        hierarchy = get_hierarchy()
+        frozen, failed = [], []
+        for view_class, kwarg_names in mi_endpoints():
+            for kwargs in endpoint_entities(kwarg_names, hierarchy):
+                entity = FrozenResponse.entity_key(kwargs)
+                try:
+                    response = get_endpoint(view_class, kwargs, 'year={}'.format(year))
+                except Exception as exc:
+                    failed.append('{} {}: {!r}'.format(view_class.__name__, entity, exc))
+                    continue
+                if response.status_code != 200:
+                    failed.append('{} {}: {}'.format(view_class.__name__, entity, response.status_code))
+                    continue
+                frozen.append(FrozenResponse(
+                    financial_year=year,
+                    endpoint=view_class.__name__,
+                    entity=entity,
+                    data=JSONRenderer().render(response.data).decode('utf-8'),
+                ))
+
+        with transaction.atomic():
+            FrozenResponse.objects.bulk_create(frozen)
+
+        self.stdout.write('Froze {} responses of financial year {}'.format(len(frozen), year))
+        for failure in failed:
+            self.stdout.write('Not frozen: {}'.format(failure))
@@ -0,0 +1,298 @@
+import datetime
+import random
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Max, Value, When
+from django.utils import timezone
+from django_countries import countries
+
+from mi.cache import bump_win_data_version
+from mi.hierarchy import get_hierarchy
+from mi.models import WinSummary
+from mi.utils import get_financial_start_date
+from users.models import User
+from wins import constants
+from wins.models import Breakdown, CustomerResponse, HVC, Notification, Win
+
+# owner of generated wins, so they can be told apart and cleared
+DATASET_USER_EMAIL = 'mi-dataset@example.com'
+# wins bulk inserted, with their related rows, at a time
+CHUNK_SIZE = 2000
+# rows given their generated times by each update, keeping within SQLite's limit of query parameters
+UPDATE_BATCH_SIZE = 100
+
+HVC_SHARE = 0.6
+NOTIFIED_SHARE = 0.9
+RESPONDED_SHARE = 0.6
+AGREED_SHARE = 0.85
+INACTIVE_SHARE = 0.02
+
+DESCRIPTION = (
+    'Advice on market entry, introductions to local partners and support at trade events helped the '
+    'company secure the contract. '
+)
+
+
+def _bulk_create(model, rows):
+    """
+    `bulk_create` the rows, keeping the times they were generated with
+
+    `bulk_create` stamps `auto_now_add` and `auto_now` fields, e.g. `created`, with the time rows are
+    inserted, so those are set afterwards by updating the inserted rows.
+    """
+    if not rows:
+        return
+    stamped = [
+        field.name for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    if not stamped:
+        model.objects.bulk_create(rows)
+        return
+    # `bulk_create` stamps the rows themselves too
+    generated = [{name: getattr(row, name) for name in stamped} for row in rows]
+
+    if model is Win:
+        model.objects.bulk_create(rows)
+        pks = [row.pk for row in rows]
+    else:
+        # `bulk_create` doesn't set auto-incremented ids, they follow the order rows were inserted in
+        last_pk = model.objects.including_inactive().aggregate(last=Max('pk'))['last'] or 0
+        model.objects.bulk_create(rows)
+        pks = list(model.objects.including_inactive().filter(
+            pk__gt=last_pk,
+        ).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+        batch = list(zip(pks[start:start + UPDATE_BATCH_SIZE], generated[start:start + UPDATE_BATCH_SIZE]))
+        model.objects.including_inactive().filter(pk__in=[pk for pk, _ in batch]).update(**{
+            name: Case(*[
+                When(pk=pk, then=Value(values[name], output_field=model._meta.get_field(name)))
+                for pk, values in batch
+            ])
+            for name in stamped
+        })
+    for row, values in zip(rows, generated):
+        for name, value in values.items():
+            setattr(row, name, value)
+
+
+class Command(BaseCommand):
+    """
+    Generate a synthetic dataset of wins for benchmarking MI, e.g. with `manage.py benchmark_mi_endpoints`
+
+    Wins are spread over every HVC, and over sectors and countries: those of a campaign's target for HVC
+    wins, any for non-HVC wins. They come with export and non-export breakdowns, customer notifications and
+    customer responses, and are bulk inserted in chunks of `CHUNK_SIZE` rather than saved one at a time.
+
+    Signal handlers don't run for bulk inserted rows, so confirmation fields of wins are set as they are
+    generated and win summaries are rebuilt at the end. Only runs with DEBUG on, unless forced.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('wins', type=int, help='number of wins to generate e.g. 100000')
+        parser.add_argument(
+            '--years', type=int, default=1,
+            help='number of financial years, up to and including the current one, wins are dated in',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='seed of the generated values')
+        parser.add_argument(
+            '--clear', action='store_true', help='delete wins generated before, rather than adding to them',
+        )
+        parser.add_argument('--force', action='store_true', help='generate wins even with DEBUG off')
+
+    def _dataset_user(self):
+        user = User.objects.filter(email=DATASET_USER_EMAIL).first()
+        if user is None:
+            user = User.objects.create_user(email=DATASET_USER_EMAIL, name='MI dataset', password=None)
+        return user
+
+    def _clear(self, user):
+        """ Delete the user's wins, with the rows of their related models, returning the number deleted """
+
+        with transaction.atomic():
+            deleted, _ = Win.objects.including_inactive().filter(user=user).delete()
+        return deleted
+
+    def _campaign_choices(self):
+        """ (campaign id, CDMS sectors, country codes) of every HVC, with those of its target if it has one """
+
+        hierarchy = get_hierarchy()
+        all_sectors = [sector for sector, _ in constants.SECTORS]
+        all_countries = [country.code for country in hierarchy.countries.values()] or [code for code, _ in countries]
+
+        choices = []
+        for campaign_id in HVC.objects.order_by('campaign_id').values_list('campaign_id', flat=True):
+            target = hierarchy.campaign_to_target.get(campaign_id)
+            if target is None:
+                choices.append((campaign_id, all_sectors, all_countries))
+                continue
+            team = hierarchy.sector_teams.get(target.sector_team_id)
+            country = hierarchy.countries.get(target.country_id)
+            choices.append((
+                campaign_id,
+                (team and list(team.sector_ids)) or all_sectors,
+                [country.code] if country else all_countries,
+            ))
+        return choices, all_sectors, all_countries
+
+    def _timestamp(self, rng, date, after_days=0, within_days=0):
+        """ Aware datetime some days after the date, at a random time, but not in the future """
+
+        timestamp = datetime.datetime(date.year, date.month, date.day, tzinfo=timezone.utc) + datetime.timedelta(
+            days=after_days + rng.randint(0, within_days), seconds=rng.randrange(24 * 60 * 60),
+        )
+        return min(timestamp, self.now)
+
+    def _win(self, rng, user, campaign_choices, all_sectors, all_countries):
+        if campaign_choices and rng.random() < HVC_SHARE:
+            hvc, sectors, country_codes = rng.choice(campaign_choices)
+        else:
+            hvc, sectors, country_codes = None, all_sectors, all_countries
+
+        date = self.first_date + datetime.timedelta(days=rng.randrange(self.days))
+        export_value = int(10 ** rng.uniform(3, 7))
+        non_export_value = int(10 ** rng.uniform(3, 6)) if rng.random() < 0.2 else 0
+        win = Win(
+            # not from the seeded values, so wins can be added to those generated before
+            id=uuid.uuid4(),
+            user=user,
+            company_name='Company {}'.format(rng.randrange(20000)),
+            cdms_reference='CDMS{:06d}'.format(rng.randrange(10 ** 6)),
+            customer_name='Customer',
+            customer_job_title='Director',
+            customer_email_address='customer@example.com',
+            customer_location=rng.choice(constants.UK_REGIONS)[0],
+            business_type='Contract',
+            description=DESCRIPTION * rng.randint(1, 8),
+            name_of_customer='Customer Ltd',
+            name_of_export='Services',
+            type=3 if non_export_value else 1,
+            date=date,
+            country=rng.choice(country_codes),
+            total_expected_export_value=export_value,
+            goods_vs_services=rng.choice(constants.GOODS_VS_SERVICES)[0],
+            total_expected_non_export_value=non_export_value,
+            sector=rng.choice(sectors),
+            is_prosperity_fund_related=False,
+            hvc=hvc,
+            has_hvo_specialist_involvement=False,
+            type_of_support_1=rng.choice(constants.TYPES_OF_SUPPORT)[0],
+            is_personally_confirmed=True,
+            is_line_manager_confirmed=True,
+            lead_officer_name='Lead Officer',
+            line_manager_name='Line Manager',
+            team_type=rng.choice(constants.TEAMS)[0],
+            hq_team='team:1',
+            complete=rng.random() < NOTIFIED_SHARE,
+            is_active=rng.random() >= INACTIVE_SHARE,
+        )
+        win.created = win.updated = self._timestamp(rng, date, within_days=10)
+        return win
+
+    def _breakdowns(self, rng, win):
+        """ Export and non-export values of the win, spread over one to five years """
+
+        breakdowns = []
+        for breakdown_type, total in ((1, win.total_expected_export_value), (2, win.total_expected_non_export_value)):
+            if not total:
+                continue
+            years = rng.randint(1, 5)
+            for i in range(years):
+                breakdowns.append(Breakdown(
+                    win=win, type=breakdown_type, year=win.date.year + i, value=total // years,
+                    is_active=win.is_active,
+                ))
+        return breakdowns
+
+    def _confirmation(self, rng, win):
+        """ Customer notifications and response of a win sent to its customer, setting its confirmation fields """
+
+        first_notified = self._timestamp(rng, win.created.date(), within_days=5)
+        notifications = [Notification(
+            win=win, user=win.user, recipient=win.customer_email_address, type=Notification.TYPE_CUSTOMER,
+            created=first_notified, is_active=win.is_active,
+        )]
+        if rng.random() < 0.25:
+            notifications.append(Notification(
+                win=win, user=win.user, recipient=win.customer_email_address, type=Notification.TYPE_CUSTOMER,
+                created=self._timestamp(rng, first_notified.date(), after_days=7), is_active=win.is_active,
+            ))
+        win.first_customer_notification_at = first_notified
+
+        if rng.random() >= RESPONDED_SHARE:
+            return notifications, None
+        response = CustomerResponse(
+            win=win,
+            our_support=rng.randint(1, 5),
+            access_to_contacts=rng.randint(0, 5),
+            access_to_information=rng.randint(0, 5),
+            improved_profile=rng.randint(0, 5),
+            gained_confidence=rng.randint(0, 5),
+            developed_relationships=rng.randint(0, 5),
+            overcame_problem=rng.randint(0, 5),
+            involved_state_enterprise=False,
+            interventions_were_prerequisite=False,
+            support_improved_speed=True,
+            expected_portion_without_help=rng.choice(constants.WITHOUT_OUR_SUPPORT)[0],
+            last_export=rng.choice(constants.EXPERIENCE)[0],
+            company_was_at_risk_of_not_exporting=False,
+            has_explicit_export_plans=True,
+            has_enabled_expansion_into_new_market=False,
+            has_increased_exports_as_percent_of_turnover=False,
+            has_enabled_expansion_into_existing_market=False,
+            agree_with_win=rng.random() < AGREED_SHARE,
+            case_study_willing=False,
+            name='Customer',
+            created=self._timestamp(rng, first_notified.date(), within_days=60),
+            is_active=win.is_active,
+        )
+        win.days_to_confirm = (response.created - first_notified).days
+        win.is_confirmed = bool(response.agree_with_win)
+        return notifications, response
+
+    def _create_chunk(self, rng, size, user, choices):
+        wins, breakdowns, notifications, responses = [], [], [], []
+        for _ in range(size):
+            win = self._win(rng, user, *choices)
+            wins.append(win)
+            breakdowns.extend(self._breakdowns(rng, win))
+            if win.complete:
+                win_notifications, response = self._confirmation(rng, win)
+                notifications.extend(win_notifications)
+                if response is not None:
+                    responses.append(response)
+
+        with transaction.atomic():
+            _bulk_create(Win, wins)
+            _bulk_create(Breakdown, breakdowns)
+            _bulk_create(Notification, notifications)
+            _bulk_create(CustomerResponse, responses)
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Not generating wins with DEBUG off, use --force to do so anyway')
+        if options['wins'] < 1 or options['years'] < 1:
+            raise CommandError('Number of wins and years must be at least 1')
+
+        user = self._dataset_user()
+        if options['clear']:
+            deleted = self._clear(user)
+            self.stdout.write('Deleted {} rows of wins generated before'.format(deleted))
+
+        rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.first_date = datetime.date(get_financial_start_date().year - options['years'] + 1, 4, 1)
+        self.days = max((self.now.date() - self.first_date).days, 1)
+        choices = self._campaign_choices()
+
+        for start in range(0, options['wins'], CHUNK_SIZE):
+            self._create_chunk(rng, min(CHUNK_SIZE, options['wins'] - start), user, choices)
+            if options['verbosity'] > 1:
+                self.stdout.write('Generated {} wins'.format(min(start + CHUNK_SIZE, options['wins'])))
+
+        WinSummary.objects.rebuild()
+        bump_win_data_version()
+        self.stdout.write('Generated {} wins dated from {}'.format(options['wins'], self.first_date))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from mi.cache import bump_win_data_version
+from mi.hierarchy import get_hierarchy
+from mi.management.endpoints import endpoint_entities, get_endpoint, measure, mi_endpoints
+
+# URL kwargs of the endpoints profiled by default: those of teams, regions and groups
+PROFILED_KWARGS = ('team_id', 'region_id', 'group_id')
+
+
+class Command(BaseCommand):
+    """
+    Time MI endpoints and measure the memory they allocate, worked out for the first team, region or group
+
+    Memory is the peak of Python allocations traced while working out the response. With `--cold` the win
+    data version is bumped before each endpoint, so the time and memory include reloading the snapshots
+    MI is worked out from (and cached MI responses everywhere are invalidated).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='reload win snapshots for every endpoint, invalidating cached MI responses',
+        )
+        parser.add_argument(
+            '--query', default='',
+            help='query string to work out endpoints with e.g. "from=2016-04-01&to=2016-09-30"',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='number of times to work out each endpoint, the fastest run is shown',
+        )
+
+    def _profile(self, view_class, kwargs, query, cold):
+        """ Seconds, peak traced bytes and number of queries of working out the endpoint """
+
+        if cold:
+            bump_win_data_version()
+        _, seconds, peak, queries = measure(lambda: get_endpoint(view_class, kwargs, query))
+        return seconds, peak, queries
+
+    def handle(self, *args, **options):
+        hierarchy = get_hierarchy()
+        total_seconds, max_peak = 0, 0
+        for view_class, kwarg_names in mi_endpoints():
+            if not set(kwarg_names) & set(PROFILED_KWARGS):
+                continue
+            kwargs = next(endpoint_entities(kwarg_names, hierarchy), None)
+            if kwargs is None:
+                continue
+
+            runs = [
+                self._profile(view_class, kwargs, options['query'], options['cold'])
+                for _ in range(max(options['repeat'], 1))
+            ]
+            seconds, peak, queries = min(runs)
+            total_seconds += seconds
+            max_peak = max(max_peak, peak)
+            self.stdout.write('{} {}: {:.1f} ms, peak {:.1f} KiB, {} queries'.format(
+                view_class.__name__, kwargs, seconds * 1000, peak / 1024, queries,
+            ))
+
+        self.stdout.write('Total {:.1f} ms, largest peak {:.1f} KiB'.format(total_seconds * 1000, max_peak / 1024))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from mi.cache import bump_win_data_version
+from mi.models import WinSummary
+
+
+class Command(BaseCommand):
+    """ Rebuild the `WinSummary` MI table from scratch """
+
+    def handle(self, *args, **options):
+        WinSummary.objects.rebuild()
+        # snapshots and responses worked out from the old summaries are stale
+        bump_win_data_version()
+        self.stdout.write(
+            'Rebuilt {} win summaries'.format(WinSummary.objects.count())
+        )
@@ -0,0 +1,46 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mi.cache import bump_win_data_version
+from mi.columns import get_win_columns
+from mi.cube import get_rollup_cube
+from mi.hierarchy import get_hierarchy
+from mi.models import CampaignStatus
+from mi.utils import days_into_financial_year, get_financial_start_date, prorated_target, status_colour
+
+
+class Command(BaseCommand):
+    """
+    Record every campaign's confirmed export value, prorated target and status colour as of today
+
+    Meant to be run nightly. Running it again on the same day records the day's statuses afresh.
+    """
+
+    def handle(self, *args, **options):
+        today = datetime.date.today()
+        financial_year = get_financial_start_date().year
+        days_into_year = days_into_financial_year(financial_year, today)
+
+        hierarchy = get_hierarchy()
+        cube = get_rollup_cube(get_win_columns(), hierarchy)
+        statuses = []
+        for target in hierarchy.campaign_to_target.values():
+            confirmed_value = cube.campaign(target.campaign_id).confirmed_export_value()
+            statuses.append(CampaignStatus(
+                date=today,
+                financial_year=financial_year,
+                campaign_id=target.campaign_id,
+                confirmed_value=confirmed_value,
+                prorated_target=round(prorated_target(target.target, days_into_year)),
+                colour=status_colour(target.target, confirmed_value, days_into_year),
+            ))
+
+        with transaction.atomic():
+            CampaignStatus.objects.filter(date=today).delete()
+            CampaignStatus.objects.bulk_create(statuses)
+        # status histories cached earlier in the day are missing today's
+        bump_win_data_version()
+
+        self.stdout.write('Recorded the status of {} campaigns on {}'.format(len(statuses), today))
@@ -0,0 +1,90 @@
+"""
+MI endpoints of `mi.urls`, for management commands working them out or measuring them
+
+Responses of `get_endpoint` are worked out live by calling the view's handler directly, so they skip
+authentication and the MI response cache. `endpoint_paths` are for requests going through HTTP instead.
+
+"""
+from itertools import product
+import time
+import tracemalloc
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from django.test.utils import CaptureQueriesContext
+from django.utils.regex_helper import normalize
+
+from mi.urls import urlpatterns
+from mi.views.base_view import BaseMIView
+
+# hierarchy mapping of the entities of each URL kwarg
+ENTITY_KWARGS = {
+    'team_id': 'sector_teams',
+    'group_id': 'hvc_groups',
+    'region_id': 'overseas_regions',
+    'country_id': 'countries',
+}
+
+
+def mi_endpoints():
+    """ MI view classes of `mi.urls`, with their URL kwarg names """
+
+    for pattern in urlpatterns:
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class is not None and issubclass(view_class, BaseMIView) and hasattr(view_class, 'get'):
+            yield view_class, sorted(pattern.regex.groupindex)
+
+
+def endpoint_entities(kwarg_names, hierarchy):
+    """ URL kwargs of every entity of an endpoint """
+
+    ids = [getattr(hierarchy, ENTITY_KWARGS[name]).keys() for name in kwarg_names]
+    for entity_ids in product(*ids):
+        yield {name: str(entity_id) for name, entity_id in zip(kwarg_names, entity_ids)}
+
+
+def endpoint_paths(hierarchy):
+    """
+    View class and path of every endpoint of `mi.urls`, for the first entity of those with URL kwargs
+
+    Endpoints whose entities don't exist yet are left out.
+    """
+    prefix = reverse('mi:sector_teams')[:-len('sector_teams/')]
+    for pattern in urlpatterns:
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class is None:
+            continue
+        kwarg_names = sorted(pattern.regex.groupindex)
+        kwargs = next(endpoint_entities(kwarg_names, hierarchy), None)
+        if kwargs is None:
+            continue
+        path_format, _ = normalize(pattern.regex.pattern)[0]
+        yield view_class, prefix + path_format % kwargs
+
+
+def measure(work):
+    """ Result of calling `work`, with the seconds, peak of traced Python allocations and queries it took """
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = work()
+            seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak, len(queries)
+
+
+def get_endpoint(view_class, kwargs, query=''):
+    """ Response of the endpoint for the URL kwargs and query string """
+
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(query)
+    view = view_class()
+    view.args, view.kwargs = (), kwargs
+    view.request = view.initialize_request(http_request)
+    return view.get(view.request, **kwargs)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 20:55
+from __future__ import unicode_literals
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django_countries.fields
+
+
+def populate_win_summaries(apps, schema_editor):
+    Win = apps.get_model('wins', 'Win')
+    WinSummary = apps.get_model('mi', 'WinSummary')
+
+    aggregates = Win.objects.filter(is_active=True).values(
+        'date', 'hvc', 'sector', 'country', 'confirmation__agree_with_win',
+    ).annotate(
+        number=Count('id'),
+        export_value=Sum('total_expected_export_value'),
+        non_export_value=Sum('total_expected_non_export_value'),
+    ).order_by()
+
+    summaries = {}
+    for row in aggregates:
+        month = datetime.date(row['date'].year, row['date'].month, 1)
+        key = (
+            month,
+            row['hvc'] or '',
+            row['sector'],
+            row['country'],
+            bool(row['confirmation__agree_with_win']),
+        )
+        if key not in summaries:
+            month, hvc, sector, country, confirmed = key
+            summaries[key] = WinSummary(
+                financial_year=month.year if month.month >= 4 else month.year - 1,
+                month=month,
+                hvc=hvc,
+                sector=sector,
+                country=country,
+                confirmed=confirmed,
+            )
+        summary = summaries[key]
+        summary.number += row['number']
+        summary.export_value += row['export_value']
+        summary.non_export_value += row['non_export_value']
+
+    WinSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mi', '0028_auto_20170222_1202'),
+        ('wins', '0032_hvc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WinSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.PositiveIntegerField()),
+                ('month', models.DateField()),
+                ('hvc', models.CharField(blank=True, max_length=6)),
+                ('sector', models.PositiveIntegerField()),
+                ('country', django_countries.fields.CountryField(max_length=2)),
+                ('confirmed', models.BooleanField()),
+                ('number', models.PositiveIntegerField(default=0)),
+                ('export_value', models.BigIntegerField(default=0)),
+                ('non_export_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='winsummary',
+            unique_together=set([('month', 'hvc', 'sector', 'country', 'confirmed')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='winsummary',
+            index_together=set([('financial_year', 'hvc')]),
+        ),
+        migrations.RunPython(populate_win_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 21:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mi', '0029_winsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrozenResponse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('financial_year', models.PositiveIntegerField()),
+                ('endpoint', models.CharField(max_length=64)),
+                ('entity', models.CharField(blank=True, max_length=128)),
+                ('data', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='frozenresponse',
+            unique_together=set([('financial_year', 'endpoint', 'entity')]),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 22:29
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mi', '0030_frozenresponse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('financial_year', models.PositiveIntegerField()),
+                ('campaign_id', models.CharField(max_length=4)),
+                ('confirmed_value', models.BigIntegerField()),
+                ('prorated_target', models.BigIntegerField()),
+                ('colour', models.CharField(max_length=5)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='campaignstatus',
+            unique_together=set([('campaign_id', 'date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='campaignstatus',
+            index_together=set([('financial_year', 'date')]),
+        ),
+    ]
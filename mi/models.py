@@ -1,8 +1,15 @@
-from django.db import models
+from collections import namedtuple
+import datetime
+import json
+
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
+from django.utils.functional import cached_property
 
 from django_countries.fields import CountryField
 
-from wins.models import HVC
+from mi.utils import get_financial_start_date, get_month_start
+from wins.models import Win
 
 
 class OverseasRegion(models.Model):
@@ -138,10 +145,14 @@ class Target(models.Model):
     hvc_group = models.ForeignKey(HVCGroup, related_name="targets")
     country = models.ForeignKey(Country, related_name="targets")
 
-    @property
+    @cached_property
     def name(self):
-        # don't want tight integration with win models...
-        return HVC.objects.get(campaign_id=self.campaign_id).name
+        """ Name of the target's HVC, from the hierarchy snapshot rather than a query per target """
+
+        # imported here, as the hierarchy is loaded from these models
+        from mi.hierarchy import get_hierarchy
+
+        return get_hierarchy().campaign_to_name.get(self.campaign_id, self.campaign_id)
 
     def __str__(self):
         return 'Target: {} - {} - {}'.format(
@@ -149,3 +160,231 @@ class Target(models.Model):
             self.target,
             self.country,
         )
+
+
+class DayTotal:
+    """
+    Count and export/non-export value of the Wins of a day, HVC, CDMS sector, country and confirmation
+
+    Rows MI loads in bulk are projected onto these rather than model instances or dicts, as they only hold
+    the columns asked for, in slots.
+    """
+
+    __slots__ = ('date', 'hvc', 'sector', 'country', 'confirmed', 'number', 'export_value', 'non_export_value')
+
+    def __init__(self, date, hvc, sector, country, confirmed, number, export_value, non_export_value):
+        self.date = date
+        self.hvc = hvc
+        self.sector = sector
+        self.country = country
+        self.confirmed = confirmed
+        self.number = number
+        self.export_value = export_value
+        self.non_export_value = non_export_value
+
+
+class WinSummaryManager(models.Manager):
+
+    def day_totals(self, wins):
+        """
+        `DayTotal`s of given Wins queryset, in date order
+
+        Grouped in one query, and streamed from the database rather than held as a whole.
+        """
+
+        totals = wins.values_list(
+            'date',
+            'hvc',
+            'sector',
+            'country',
+            'is_confirmed',
+        ).annotate(
+            number=Count('id'),
+            export_value=Sum('total_expected_export_value'),
+            non_export_value=Sum('total_expected_non_export_value'),
+        ).order_by('date')
+        for values in totals.iterator():
+            yield DayTotal(*values)
+
+    def _summarise(self, wins):
+        """ Aggregate given Wins queryset into unsaved `WinSummary` objects """
+
+        # group by day in the database, then fold days into months here, as
+        # there is no database-agnostic month truncation in this Django
+        summaries = {}
+        for row in self.day_totals(wins):
+            key = (
+                get_month_start(row.date),
+                row.hvc or '',
+                row.sector,
+                row.country,
+                row.confirmed,
+            )
+            summary = summaries.get(key)
+            if summary is None:
+                month, hvc, sector, country, confirmed = key
+                summary = summaries[key] = self.model(
+                    financial_year=get_financial_start_date(month).year,
+                    month=month,
+                    hvc=hvc,
+                    sector=sector,
+                    country=country,
+                    confirmed=confirmed,
+                )
+            summary.number += row.number
+            summary.export_value += row.export_value
+            summary.non_export_value += row.non_export_value
+
+        return list(summaries.values())
+
+    def refresh(self, slots):
+        """
+        Recalculate the rows of given `WinSummarySlot`s from their Wins
+
+        Used to keep the table in step with changes to individual Wins, see
+        `mi.signals`.
+
+        """
+        for slot in slots:
+            with transaction.atomic():
+                self.filter(
+                    month=slot.month,
+                    hvc=slot.hvc,
+                    sector=slot.sector,
+                    country=slot.country,
+                ).delete()
+
+                wins = Win.objects.filter(
+                    date__gte=slot.month,
+                    date__lt=get_month_start(slot.month + datetime.timedelta(days=31)),
+                    sector=slot.sector,
+                    country=slot.country,
+                )
+                if slot.hvc:
+                    wins = wins.filter(hvc=slot.hvc)
+                else:
+                    wins = wins.filter(Q(hvc__isnull=True) | Q(hvc=''))
+
+                self.bulk_create(self._summarise(wins))
+
+    def rebuild(self):
+        """ Recalculate the whole table from all active Wins """
+
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(self._summarise(Win.objects.all()))
+
+
+WinSummarySlot = namedtuple('WinSummarySlot', ['month', 'hvc', 'sector', 'country'])
+
+
+class WinSummary(models.Model):
+    """
+    Count and export/non-export value of Wins, pre-aggregated for MI
+
+    There is one row per financial year, month, HVC, CDMS sector, country and
+    confirmed flag, so MI endpoints can sum a handful of rows instead of
+    loading every Win in the financial year.
+
+    Kept up to date as Wins and CustomerResponses are saved by handlers in
+    `mi.signals`, and can be rebuilt with `manage.py rebuild_win_summaries`.
+    """
+
+    financial_year = models.PositiveIntegerField()
+    month = models.DateField()
+    hvc = models.CharField(max_length=6, blank=True)
+    sector = models.PositiveIntegerField()
+    country = CountryField()
+    confirmed = models.BooleanField()
+
+    number = models.PositiveIntegerField(default=0)
+    export_value = models.BigIntegerField(default=0)
+    non_export_value = models.BigIntegerField(default=0)
+
+    objects = WinSummaryManager()
+
+    class Meta:
+        unique_together = ('month', 'hvc', 'sector', 'country', 'confirmed')
+        index_together = ('financial_year', 'hvc')
+
+    def __str__(self):
+        return 'WinSummary: {} {} {} {} ({})'.format(
+            self.month.strftime('%Y-%m'),
+            self.hvc or 'non-HVC',
+            self.sector,
+            self.country,
+            'confirmed' if self.confirmed else 'unconfirmed',
+        )
+
+    @staticmethod
+    def slot_for(date, hvc, sector, country):
+        """ `WinSummarySlot` a Win with the given field values falls into """
+
+        return WinSummarySlot(
+            get_month_start(date),
+            hvc or '',
+            sector,
+            getattr(country, 'code', country),
+        )
+
+
+class FrozenResponse(models.Model):
+    """
+    Response data of an MI endpoint for one entity, in a closed financial year
+
+    Wins of closed years barely change, so their MI is worked out once by `manage.py freeze_mi_year` and
+    served from here, rather than live. Rows are never updated: a year is frozen again by deleting its rows.
+    """
+
+    financial_year = models.PositiveIntegerField()
+    # name of the view class
+    endpoint = models.CharField(max_length=64)
+    # URL kwargs of the entity, see `entity_key`
+    entity = models.CharField(max_length=128, blank=True)
+    # response data, as rendered to JSON
+    data = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('financial_year', 'endpoint', 'entity')
+
+    def __str__(self):
+        return 'FrozenResponse: {} {} {}'.format(self.financial_year, self.endpoint, self.entity)
+
+    @staticmethod
+    def entity_key(kwargs):
+        """ Key of an entity from the URL kwargs of its endpoint e.g. 'team_id=1' """
+
+        return ','.join(
+            '{}={}'.format(name, int(value) if str(value).isdigit() else value)
+            for name, value in sorted(kwargs.items())
+        )
+
+    @property
+    def response_data(self):
+        return json.loads(self.data)
+
+
+class CampaignStatus(models.Model):
+    """
+    Snapshot of a campaign's progress toward its target on a day, for the history of HVC status colours
+
+    Recorded for every campaign each night by `manage.py snapshot_campaign_status`, from the confirmed export
+    value of the financial year so far, so the MI of past days is a lookup rather than a replay of wins.
+    """
+
+    date = models.DateField()
+    financial_year = models.PositiveIntegerField()
+    campaign_id = models.CharField(max_length=4)
+    confirmed_value = models.BigIntegerField()
+    # target due by the day, see `mi.utils.prorated_target`
+    prorated_target = models.BigIntegerField()
+    # see `mi.utils.status_colour`
+    colour = models.CharField(max_length=5)
+
+    class Meta:
+        unique_together = ('campaign_id', 'date')
+        index_together = ('financial_year', 'date')
+
+    def __str__(self):
+        return 'CampaignStatus: {} {} {}'.format(self.date, self.campaign_id, self.colour)
@@ -0,0 +1,179 @@
+"""
+Keep MI's derived data in step with the models it is derived from
+
+`WinSummary` rows are refreshed as Wins and their confirmations change (after
+the Win's stored `is_confirmed` flag). A Win may move between summary slots
+when edited, so the slot it was in is noted before saving, and both the old
+and new slots are refreshed afterwards.
+Soft-deletion saves the Win, so it is covered by the same handlers.
+
+The confirmation latency of each Win (its earliest customer notification, and
+the days from that to the customer response) is worked out again whenever a
+notification or customer response of the Win changes. Those are stored on the
+Win by an update, so they're also worked out afresh whenever the Win itself is
+saved, as the instance saved may have been loaded before they changed.
+
+Hierarchy snapshots (see `mi.hierarchy`) are marked stale whenever a model they
+are built from changes, and cached MI responses whenever Wins or the data around
+them change (see `mi.cache`).
+
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from mi.cache import bump_win_data_version
+from mi.hierarchy import bump_hierarchy_version
+from mi.models import (
+    Country,
+    HVCGroup,
+    OverseasRegion,
+    ParentSector,
+    Sector,
+    SectorTeam,
+    Target,
+    WinSummary,
+)
+from wins.models import CustomerResponse, HVC, Notification, Win
+
+
+def _stored_slot(win_id):
+    """ `WinSummarySlot` of the Win as currently stored, or None if new """
+
+    stored = Win.objects.including_inactive().filter(id=win_id).values(
+        'date', 'hvc', 'sector', 'country',
+    ).first()
+    if stored is None:
+        return None
+    return WinSummary.slot_for(**stored)
+
+
+def _instance_slot(win):
+    return WinSummary.slot_for(win.date, win.hvc, win.sector, win.country)
+
+
+@receiver(pre_save, sender=Win)
+def note_win_summary_slot(sender, instance, **kwargs):
+    instance._summary_slot_before_save = _stored_slot(instance.id)
+
+
+@receiver(post_save, sender=Win)
+def refresh_win_summaries_for_win(sender, instance, **kwargs):
+    slots = {_instance_slot(instance)}
+    if instance._summary_slot_before_save:
+        slots.add(instance._summary_slot_before_save)
+    WinSummary.objects.refresh(slots)
+
+
+@receiver(post_delete, sender=Win)
+def refresh_win_summaries_for_deleted_win(sender, instance, **kwargs):
+    WinSummary.objects.refresh({_instance_slot(instance)})
+
+
+# fields of Win worked out from its customer notifications and response
+CONFIRMATION_FIELDS = ('first_customer_notification_at', 'days_to_confirm', 'is_confirmed')
+
+
+def _confirmation_fields(win_id):
+    """
+    Values of `CONFIRMATION_FIELDS` of the Win, from its customer notifications and customer response
+
+    MI reads whether a Win is confirmed from `Win.is_confirmed`, and its confirmation latency from
+    `first_customer_notification_at` and `days_to_confirm`.
+    """
+    first_notified = Notification.objects.filter(
+        win_id=win_id,
+        type=Notification.TYPE_CUSTOMER,
+    ).aggregate(first=Min('created'))['first']
+    response = CustomerResponse.objects.including_inactive().filter(
+        win_id=win_id,
+    ).values('created', 'agree_with_win').first()
+
+    days_to_confirm = None
+    if first_notified is not None and response is not None:
+        days_to_confirm = (response['created'] - first_notified).days
+    return {
+        'first_customer_notification_at': first_notified,
+        'days_to_confirm': days_to_confirm,
+        'is_confirmed': bool(response and response['agree_with_win']),
+    }
+
+
+def _store_confirmation_fields(win_id):
+    # update rather than save, so the Win's own handlers don't run again
+    Win.objects.including_inactive().filter(id=win_id).update(**_confirmation_fields(win_id))
+
+
+@receiver(pre_save, sender=Win)
+def work_out_confirmation_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """ Work out the Win's confirmation fields as it is saved, rather than saving those it was loaded with """
+
+    if raw or (update_fields is not None and not set(update_fields) & set(CONFIRMATION_FIELDS)):
+        return
+    for field, value in _confirmation_fields(instance.id).items():
+        setattr(instance, field, value)
+
+
+@receiver(post_save, sender=CustomerResponse)
+@receiver(post_delete, sender=CustomerResponse)
+def refresh_win_summaries_for_confirmation(sender, instance, **kwargs):
+    _store_confirmation_fields(instance.win_id)
+    slot = _stored_slot(instance.win_id)
+    if slot:
+        WinSummary.objects.refresh({slot})
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def refresh_confirmation_latency(sender, instance, **kwargs):
+    _store_confirmation_fields(instance.win_id)
+
+
+HIERARCHY_MODELS = [
+    Country,
+    HVC,
+    HVCGroup,
+    OverseasRegion,
+    ParentSector,
+    Sector,
+    SectorTeam,
+    Target,
+]
+
+
+def mark_hierarchy_stale(sender, **kwargs):
+    bump_hierarchy_version()
+    # again once committed, in case a snapshot was loaded in the meantime
+    transaction.on_commit(bump_hierarchy_version)
+
+
+for model in HIERARCHY_MODELS:
+    post_save.connect(mark_hierarchy_stale, sender=model, dispatch_uid='mi-hierarchy-save-{}'.format(model.__name__))
+    post_delete.connect(mark_hierarchy_stale, sender=model, dispatch_uid='mi-hierarchy-delete-{}'.format(model.__name__))
+
+
+WIN_DATA_MODELS = [
+    CustomerResponse,
+    Notification,
+    Target,
+    Win,
+]
+# those of them changing the totals of Wins by day, see `mi.day_index`
+WIN_TOTALS_MODELS = [
+    CustomerResponse,
+    Win,
+]
+
+
+def mark_win_data_stale(sender, **kwargs):
+    bump = partial(bump_win_data_version, totals=sender in WIN_TOTALS_MODELS)
+    bump()
+    transaction.on_commit(bump)
+
+
+for model in WIN_DATA_MODELS:
+    post_save.connect(mark_win_data_stale, sender=model, dispatch_uid='mi-win-data-save-{}'.format(model.__name__))
+    post_delete.connect(mark_win_data_stale, sender=model, dispatch_uid='mi-win-data-delete-{}'.format(model.__name__))
@@ -1,11 +1,40 @@
 from django.contrib.auth.models import Group
 from django.test import override_settings, TestCase
 
-from alice.tests.client import AliceClient
+from alice.client import AliceClient
+from mi.columns import BREAKDOWN_CONDITIONS, BREAKDOWN_FIELDS
+from mi.hierarchy import bump_hierarchy_version
 from users.factories import UserFactory
 from wins.factories import HVCFactory
 
 
+def summed_rows(rows):
+    """
+    Breakdown sums and month sums of summary rows added up one by one, keyed as those of a `CubeCell`
+
+    A plain reckoning of what the cube's sums of the rows should be.
+    """
+    def zero_sums():
+        return dict.fromkeys(
+            ('{}_{}'.format(condition_name, field) for condition_name in BREAKDOWN_CONDITIONS
+             for field in BREAKDOWN_FIELDS),
+            0,
+        )
+
+    totals = zero_sums()
+    month_to_sums = {}
+    for row in rows:
+        condition_name = '{}_{}'.format(
+            'hvc' if row.hvc else 'non_hvc',
+            'confirmed' if row.confirmed else 'unconfirmed',
+        )
+        for field in BREAKDOWN_FIELDS:
+            key = '{}_{}'.format(condition_name, field)
+            totals[key] += getattr(row, field)
+            month_to_sums.setdefault(row.month, zero_sums())[key] += getattr(row, field)
+    return totals, month_to_sums
+
+
 class MiApiViewsBaseTestCase(TestCase):
     maxDiff = None
     fin_start_date = "2016-04-01"
@@ -34,6 +63,11 @@ class MiApiViewsBaseTestCase(TestCase):
             # remembers the instances from other tests
             HVCFactory.create(campaign_id='E%03d' % (i + 1))
 
+    def setUp(self):
+        super().setUp()
+        # rolling back the previous test's changes doesn't send signals
+        bump_hierarchy_version()
+
     @override_settings(MI_SECRET=AliceClient.SECRET)
     def _get_api_response(self, url, status_code=200):
         self.alice_client.login(username=self.user.email, password="asdf")
@@ -2,7 +2,7 @@ from django.contrib.auth.models import Group
 from django.core.urlresolvers import reverse
 from django.test import TestCase, override_settings
 
-from alice.tests.client import AliceClient
+from alice.client import AliceClient
 from mi.models import OverseasRegion, SectorTeam, HVCGroup
 from users.factories import UserFactory
 from wins.factories import HVCFactory
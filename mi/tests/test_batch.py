@@ -0,0 +1,83 @@
+import datetime
+import json
+from unittest import mock
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from alice.client import AliceClient
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET)
+class BatchViewTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering MI resources requested in batches """
+
+    url = reverse('mi:batch')
+
+    def setUp(self):
+        super().setUp()
+        self.alice_client.login(username=self.user.email, password="asdf")
+        for month in range(4, 8):
+            win = WinFactory(user=self.user, hvc='E006', sector=58, date=datetime.datetime(2016, month, 1))
+            if month % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+        WinFactory(user=self.user, hvc=None, sector=59, date=datetime.datetime(2016, 5, 1))
+
+    def _batch(self, paths, status_code=200):
+        response = self.alice_client.post(self.url, json.dumps({'paths': paths}), content_type='application/json')
+        self.assertEqual(response.status_code, status_code)
+        return response.data
+
+    def test_resources_match_individual_responses(self):
+        paths = [
+            reverse('mi:sector_team_detail', kwargs={'team_id': 1}),
+            reverse('mi:sector_team_months', kwargs={'team_id': 1}),
+            reverse('mi:sector_team_campaigns', kwargs={'team_id': 1}),
+            reverse('mi:sector_teams'),
+            reverse('mi:overseas_regions'),
+            reverse('mi:uk_detail') + '?from=2016-05-01&to=2016-06-30',
+        ]
+        results = self._batch(paths)
+        self.assertEqual([r['path'] for r in results], paths)
+        for path, result in zip(paths, results):
+            self.assertEqual(result['status'], 200, path)
+            self.assertEqual(result['data'], self.alice_client.get(path).data, path)
+
+    def test_permissions_checked_once(self):
+        paths = [
+            reverse('mi:sector_team_detail', kwargs={'team_id': team_id})
+            for team_id in range(1, 6)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            results = self._batch(paths)
+        self.assertEqual([r['status'] for r in results], [200] * 5)
+        self.assertEqual(len([q for q in queries if 'auth_group' in q['sql']]), 1)
+
+    def test_not_mi_resources(self):
+        results = self._batch(['/mi/nowhere/', '/wins/', self.url, 'not a path'])
+        self.assertEqual([r['status'] for r in results], [404] * 4)
+
+    def test_resource_errors_reported(self):
+        paths = [
+            reverse('mi:sector_team_detail', kwargs={'team_id': 100}),
+            reverse('mi:uk_detail') + '?year=2014',
+            reverse('mi:sector_team_months', kwargs={'team_id': 1}),
+        ]
+        with mock.patch('mi.views.sector_views.SectorTeamMonthsView.get', side_effect=ValueError):
+            results = self._batch(paths)
+        self.assertEqual([r['status'] for r in results], [400, 404, 500])
+
+    def test_invalid_batches(self):
+        for body in [{}, {'paths': '/mi/sector_teams/'}, {'paths': [1]}, {'paths': ['/mi/uk/'] * 201}]:
+            response = self.alice_client.post(self.url, json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_needs_permission(self):
+        self.alice_client.logout()
+        self._batch([reverse('mi:uk_detail')], status_code=403)
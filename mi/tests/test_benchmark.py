@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F, Sum
+from django.test import override_settings
+from freezegun import freeze_time
+
+from mi.management.commands.generate_mi_dataset import DATASET_USER_EMAIL
+from mi.models import WinSummary
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.models import Breakdown, CustomerResponse, Notification, Win
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(DEBUG=True)
+class GenerateMIDatasetTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the synthetic dataset generator """
+
+    def _generate(self, *args):
+        out = io.StringIO()
+        call_command('generate_mi_dataset', *args, stdout=out)
+        return out.getvalue()
+
+    def test_generates_wins_with_related_rows(self):
+        output = self._generate('300', '--years', '2')
+        self.assertEqual(output, 'Generated 300 wins dated from 2015-04-01\n')
+
+        wins = Win.objects.including_inactive().filter(user__email=DATASET_USER_EMAIL)
+        self.assertEqual(wins.count(), 300)
+        self.assertTrue(wins.filter(hvc__isnull=True).exists())
+        # dated as generated, not when inserted
+        self.assertTrue(wins.filter(created__lt='2016-01-01').exists())
+        self.assertFalse(wins.filter(updated__gt=F('created')).exists())
+        self.assertGreater(wins.exclude(hvc__isnull=True).values('hvc').distinct().count(), 50)
+        self.assertEqual(
+            Breakdown.objects.including_inactive().filter(type=1).values('win').distinct().count(), 300,
+        )
+        self.assertTrue(Notification.objects.including_inactive().exists())
+
+        for response in CustomerResponse.objects.including_inactive().select_related('win')[:20]:
+            notifications = Notification.objects.including_inactive().filter(win=response.win)
+            first_notified = notifications.order_by('created').first().created
+            self.assertEqual(response.win.first_customer_notification_at, first_notified)
+            self.assertEqual(response.win.days_to_confirm, (response.created - first_notified).days)
+            self.assertEqual(response.win.is_confirmed, response.agree_with_win)
+
+        active_this_year = Win.objects.filter(date__gte='2016-04-01').count()
+        self.assertEqual(WinSummary.objects.filter(financial_year=2016).aggregate(n=Sum('number'))['n'],
+                         active_this_year)
+
+    def _generated_values(self):
+        return sorted(Win.objects.values_list('date', 'total_expected_export_value', 'company_name'))
+
+    def test_same_seed_same_wins(self):
+        self._generate('50')
+        first = self._generated_values()
+        self.assertIn('Deleted ', self._generate('50', '--clear'))
+        self.assertEqual(Win.objects.including_inactive().count(), 50)
+        self.assertFalse(
+            Breakdown.objects.including_inactive().exclude(win__in=Win.objects.including_inactive()).exists()
+        )
+        self.assertEqual(self._generated_values(), first)
+
+    def test_adds_to_wins_generated_before(self):
+        self._generate('50')
+        self._generate('50')
+        self.assertEqual(Win.objects.including_inactive().filter(user__email=DATASET_USER_EMAIL).count(), 100)
+
+    @override_settings(DEBUG=False)
+    def test_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            self._generate('10')
+        self._generate('10', '--force')
+        self.assertEqual(Win.objects.including_inactive().filter(user__email=DATASET_USER_EMAIL).count(), 10)
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(DEBUG=True)
+class BenchmarkMIEndpointsTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the MI benchmark runner """
+
+    def setUp(self):
+        super().setUp()
+        call_command('generate_mi_dataset', '200', stdout=io.StringIO())
+        handle, self.report_path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, self.report_path)
+
+    def _benchmark(self, *args):
+        out = io.StringIO()
+        call_command('benchmark_mi_endpoints', *args, stdout=out)
+        return out.getvalue()
+
+    def test_report_of_every_endpoint(self):
+        output = self._benchmark('--cold', '--output', self.report_path)
+        with open(self.report_path) as report_file:
+            report = json.load(report_file)
+
+        self.assertEqual((report['wins'], report['cold']), (Win.objects.count(), True))
+        endpoints = report['endpoints']
+        self.assertEqual({result['status'] for result in endpoints.values()}, {200})
+        self.assertEqual(endpoints['/mi/sector_teams/1/']['view'], 'SectorTeamDetailView')
+        self.assertEqual(endpoints['/mi/batch/']['view'], 'BatchView')
+        self.assertIn('CountryWinsView', {result['view'] for result in endpoints.values()})
+        self.assertGreater(endpoints['/mi/sector_teams/overview/']['queries'], 0)
+        total = r'Total [\d.]+ ms over {} endpoints of {} wins\n$'.format(len(endpoints), report['wins'])
+        self.assertRegex(output, total)
+
+        compared = self._benchmark('--compare', self.report_path, '--query', 'from=2016-05-01')
+        self.assertRegex(compared, r'SectorTeamDetailView /mi/sector_teams/1/\?from=2016-05-01: 200 [\d.]+ ms')
+        self.assertNotIn(', was', compared)
+        self.assertRegex(self._benchmark('--compare', self.report_path), r', was [\d.]+ ms')
+
+    def test_unreadable_report(self):
+        with self.assertRaises(CommandError):
+            self._benchmark('--compare', self.report_path + '.missing')
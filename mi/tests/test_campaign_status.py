@@ -0,0 +1,97 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from freezegun import freeze_time
+
+from mi.hierarchy import get_hierarchy
+from mi.models import CampaignStatus
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from mi.utils import days_into_financial_year
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class CampaignStatusTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering nightly campaign status snapshots and the status history served from them """
+
+    team_url = reverse('mi:sector_team_status_history', kwargs={'team_id': 1})
+
+    def setUp(self):
+        super().setUp()
+        self._win('E006', 5000000, confirmed=True)
+        self._win('E019', 2000000)
+
+    def _win(self, hvc, export_value, confirmed=False):
+        win = WinFactory(user=self.user, hvc=hvc, sector=58, date=datetime.datetime(2016, 5, 1),
+                         total_expected_export_value=export_value)
+        if confirmed:
+            CustomerResponseFactory(win=win, agree_with_win=True)
+
+    def _snapshot(self):
+        out = io.StringIO()
+        call_command('snapshot_campaign_status', stdout=out)
+        return out.getvalue()
+
+    def test_days_into_financial_year(self):
+        self.assertEqual(days_into_financial_year(2016), 214)
+        self.assertEqual(days_into_financial_year(2016, datetime.date(2016, 4, 1)), 1)
+        self.assertEqual(days_into_financial_year(2015), 365)
+
+    def test_records_every_campaign(self):
+        output = self._snapshot()
+        campaign_count = len(get_hierarchy().campaign_to_target)
+        self.assertEqual(output, 'Recorded the status of {} campaigns on 2016-11-01\n'.format(campaign_count))
+        self.assertEqual(CampaignStatus.objects.filter(date=datetime.date(2016, 11, 1)).count(), campaign_count)
+
+        e006 = CampaignStatus.objects.get(campaign_id='E006')
+        self.assertEqual(
+            (e006.financial_year, e006.confirmed_value, e006.prorated_target, e006.colour),
+            (2016, 5000000, round(self.CAMPAIGN_TARGET / 365 * 214), 'green'),
+        )
+        e019 = CampaignStatus.objects.get(campaign_id='E019')
+        self.assertEqual((e019.confirmed_value, e019.colour), (0, 'red'))
+
+    def test_colours_match_campaigns_view(self):
+        self._snapshot()
+        campaigns = self._get_api_response(reverse('mi:sector_team_campaigns', kwargs={'team_id': 1})).data
+        self.assertEqual(
+            {c['campaign_id']: c['totals']['progress']['status'] for c in campaigns['campaigns']},
+            dict(CampaignStatus.objects.filter(campaign_id__in=self.TEAM_1_HVCS).values_list('campaign_id', 'colour')),
+        )
+
+    def test_same_day_recorded_afresh(self):
+        self._snapshot()
+        self._win('E019', 4000000, confirmed=True)
+        self._snapshot()
+        self.assertEqual(CampaignStatus.objects.count(), len(get_hierarchy().campaign_to_target))
+        self.assertEqual(CampaignStatus.objects.get(campaign_id='E019').colour, 'green')
+
+    def test_team_status_history(self):
+        with freeze_time('2016-10-01'):
+            self._snapshot()
+        self._win('E031', 3000000, confirmed=True)
+        self._snapshot()
+
+        data = self._get_api_response(self.team_url).data
+        self.assertEqual((data['id'], data['name']), (1, 'Financial & Professional Services'))
+        self.assertEqual(data['status_history'], [
+            {'date': '2016-10-01', 'hvc_performance': {'red': 9, 'amber': 0, 'green': 1, 'zero': 0}},
+            {'date': '2016-11-01', 'hvc_performance': {'red': 8, 'amber': 0, 'green': 2, 'zero': 0}},
+        ])
+
+        in_range = self._get_api_response(self.team_url + '?from=2016-10-15').data['status_history']
+        self.assertEqual([day['date'] for day in in_range], ['2016-11-01'])
+
+    def test_region_status_history(self):
+        self._snapshot()
+        region = next(r for r in get_hierarchy().overseas_regions.values() if r.campaign_ids)
+        url = reverse('mi:overseas_region_status_history', kwargs={'region_id': region.id})
+        history = self._get_api_response(url).data['status_history']
+        self.assertEqual(len(history), 1)
+        self.assertEqual(sum(history[0]['hvc_performance'].values()), len(set(region.campaign_ids)))
+
+    def test_no_history_or_team(self):
+        self.assertEqual(self._get_api_response(self.team_url).data['status_history'], [])
+        self._get_api_response(reverse('mi:sector_team_status_history', kwargs={'team_id': 999}), 400)
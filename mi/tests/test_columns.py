@@ -0,0 +1,58 @@
+import datetime
+
+from django.test import TestCase
+from freezegun import freeze_time
+
+from mi.columns import get_win_columns
+from mi.models import WinSummary
+from users.factories import UserFactory
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time('2016-11-01')
+class WinColumnsTestCase(TestCase):
+    """ Tests covering the columnar snapshot of `WinSummary` rows """
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        for month, hvc, sector, country in [
+                (4, 'E006', 58, 'CA'),
+                (4, 'E006', 58, 'CA'),
+                (5, 'E019', 59, 'FR'),
+                (6, None, 60, 'CA'),
+                (6, '', 61, 'US'),
+                (7, 'E019', 58, 'US')]:
+            win = WinFactory(user=self.user, hvc=hvc, sector=sector, country=country,
+                             date=datetime.datetime(2016, month, 1))
+            if month % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+        # previous financial year
+        WinFactory(user=self.user, hvc='E006', sector=58, country='CA', date=datetime.datetime(2016, 3, 1))
+        self.columns = get_win_columns()
+
+    def _summaries(self):
+        return WinSummary.objects.filter(financial_year=2016)
+
+    def test_compact_columns(self):
+        self.assertEqual(len(self.columns), self._summaries().count())
+        self.assertEqual(self.columns.export_value.typecode, 'q')
+        self.assertEqual(self.columns.confirmed.typecode, 'b')
+        self.assertEqual(sorted(self.columns.hvcs), ['', 'E006', 'E019'])
+
+    def test_rows_match_summaries(self):
+        columns = self.columns
+        rows = [
+            (columns.months[columns.month[i]], columns.hvcs[columns.hvc[i]], columns.sector[i],
+             columns.countries[columns.country[i]], bool(columns.confirmed[i]), columns.number[i],
+             columns.export_value[i], columns.non_export_value[i])
+            for i in range(len(columns))
+        ]
+        fields = ('month', 'hvc', 'sector', 'country', 'confirmed', 'number', 'export_value', 'non_export_value')
+        self.assertEqual(sorted(rows), sorted(self._summaries().values_list(*fields)))
+
+    def test_snapshot_reused_until_win_data_changes(self):
+        self.assertIs(get_win_columns(), self.columns)
+        WinFactory(user=self.user, hvc='E006', sector=58, country='CA', date=datetime.datetime(2016, 8, 1))
+        reloaded = get_win_columns()
+        self.assertIsNot(reloaded, self.columns)
+        self.assertEqual(len(reloaded), WinSummary.objects.filter(financial_year=2016).count())
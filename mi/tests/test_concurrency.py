@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings, TransactionTestCase
+from freezegun import freeze_time
+
+from alice.client import AliceClient
+from mi.cache import mi_cache
+from mi.hierarchy import bump_hierarchy_version, get_hierarchy
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from users.factories import UserFactory
+from wins.factories import CustomerResponseFactory, HVCFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET, MI_RESPONSE_CACHE_TIMEOUT=0)
+class ParallelMonthsRequestsTestCase(TransactionTestCase):
+    """
+    Months endpoints requested from several threads at once, as in a threaded gunicorn worker
+
+    Threads need committed data to read, hence `TransactionTestCase`. Flushing the tables after
+    each test would drop the reference data migrations seed, so it is restored then, for test
+    cases run after these ones whatever order they're run in.
+    """
+
+    THREADS = 8
+    REQUESTS = 32
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reference_data = connection.creation.serialize_db_to_string()
+
+    def _fixture_teardown(self):
+        call_command('flush', verbosity=0, interactive=False, reset_sequences=False, inhibit_post_migrate=True)
+        connection.creation.deserialize_db_from_string(self.reference_data)
+
+    def setUp(self):
+        bump_hierarchy_version()
+        self.user = UserFactory.create()
+        self.user.set_password("asdf")
+        self.user.save()
+        Group.objects.get(name="mi_group").user_set.add(self.user)
+
+        for campaign_id in MiApiViewsBaseTestCase.TEAM_1_HVCS:
+            HVCFactory.create(campaign_id=campaign_id)
+        for month in range(4, 11):
+            for campaign_id in MiApiViewsBaseTestCase.TEAM_1_HVCS[:month - 2]:
+                win = WinFactory(user=self.user, hvc=campaign_id, sector=58,
+                                 date=datetime.datetime(2016, month, 1))
+                if month % 2:
+                    CustomerResponseFactory(win=win, agree_with_win=True)
+            WinFactory(user=self.user, hvc=None, sector=59, date=datetime.datetime(2016, month, 1))
+
+        self.group_id = get_hierarchy().campaign_to_target['E006'].hvc_group_id
+
+        self.alice_client = AliceClient()
+        self.alice_client.login(username=self.user.email, password="asdf")
+
+    def tearDown(self):
+        # the cache table isn't flushed along with the models' tables
+        mi_cache().clear()
+
+    def _get(self, url):
+        client = AliceClient()
+        client.cookies = self.alice_client.cookies
+        try:
+            response = client.get(url)
+            return response.status_code, response.content
+        finally:
+            connection.close()
+
+    def _assert_identical_in_parallel(self, url):
+        expected = (200, self.alice_client.get(url).content)
+        last_month = json.loads(expected[1].decode("utf-8"))['months'][-1]
+        self.assertGreater(last_month['totals']['export']['totals']['number']['grand_total'], 0)
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            responses = list(executor.map(self._get, [url] * self.REQUESTS))
+        self.assertEqual(responses, [expected] * self.REQUESTS)
+
+    def test_sector_team_months(self):
+        self._assert_identical_in_parallel(reverse('mi:sector_team_months', kwargs={'team_id': 1}))
+
+    def test_hvc_group_months(self):
+        self._assert_identical_in_parallel(reverse('mi:hvc_group_months', kwargs={'group_id': self.group_id}))
+
+    def test_mixed_months(self):
+        urls = [
+            reverse('mi:sector_team_months', kwargs={'team_id': team_id})
+            for team_id in (1, 2)
+        ] + [
+            reverse('mi:hvc_group_months', kwargs={'group_id': self.group_id}),
+        ]
+        expected = [(200, self.alice_client.get(url).content) for url in urls]
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            responses = list(executor.map(self._get, urls * self.REQUESTS))
+        self.assertEqual(responses, expected * self.REQUESTS)
+
+    @override_settings(MI_RESPONSE_CACHE_TIMEOUT=60, MI_RESPONSE_MAX_STALENESS=600)
+    def test_stale_response_refreshed_in_background(self):
+        url = reverse('mi:sector_team_months', kwargs={'team_id': 1})
+        first = self.alice_client.get(url)
+        WinFactory(user=self.user, hvc='E006', sector=58, date=datetime.datetime(2016, 10, 1))
+
+        # refreshes are finished before the next request, as sqlite's shared in-memory
+        # test database reports locked tables rather than waiting on them
+        executor = ThreadPoolExecutor(max_workers=1)
+        with mock.patch('mi.views.base_view.get_refresh_executor', return_value=executor), \
+                mock.patch.object(executor, 'submit', wraps=executor.submit) as submit:
+            stale = self.alice_client.get(url)
+        self.assertEqual(stale.content, first.content)
+        self.assertTrue(stale.has_header('Age'))
+        self.assertEqual(submit.call_count, 1)
+        executor.shutdown(wait=True)
+
+        fresh = self.alice_client.get(url)
+        self.assertNotEqual(fresh.content, first.content)
+        self.assertFalse(fresh.has_header('Age'))
@@ -0,0 +1,139 @@
+import datetime
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test import override_settings
+from django.utils.timezone import utc
+from freezegun import freeze_time
+
+from alice.client import AliceClient
+from mi.models import Country
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from users.factories import UserFactory
+from wins.factories import CustomerResponseFactory, NotificationFactory, WinFactory
+from wins.models import Notification, Win
+
+
+class ConfirmationLatencyTestCase(TestCase):
+    """ Tests covering maintenance of the confirmation latency of Wins """
+
+    def setUp(self):
+        self.user = UserFactory.create()
+        self.win = WinFactory(user=self.user, date=datetime.datetime(2016, 5, 1))
+
+    def _notify(self, created, type=Notification.TYPE_CUSTOMER):
+        notification = NotificationFactory(win=self.win, type=type)
+        notification.created = created
+        notification.save()
+        return notification
+
+    def _confirm(self, created):
+        response = CustomerResponseFactory(win=self.win, agree_with_win=True)
+        response.created = created
+        response.save()
+        return response
+
+    def _latency(self):
+        return Win.objects.filter(id=self.win.id).values_list(
+            'first_customer_notification_at', 'days_to_confirm',
+        ).get()
+
+    def test_new_win_has_no_latency(self):
+        self.assertEqual(self._latency(), (None, None))
+
+    def test_earliest_customer_notification(self):
+        self._notify(datetime.datetime(2016, 5, 4))
+        self._notify(datetime.datetime(2016, 5, 2))
+        self._notify(datetime.datetime(2016, 5, 1), type=Notification.TYPE_OFFICER)
+        self.assertEqual(self._latency(), (datetime.datetime(2016, 5, 2, tzinfo=utc), None))
+
+    def test_days_to_confirm(self):
+        self._notify(datetime.datetime(2016, 5, 2))
+        self._notify(datetime.datetime(2016, 5, 4))
+        self._confirm(datetime.datetime(2016, 5, 7, 12))
+        self.assertEqual(self._latency(), (datetime.datetime(2016, 5, 2, tzinfo=utc), 5))
+
+    def test_confirmation_before_notification_recorded(self):
+        self._confirm(datetime.datetime(2016, 5, 7))
+        self.assertEqual(self._latency(), (None, None))
+        self._notify(datetime.datetime(2016, 5, 3))
+        self.assertEqual(self._latency(), (datetime.datetime(2016, 5, 3, tzinfo=utc), 4))
+
+    def test_deleted_confirmation(self):
+        self._notify(datetime.datetime(2016, 5, 2))
+        self._confirm(datetime.datetime(2016, 5, 7)).delete(for_real=True)
+        self.assertEqual(self._latency(), (datetime.datetime(2016, 5, 2, tzinfo=utc), None))
+
+    def test_win_saved_after_confirmation(self):
+        # `self.win` was loaded before the notification and response arrived
+        self._notify(datetime.datetime(2016, 5, 2))
+        self._confirm(datetime.datetime(2016, 5, 7))
+        self.win.description = 'edited'
+        self.win.save()
+
+        self.assertEqual(self._latency(), (datetime.datetime(2016, 5, 2, tzinfo=utc), 5))
+        self.assertTrue(Win.objects.get(id=self.win.id).is_confirmed)
+        self.assertEqual(self.win.days_to_confirm, 5)
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET)
+class AverageTimeToConfirmTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the average time to confirm of all Wins, of Overseas Regions and of HVC Groups """
+
+    def _confirmed_win(self, days, country='CA', notified=(datetime.datetime(2016, 5, 2),),
+                       date=datetime.datetime(2016, 5, 1), hvc='E001'):
+        win = WinFactory(user=self.user, country=country, date=date, hvc=hvc)
+        for created in notified:
+            notification = NotificationFactory(win=win)
+            notification.created = created
+            notification.save()
+        response = CustomerResponseFactory(win=win, agree_with_win=True)
+        response.created = datetime.datetime(2016, 5, 2) + datetime.timedelta(days=days)
+        response.save()
+        return win
+
+    def test_average_of_all_wins(self):
+        self._confirmed_win(1)
+        self._confirmed_win(4, country='FR')
+        # only the earliest notification of a win counts
+        self._confirmed_win(2, notified=[datetime.datetime(2016, 5, 2), datetime.datetime(2016, 5, 3)])
+        # unconfirmed wins are left out
+        WinFactory(user=self.user, date=datetime.datetime(2016, 5, 1))
+
+        data = self._get_api_response(reverse('mi:average_time_to_confirm')).data
+        self.assertEqual(data['average'], 2.33)
+
+    def test_average_without_confirmed_wins(self):
+        data = self._get_api_response(reverse('mi:average_time_to_confirm')).data
+        self.assertIsNone(data['average'])
+
+    def test_region_average(self):
+        region_id = Country.objects.get(country='CA').overseas_region_id
+        self.assertNotEqual(Country.objects.get(country='FR').overseas_region_id, region_id)
+        self._confirmed_win(1)
+        self._confirmed_win(4)
+        self._confirmed_win(10, country='FR')
+
+        data = self._get_api_response(reverse('mi:overseas_region_detail', kwargs={'region_id': region_id})).data
+        self.assertEqual(data['avg_time_to_confirm'], 2.5)
+
+    def test_average_of_date_range(self):
+        self._confirmed_win(1)
+        self._confirmed_win(5, date=datetime.datetime(2016, 8, 1))
+        # previous financial year
+        self._confirmed_win(20, date=datetime.datetime(2016, 3, 1))
+
+        url = reverse('mi:average_time_to_confirm')
+        self.assertEqual(self._get_api_response(url).data['average'], 3.0)
+        self.assertEqual(self._get_api_response(url + '?from=2016-07-01').data['average'], 5.0)
+        self.assertEqual(self._get_api_response(url + '?to=2016-06-30').data['average'], 1.0)
+
+        region_id = Country.objects.get(country='CA').overseas_region_id
+        region_url = reverse('mi:overseas_region_detail', kwargs={'region_id': region_id})
+        self.assertEqual(self._get_api_response(region_url + '?to=2016-06-30').data['avg_time_to_confirm'], 1.0)
+
+        # HVC group 4 (Automotive) has campaign E001
+        group_url = reverse('mi:hvc_group_detail', kwargs={'group_id': 4})
+        self.assertEqual(self._get_api_response(group_url).data['avg_time_to_confirm'], 3.0)
+        self.assertEqual(self._get_api_response(group_url + '?to=2016-06-30').data['avg_time_to_confirm'], 1.0)
@@ -0,0 +1,82 @@
+import datetime
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from mi.cache import bump_win_data_version
+from mi.hierarchy import get_hierarchy
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class CountryWinsViewTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering win breakdowns of all countries """
+
+    url = reverse('mi:country_wins')
+
+    def _create_win(self, country, export_value=100000, confirmed=False, hvc='E006'):
+        win = WinFactory(user=self.user, hvc=hvc, sector=58, country=country, date=datetime.datetime(2016, 5, 1),
+                         total_expected_export_value=export_value)
+        if confirmed:
+            CustomerResponseFactory(win=win, agree_with_win=True)
+
+    def _value_totals(self, result):
+        return result['wins']['export']['totals']['value']
+
+    def test_all_countries(self):
+        self._create_win('CA', confirmed=True)
+        self._create_win('CA', hvc=None)
+        self._create_win('FR', export_value=50000)
+
+        data = self._get_api_response(self.url).data
+        countries = get_hierarchy().countries
+        self.assertEqual([c['id'] for c in data], list(countries))
+        by_code = {c['code']: c for c in data}
+        self.assertEqual(self._value_totals(by_code['CA']), {
+            'confirmed': 100000, 'unconfirmed': 100000, 'grand_total': 200000,
+        })
+        self.assertEqual(by_code['FR']['wins']['export']['hvc']['value']['unconfirmed'], 50000)
+        self.assertEqual(self._value_totals(by_code['DE'])['grand_total'], 0)
+
+    def test_countries_filter(self):
+        self._create_win('CA')
+        data = self._get_api_response(self.url + '?countries=fr,%20CA').data
+        by_code = {c['code']: c for c in data}
+        self.assertEqual(sorted(by_code), ['CA', 'FR'])
+        self.assertEqual(self._value_totals(by_code['CA'])['grand_total'], 100000)
+
+    def test_unknown_countries(self):
+        response = self._get_api_response(self.url + '?countries=CA,XX,YY', status_code=400)
+        self.assertEqual(response.data['error'], 'unknown countries: XX, YY')
+
+    def test_pagination(self):
+        all_countries = self._get_api_response(self.url).data
+
+        data = self._get_api_response(self.url + '?page=2&page-size=10').data
+        self.assertEqual(data['count'], len(all_countries))
+        self.assertEqual(data['results'], all_countries[10:20])
+        self.assertIn('page=3', data['next'])
+
+        data = self._get_api_response(self.url + '?page=1').data
+        self.assertEqual(data['results'], all_countries[:50])
+
+    def test_queries_do_not_grow_with_wins(self):
+        self._create_win('CA')
+        with CaptureQueriesContext(connection) as few_wins:
+            self._get_api_response(self.url)
+
+        for country in ['FR', 'DE', 'US', 'IN', 'CN', 'BR']:
+            self._create_win(country)
+            self._create_win(country, hvc=None, confirmed=True)
+        bump_win_data_version()
+        with CaptureQueriesContext(connection) as many_wins:
+            self._get_api_response(self.url)
+
+        def win_queries(queries):
+            return [q for q in queries.captured_queries if 'wins_win' in q['sql'] or 'mi_winsummary' in q['sql']]
+        # one query loading the columnar snapshot, whatever the number of wins and countries
+        self.assertEqual(len(win_queries(few_wins)), 1)
+        self.assertEqual(len(win_queries(many_wins)), 1)
@@ -0,0 +1,126 @@
+from collections import Counter
+import datetime
+
+from django.test import TestCase
+from freezegun import freeze_time
+
+from mi.columns import get_win_columns
+from mi.cube import get_rollup_cube
+from mi.hierarchy import bump_hierarchy_version, get_hierarchy
+from mi.models import Target, WinSummary
+from mi.tests.base_test_case import summed_rows
+from mi.views.base_view import BaseWinMIView
+from users.factories import UserFactory
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time('2016-11-01')
+class RollupCubeTestCase(TestCase):
+    """ Tests covering the rollup cube of wins over the MI hierarchy """
+
+    def setUp(self):
+        bump_hierarchy_version()
+        self.user = UserFactory.create()
+        for month, hvc, sector, country in [
+                (4, 'E006', 58, 'CA'),
+                (4, 'E006', 58, 'CA'),
+                (5, 'E019', 59, 'FR'),
+                (5, 'E017', 10, 'FR'),
+                (6, None, 60, 'CA'),
+                (6, '', 61, 'US'),
+                (7, 'E019', 58, 'US'),
+                (8, None, 10, 'JP')]:
+            win = WinFactory(user=self.user, hvc=hvc, sector=sector, country=country,
+                             date=datetime.datetime(2016, month, 1))
+            if month % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+        self.view = BaseWinMIView()
+        self.hierarchy = get_hierarchy()
+        self.cube = get_rollup_cube(get_win_columns(), self.hierarchy)
+
+    def _summaries(self, **lookups):
+        return WinSummary.objects.filter(financial_year=2016, **lookups)
+
+    def _assert_cell_matches(self, cell, summaries, msg=None):
+        self.assertEqual((cell.breakdown_sums(), cell.month_sums()), summed_rows(summaries), msg)
+
+    def test_leaf_cells_match_summaries(self):
+        self.assertEqual(sorted(self.cube.campaigns), ['E006', 'E017', 'E019'])
+        self.assertEqual(sorted(self.cube.non_hvc_sectors), [10, 60, 61])
+        self._assert_cell_matches(self.cube.campaign('E019'), self._summaries(hvc='E019'))
+        self._assert_cell_matches(self.cube.non_hvc_sectors[60], self._summaries(hvc='', sector=60))
+        self._assert_cell_matches(self.cube.country('CA'), self._summaries(country='CA'))
+        self._assert_cell_matches(self.cube.campaign('E999'), self._summaries(hvc='E999'))
+
+    def test_hvc_groups_rolled_up_from_campaigns(self):
+        for group in self.hierarchy.hvc_groups.values():
+            self._assert_cell_matches(
+                self.cube.hvc_groups[group.id], self._summaries(hvc__in=group.campaign_ids), group.name)
+
+    def test_sector_teams_rolled_up_from_campaigns_and_sectors(self):
+        for team in self.hierarchy.sector_teams.values():
+            self._assert_cell_matches(
+                self.cube.sector_teams[team.id],
+                self._summaries(hvc__in=team.campaign_ids) | self._summaries(hvc='', sector__in=team.sector_ids),
+                team.name,
+            )
+            self._assert_cell_matches(
+                self.cube.sector_teams[team.id].hvc(), self._summaries(hvc__in=team.campaign_ids), team.name)
+            self._assert_cell_matches(
+                self.cube.sector_teams[team.id].non_hvc(),
+                self._summaries(hvc='', sector__in=team.sector_ids),
+                team.name,
+            )
+
+    def test_sector_team_campaigns_by_target_not_hvc_group(self):
+        """ A team's HVC wins are those of the campaigns it has targets for, whichever team the HVC Group is in """
+
+        target = Target.objects.get(campaign_id='E017')
+        group_team_id = target.hvc_group.sector_team_id
+        other_team_id = next(team_id for team_id in self.hierarchy.sector_teams if team_id != group_team_id)
+        target.sector_team_id = other_team_id
+        target.save()
+        cube = get_rollup_cube(get_win_columns(), get_hierarchy())
+
+        def hvc_wins(cell):
+            return cell.hvc().breakdown_sums()['hvc_confirmed_number']
+
+        self.assertEqual(hvc_wins(cube.campaign('E017')), 1)
+        for team_id, moved in ((other_team_id, 1), (group_team_id, -1)):
+            self.assertEqual(hvc_wins(cube.sector_teams[team_id]), hvc_wins(self.cube.sector_teams[team_id]) + moved)
+        # the HVC Group keeps the campaign
+        self.assertEqual(cube.hvc_groups[target.hvc_group_id].sums, self.cube.hvc_groups[target.hvc_group_id].sums)
+
+    def test_overseas_regions_rolled_up_from_countries(self):
+        for region in self.hierarchy.overseas_regions.values():
+            self._assert_cell_matches(
+                self.cube.overseas_regions[region.id], self._summaries(country__in=region.country_ids), region.name)
+
+    def test_uk_total(self):
+        self._assert_cell_matches(self.cube.uk, self._summaries())
+        self.assertEqual(self.view._breakdowns(self.cube.uk)['export']['totals']['number']['grand_total'], 8)
+
+    def test_colours(self):
+        targets = self.hierarchy.sector_teams[1].targets
+        expected = Counter(
+            self.view._get_status_colour(
+                t.target, sum(s.export_value for s in self._summaries(hvc=t.campaign_id, confirmed=True)),
+            )
+            for t in targets
+        )
+        colours = self.view._colours(targets)
+        self.assertEqual(sum(colours.values()), len(targets))
+        self.assertEqual({colour: count for colour, count in colours.items() if count}, dict(expected))
+
+    def test_cube_reused_until_snapshots_change(self):
+        self.assertIs(get_rollup_cube(get_win_columns(), get_hierarchy()), self.cube)
+
+        WinFactory(user=self.user, hvc='E006', sector=58, country='CA', date=datetime.datetime(2016, 8, 1))
+        rebuilt = get_rollup_cube(get_win_columns(), get_hierarchy())
+        self.assertIsNot(rebuilt, self.cube)
+        self._assert_cell_matches(rebuilt.uk, self._summaries())
+
+        target = Target.objects.get(campaign_id='E006')
+        target.target += 1
+        target.save()
+        self.assertIsNot(get_rollup_cube(get_win_columns(), get_hierarchy()), rebuilt)
@@ -0,0 +1,136 @@
+import datetime
+
+from django.core.urlresolvers import reverse
+from freezegun import freeze_time
+
+from mi.columns import get_win_columns
+from mi.cube import get_rollup_cube
+from mi.day_index import get_day_index, PrefixSums
+from mi.models import Target, WinSummary
+from mi.tests.base_test_case import MiApiViewsBaseTestCase, summed_rows
+from mi.views.base_view import BaseWinMIView
+from wins.factories import CustomerResponseFactory, NotificationFactory, WinFactory
+from wins.models import Win
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class DayIndexTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the prefix-sum day index and MI over date ranges """
+
+    def setUp(self):
+        super().setUp()
+        for month, day, hvc, sector, country in [
+                (3, 31, 'E006', 58, 'CA'),
+                (4, 1, 'E006', 58, 'CA'),
+                (4, 30, 'E006', 58, 'CA'),
+                (5, 14, 'E019', 59, 'FR'),
+                (5, 15, 'E017', 10, 'FR'),
+                (6, 15, None, 60, 'CA'),
+                (6, 16, '', 61, 'US'),
+                (7, 1, 'E019', 58, 'US'),
+                (8, 31, None, 10, 'JP')]:
+            win = WinFactory(user=self.user, hvc=hvc, sector=sector, country=country,
+                             date=datetime.datetime(2016, month, day))
+            if day % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+        self.view = BaseWinMIView()
+
+    def _range_cube(self, date_from, date_to):
+        return get_day_index().cube(date_from, date_to, self.view._hierarchy)
+
+    def _range_rows(self, date_from, date_to):
+        """ Summary rows of wins in the range, unsaved """
+
+        return WinSummary.objects._summarise(Win.objects.filter(date__range=(date_from, date_to)))
+
+    def test_prefix_sums(self):
+        day = datetime.date(2016, 5, 1).toordinal()
+        prefix_sums = PrefixSums({
+            day: {'number': [1, 0, 0, 0], 'export_value': [10, 0, 0, 0], 'non_export_value': [0, 0, 0, 0]},
+            day + 3: {'number': [0, 2, 0, 0], 'export_value': [0, 20, 0, 0], 'non_export_value': [0, 5, 0, 0]},
+        })
+        self.assertEqual(prefix_sums.range_sums(day, day + 3)['export_value'], [10, 20, 0, 0])
+        self.assertEqual(prefix_sums.range_sums(day + 1, day + 2)['number'], [0, 0, 0, 0])
+        self.assertEqual(prefix_sums.range_sums(day + 1, day + 9)['non_export_value'], [0, 5, 0, 0])
+        self.assertEqual(prefix_sums.range_sums(day - 9, day)['number'], [1, 0, 0, 0])
+
+    def test_day_totals_are_lean_rows(self):
+        rows = list(WinSummary.objects.day_totals(Win.objects.all()))
+        self.assertEqual([row.date for row in rows], sorted(row.date for row in rows))
+        row = next(row for row in rows if row.date == datetime.date(2016, 5, 15))
+        self.assertFalse(hasattr(row, '__dict__'))
+        self.assertEqual((row.hvc, row.sector, row.country, row.confirmed, row.number), ('E017', 10, 'FR', True, 1))
+
+    def test_financial_year_range_matches_columns(self):
+        fy_cube = get_rollup_cube(get_win_columns(), self.view._hierarchy)
+        range_cube = self._range_cube(datetime.date(2016, 4, 1), datetime.date(2017, 3, 31))
+        self.assertEqual(sorted(range_cube.campaigns), sorted(fy_cube.campaigns))
+        for team_id, cell in fy_cube.sector_teams.items():
+            self.assertEqual(self.view._breakdowns(range_cube.sector_teams[team_id]), self.view._breakdowns(cell))
+        self.assertEqual(self.view._month_breakdowns(range_cube.uk), self.view._month_breakdowns(fy_cube.uk))
+
+    def test_part_month_ranges(self):
+        for date_from, date_to in [
+                (datetime.date(2016, 3, 31), datetime.date(2016, 4, 1)),
+                (datetime.date(2016, 4, 2), datetime.date(2016, 5, 14)),
+                (datetime.date(2016, 5, 15), datetime.date(2016, 6, 15)),
+                (datetime.date(2016, 6, 16), datetime.date(2016, 6, 16)),
+                (datetime.date(2016, 1, 1), datetime.date(2016, 12, 31))]:
+            cube = self._range_cube(date_from, date_to)
+            rows = self._range_rows(date_from, date_to)
+            self.assertEqual(
+                (cube.uk.breakdown_sums(), cube.uk.month_sums()), summed_rows(rows), (date_from, date_to),
+            )
+            self.assertEqual(
+                cube.country('CA').breakdown_sums(),
+                summed_rows([row for row in rows if row.country == 'CA'])[0],
+                (date_from, date_to),
+            )
+
+    def test_index_reused_until_win_data_changes(self):
+        day_index = get_day_index()
+        self.assertIs(get_day_index(), day_index)
+        # notifications and targets don't change totals by day
+        NotificationFactory(win=Win.objects.first())
+        target = Target.objects.get(campaign_id='E006')
+        target.target += 1
+        target.save()
+        self.assertIs(get_day_index(), day_index)
+
+        CustomerResponseFactory(win=Win.objects.filter(is_confirmed=False).first(), agree_with_win=True)
+        self.assertIsNot(get_day_index(), day_index)
+        day_index = get_day_index()
+        WinFactory(user=self.user, hvc='E006', sector=58, country='CA', date=datetime.datetime(2016, 5, 2))
+        reloaded = get_day_index()
+        self.assertIsNot(reloaded, day_index)
+        cube = reloaded.cube(datetime.date(2016, 5, 2), datetime.date(2016, 5, 2), self.view._hierarchy)
+        self.assertEqual(self.view._breakdowns(cube.campaign('E006'))['export']['hvc']['number']['total'], 1)
+
+    def test_sector_team_detail_range(self):
+        url = reverse('mi:sector_team_detail', kwargs={'team_id': 1})
+        wins = self._get_api_response(url + '?from=2016-04-02&to=2016-07-01').data['wins']
+        self.assertEqual(wins['export']['hvc']['number']['total'], 3)
+        self.assertEqual(wins['export']['non_hvc']['number']['total'], 2)
+
+        wins = self._get_api_response(url + '?to=2016-04-30').data['wins']
+        self.assertEqual(wins['export']['hvc']['number']['total'], 2)
+
+    def test_sector_team_months_range(self):
+        url = reverse('mi:sector_team_months', kwargs={'team_id': 1})
+        months = self._get_api_response(url + '?from=2016-05-01&to=2016-06-15').data['months']
+        self.assertEqual([m['date'] for m in months], ['2016-05', '2016-06'])
+        self.assertEqual([m['totals']['export']['totals']['number']['grand_total'] for m in months], [1, 2])
+
+    def test_range_over_previous_years(self):
+        months = self._get_api_response(reverse('mi:uk_months') + '?from=2016-02-01&to=2016-04-30').data['months']
+        self.assertEqual([m['date'] for m in months], ['2016-02', '2016-03', '2016-04'])
+        self.assertEqual([m['totals']['export']['totals']['number']['grand_total'] for m in months], [0, 1, 3])
+
+    def test_invalid_range(self):
+        url = reverse('mi:uk_detail')
+        for query, error in [
+                ('?from=2016-13-01', 'from must be a date in YYYY-MM-DD format'),
+                ('?to=yesterday', 'to must be a date in YYYY-MM-DD format'),
+                ('?from=2016-06-01&to=2016-05-01', 'from must not be after to')]:
+            response = self._get_api_response(url + query, status_code=400)
+            self.assertEqual(response.data, {'error': error})
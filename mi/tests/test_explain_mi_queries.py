@@ -0,0 +1,50 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from freezegun import freeze_time
+
+from mi.management.commands.explain_mi_queries import SEQUENTIAL_SCANS
+from mi.models import Country
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from users.factories import UserFactory
+from wins.factories import WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class ExplainMIQueriesTestCase(TestCase):
+    """ Tests covering the MI query plan advisor """
+
+    def setUp(self):
+        user = UserFactory.create()
+        WinFactory(user=user, hvc='E006', sector=58, date=datetime.datetime(2016, 5, 1))
+        # a non-HVC win in the first region, which its top non-HVC needs
+        country = Country.objects.filter(overseas_region__id=1).first().country
+        WinFactory(user=user, hvc=None, sector=58, country=country, date=datetime.datetime(2016, 6, 1))
+
+    def test_explains_every_endpoint(self):
+        out = io.StringIO()
+        call_command('explain_mi_queries', stdout=out)
+        output = out.getvalue()
+
+        self.assertIn('SectorTeamDetailView {\'team_id\': \'1\'}: 200', output)
+        self.assertIn('TopNonHvcSectorCountryWinsView', output)
+        self.assertNotIn('failed', output)
+        self.assertRegex(output, r'\d+ of \d+ queries scan wins_win sequentially\n$')
+
+    def test_plans_shown_when_verbose(self):
+        out = io.StringIO()
+        call_command('explain_mi_queries', verbosity=2, query='from=2016-05-01&to=2016-06-30', stdout=out)
+        self.assertIn('SELECT', out.getvalue())
+
+    def test_sequential_scan_patterns(self):
+        sqlite, postgresql = SEQUENTIAL_SCANS['sqlite'], SEQUENTIAL_SCANS['postgresql']
+        self.assertTrue(sqlite.search('0 0 0 SCAN TABLE wins_win'))
+        self.assertTrue(sqlite.search('2 0 0 SCAN wins_win'))
+        self.assertFalse(sqlite.search('0 0 0 SCAN TABLE wins_win USING INDEX wins_win_non_hvc_date'))
+        self.assertFalse(sqlite.search('0 0 0 SEARCH TABLE wins_win USING INDEX wins_win_hvc_date (hvc=?)'))
+        self.assertFalse(sqlite.search('0 0 0 SCAN TABLE wins_winsummary'))
+        self.assertTrue(postgresql.search('  ->  Seq Scan on wins_win  (cost=0.00..1.01 rows=1 width=4)'))
+        self.assertFalse(postgresql.search('Index Scan using wins_win_non_hvc_date on wins_win'))
+
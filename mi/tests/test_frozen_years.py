@@ -0,0 +1,101 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.core.urlresolvers import reverse
+from freezegun import freeze_time
+
+from mi.hierarchy import get_hierarchy
+from mi.models import FrozenResponse
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.factories import CustomerResponseFactory, NotificationFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class FrozenYearsTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering previous financial years, frozen by `freeze_mi_year` """
+
+    url = reverse('mi:sector_team_detail', kwargs={'team_id': 1})
+
+    def setUp(self):
+        super().setUp()
+        for date in [datetime.datetime(2015, 4, 1), datetime.datetime(2016, 3, 31), datetime.datetime(2016, 4, 1)]:
+            win = WinFactory(user=self.user, hvc='E006', sector=58, date=date)
+            CustomerResponseFactory(win=win, agree_with_win=True)
+        WinFactory(user=self.user, hvc=None, sector=58, date=datetime.datetime(2015, 12, 1))
+
+    def _freeze(self, year):
+        out = StringIO()
+        call_command('freeze_mi_year', str(year), stdout=out)
+        return out.getvalue()
+
+    def _wins(self, url):
+        return self._get_api_response(url).data['wins']['export']
+
+    def test_freeze_every_endpoint_and_entity(self):
+        output = self._freeze(2015)
+        self.assertIn('Froze', output)
+        hierarchy = get_hierarchy()
+        self.assertEqual(
+            sorted(FrozenResponse.objects.filter(endpoint='SectorTeamDetailView').values_list('entity', flat=True)),
+            sorted('team_id={}'.format(team_id) for team_id in hierarchy.sector_teams),
+        )
+        self.assertEqual(
+            FrozenResponse.objects.filter(endpoint='CountryDetailView').count(), len(hierarchy.countries))
+        self.assertTrue(FrozenResponse.objects.filter(endpoint='SectorTeamsOverviewView', entity='').exists())
+        self.assertTrue(FrozenResponse.objects.filter(endpoint='UKMonthsView', entity='').exists())
+
+    def test_closed_year_served_frozen(self):
+        self._freeze(2015)
+        wins = self._wins(self.url + '?year=2015')
+        self.assertEqual(wins['hvc']['number']['confirmed'], 2)
+        self.assertEqual(wins['non_hvc']['number']['unconfirmed'], 1)
+
+        # changes to a closed year's wins don't change its frozen responses
+        WinFactory(user=self.user, hvc='E006', sector=58, date=datetime.datetime(2015, 5, 1))
+        self.assertEqual(self._wins(self.url + '?year=2015'), wins)
+
+    def test_closed_year_months(self):
+        self._freeze(2015)
+        url = reverse('mi:sector_team_months', kwargs={'team_id': 1}) + '?year=2015'
+        months = self._get_api_response(url).data['months']
+        self.assertEqual(months[0]['date'], '2015-04')
+        self.assertEqual(months[-1]['date'], '2016-03')
+        self.assertEqual(months[-1]['totals']['export']['totals']['number']['grand_total'], 3)
+
+    def _confirmed_in(self, date, days):
+        win = WinFactory(user=self.user, hvc='E006', sector=58, date=date)
+        notification = NotificationFactory(win=win)
+        notification.created = date
+        notification.save()
+        response = CustomerResponseFactory(win=win, agree_with_win=True)
+        response.created = date + datetime.timedelta(days=days)
+        response.save()
+
+    def test_closed_year_average_time_to_confirm(self):
+        self._confirmed_in(datetime.datetime(2015, 6, 1), 2)
+        self._confirmed_in(datetime.datetime(2016, 5, 1), 10)
+        self._freeze(2015)
+        self.assertEqual(self._get_api_response(self.url + '?year=2015').data['avg_time_to_confirm'], 2.0)
+        self.assertEqual(self._get_api_response(self.url).data['avg_time_to_confirm'], 10.0)
+
+    def test_current_year_live(self):
+        self.assertEqual(self._wins(self.url + '?year=2016'), self._wins(self.url))
+        self.assertEqual(self._wins(self.url)['hvc']['number']['confirmed'], 1)
+
+    def test_closed_year_not_frozen(self):
+        response = self._get_api_response(self.url + '?year=2014', status_code=404)
+        self.assertEqual(response.data, {'error': 'financial year 2014 has not been frozen'})
+
+    def test_invalid_year(self):
+        for query in ['?year=2017', '?year=last', '?year=2015&from=2015-05-01']:
+            self.assertIn("error", self._get_api_response(self.url + query, status_code=400).data)
+
+    def test_open_year_not_frozen(self):
+        with self.assertRaises(CommandError):
+            self._freeze(2016)
+
+    def test_year_frozen_once(self):
+        self._freeze(2015)
+        with self.assertRaises(CommandError):
+            self._freeze(2015)
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from mi.factories import TargetFactory
+from mi.hierarchy import bump_hierarchy_version, get_hierarchy
+from mi.models import Country, HVCGroup, OverseasRegion, SectorTeam, Target
+from wins.factories import HVCFactory
+
+
+class HierarchyTestCase(TestCase):
+    """ Tests covering the MI hierarchy snapshot """
+
+    def setUp(self):
+        bump_hierarchy_version()
+
+    def test_snapshot_matches_database(self):
+        hierarchy = get_hierarchy()
+        self.assertEqual(len(hierarchy.sector_teams), SectorTeam.objects.count())
+        self.assertEqual(len(hierarchy.hvc_groups), HVCGroup.objects.count())
+        self.assertEqual(len(hierarchy.overseas_regions), OverseasRegion.objects.count())
+        self.assertEqual(len(hierarchy.countries), Country.objects.count())
+        self.assertEqual(len(hierarchy.targets), Target.objects.count())
+
+        team = SectorTeam.objects.get(id=1)
+        team_info = hierarchy.sector_teams[1]
+        self.assertEqual(team_info.name, team.name)
+        self.assertEqual(sorted(team_info.sector_ids), sorted(team.sector_ids))
+        self.assertEqual(sorted(team_info.campaign_ids), sorted(team.campaign_ids))
+        self.assertEqual(
+            sorted(g.id for g in team.hvc_groups.all()),
+            sorted(team_info.hvc_group_ids),
+        )
+
+        for region in OverseasRegion.objects.all():
+            region_info = hierarchy.overseas_regions[region.id]
+            self.assertEqual(sorted(region_info.country_ids), sorted(c.code for c in region.country_ids))
+            self.assertEqual(sorted(region_info.campaign_ids), sorted(region.campaign_ids))
+
+    def test_lookups(self):
+        hierarchy = get_hierarchy()
+        target = Target.objects.first()
+        self.assertEqual(hierarchy.campaign_to_target[target.campaign_id].target, target.target)
+        for sector_id, team in hierarchy.sector_to_team.items():
+            self.assertIn(sector_id, team.sector_ids)
+        for code, region in hierarchy.country_to_region.items():
+            self.assertIn(code, region.country_ids)
+
+    def test_snapshot_is_immutable(self):
+        hierarchy = get_hierarchy()
+        with self.assertRaises(TypeError):
+            hierarchy.sector_teams[1] = None
+        with self.assertRaises(AttributeError):
+            hierarchy.sector_teams[1].name = 'Renamed'
+
+    def test_snapshot_reused_without_queries(self):
+        hierarchy = get_hierarchy()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIs(get_hierarchy(), hierarchy)
+        # only the version stamp is read from the MI cache
+        self.assertEqual(len(queries), 1)
+
+    def test_target_change_reloads_snapshot(self):
+        hierarchy = get_hierarchy()
+        target = Target.objects.get(campaign_id='E006')
+        target.target = 123
+        target.save()
+        reloaded = get_hierarchy()
+        self.assertIsNot(reloaded, hierarchy)
+        self.assertEqual(reloaded.campaign_to_target['E006'].target, 123)
+
+    def test_new_target_reloads_snapshot(self):
+        self.assertNotIn('E999', get_hierarchy().campaign_to_target)
+        TargetFactory.create(campaign_id='E999', sector_team_id=1, hvc_group_id=1, country_id=1)
+        self.assertIn('E999', get_hierarchy().campaign_to_target)
+
+    def test_hvc_change_reloads_names(self):
+        HVCFactory.create(campaign_id='E006', name='Renamed campaign')
+        self.assertEqual(get_hierarchy().campaign_to_target['E006'].name, 'Renamed campaign')
+
+    def test_target_names_without_hvc_queries(self):
+        HVCFactory.create(campaign_id='E006', name='Renamed campaign')
+        get_hierarchy()
+        targets = list(Target.objects.filter(campaign_id__in=['E006', 'E019']).order_by('campaign_id'))
+        with CaptureQueriesContext(connection) as queries:
+            names = [str(target) for target in targets]
+        self.assertFalse([q for q in queries if 'wins_hvc' in q['sql']])
+        self.assertTrue(names[0].startswith('Target: Renamed campaign - '))
@@ -157,6 +157,7 @@ class HVCGroupDetailTestCase(MiApiViewsBaseTestCase):
     expected_response = {}
 
     def setUp(self):
+        super().setUp()
         self.expected_response = {
             "hvcs": {
                 "target": GROUP_4_TARGET,
@@ -461,6 +462,7 @@ class HVCGroupCampaignViewsTestCase(MiApiViewsBaseTestCase):
     expected_response = {}
 
     def setUp(self):
+        super().setUp()
         self.expected_response = {
             "campaigns": [],
             "name": "Automotive",
@@ -0,0 +1,30 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from freezegun import freeze_time
+
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from users.factories import UserFactory
+from wins.factories import WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class ProfileMIEndpointsTestCase(TestCase):
+    """ Tests covering profiling MI endpoints """
+
+    def setUp(self):
+        WinFactory(user=UserFactory.create(), hvc='E006', sector=58, date=datetime.datetime(2016, 5, 1))
+
+    def test_profiles_team_region_and_group_endpoints(self):
+        out = io.StringIO()
+        call_command('profile_mi_endpoints', cold=True, query='from=2016-04-01&to=2016-09-30', stdout=out)
+        output = out.getvalue()
+
+        self.assertRegex(
+            output, r'SectorTeamDetailView \{\'team_id\': \'1\'\}: [\d.]+ ms, peak [\d.]+ KiB, \d+ queries',
+        )
+        self.assertIn('OverseasRegionDetailView', output)
+        self.assertNotIn('CountryDetailView', output)
+        self.assertRegex(output, r'Total [\d.]+ ms, largest peak [\d.]+ KiB\n$')
@@ -0,0 +1,291 @@
+from concurrent.futures import Future
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from alice.client import AliceClient
+from mi.cache import mi_cache
+from mi.models import Target
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from mi.views.base_view import BaseMIView, get_refresh_executor
+from wins.factories import CustomerResponseFactory, NotificationFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET)
+class ResponseCacheTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering caching and revalidation of MI responses """
+
+    url = reverse('mi:sector_team_detail', kwargs={'team_id': 1})
+
+    def setUp(self):
+        super().setUp()
+        self.alice_client.login(username=self.user.email, password="asdf")
+
+    def _create_win(self):
+        return WinFactory(user=self.user, hvc='E006', sector=58, date=datetime.datetime(2016, 5, 1))
+
+    def test_response_has_etag(self):
+        response = self.alice_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'])
+
+    def test_repeated_request_served_from_cache(self):
+        first = self.alice_client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.alice_client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertFalse([q for q in queries if 'mi_winsummary' in q['sql']])
+
+    def test_if_none_match_not_modified(self):
+        etag = self.alice_client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.alice_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse([q for q in queries if 'mi-response' in q['sql']])
+        self.assertFalse([q for q in queries if 'mi_winsummary' in q['sql']])
+
+    def test_stale_etag_gets_full_response(self):
+        etag = self.alice_client.get(self.url)['ETag']
+        self._create_win()
+        response = self.alice_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_win_invalidates(self):
+        before = self.alice_client.get(self.url)
+        self._create_win()
+        after = self.alice_client.get(self.url)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.data['wins']['export']['hvc']['number']['total'], 1)
+
+    def test_customer_response_invalidates(self):
+        win = self._create_win()
+        before = self.alice_client.get(self.url)
+        CustomerResponseFactory(win=win, agree_with_win=True)
+        after = self.alice_client.get(self.url)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.data['wins']['export']['hvc']['number']['confirmed'], 1)
+
+    def test_notification_invalidates(self):
+        win = self._create_win()
+        etag = self.alice_client.get(self.url)['ETag']
+        NotificationFactory(win=win)
+        self.assertNotEqual(self.alice_client.get(self.url)['ETag'], etag)
+
+    def test_target_invalidates(self):
+        before = self.alice_client.get(self.url)
+        target = Target.objects.get(campaign_id='E006')
+        target.target += 1000
+        target.save()
+        after = self.alice_client.get(self.url)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.data['hvcs']['target'], before.data['hvcs']['target'] + 1000)
+
+    def test_kwargs_and_query_in_key(self):
+        etag = self.alice_client.get(self.url)['ETag']
+        other_team = self.alice_client.get(reverse('mi:sector_team_detail', kwargs={'team_id': 2}))
+        self.assertNotEqual(other_team['ETag'], etag)
+        self.assertNotEqual(self.alice_client.get(self.url + '?x=1')['ETag'], etag)
+
+    def test_next_day_not_cached(self):
+        etag = self.alice_client.get(self.url)['ETag']
+        with freeze_time('2016-11-02'):
+            self.assertNotEqual(self.alice_client.get(self.url)['ETag'], etag)
+
+    def test_cached_response_needs_permission(self):
+        self.alice_client.get(self.url)
+        self.alice_client.logout()
+        self.assertEqual(self.alice_client.get(self.url).status_code, 403)
+
+    def test_errors_not_cached(self):
+        response = self.alice_client.get(reverse('mi:sector_team_detail', kwargs={'team_id': 100}))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+    @override_settings(MI_RESPONSE_CACHE_TIMEOUT=0)
+    def test_caching_disabled(self):
+        response = self.alice_client.get(self.url)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET)
+class ResponseCoalescingTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering identical MI requests waiting on the first to be worked out """
+
+    url = reverse('mi:sector_team_detail', kwargs={'team_id': 1})
+
+    def setUp(self):
+        super().setUp()
+        self.alice_client.login(username=self.user.email, password="asdf")
+        # key of the response, as it would be worked out now
+        self.key = self.alice_client.get(self.url)['ETag'].strip('"')
+        mi_cache().delete(self.key)
+        self.lock_key = self.key + ':lock'
+
+    def test_lock_released_after_response(self):
+        self.alice_client.get(self.url)
+        self.assertIsNone(mi_cache().get(self.lock_key))
+        self.assertIsNotNone(mi_cache().get(self.key))
+
+    def test_lock_released_after_error(self):
+        with mock.patch('mi.views.sector_views.SectorTeamDetailView.get', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.alice_client.get(self.url)
+        self.assertIsNone(mi_cache().get(self.lock_key))
+
+    def test_waits_for_locked_response(self):
+        mi_cache().add(self.lock_key, True)
+
+        def response_worked_out_elsewhere(seconds):
+            mi_cache().set(self.key, {'worked out': 'elsewhere'})
+
+        with mock.patch('mi.views.base_view.time.sleep', side_effect=response_worked_out_elsewhere) as sleep:
+            response = self.alice_client.get(self.url)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response.data, {'worked out': 'elsewhere'})
+        # lock belongs to the other request
+        self.assertIsNotNone(mi_cache().get(self.lock_key))
+
+    def test_works_out_response_when_lock_holder_fails(self):
+        mi_cache().add(self.lock_key, True)
+
+        def lock_holder_failed(seconds):
+            mi_cache().delete(self.lock_key)
+
+        with mock.patch('mi.views.base_view.time.sleep', side_effect=lock_holder_failed):
+            response = self.alice_client.get(self.url)
+        self.assertIn('wins', response.data)
+
+    @override_settings(MI_RESPONSE_LOCK_WAIT=0)
+    def test_works_out_response_when_wait_times_out(self):
+        mi_cache().add(self.lock_key, True)
+        response = self.alice_client.get(self.url)
+        self.assertIn('wins', response.data)
+        self.assertIsNotNone(mi_cache().get(self.key))
+
+
+class ForegroundExecutor:
+    """ Executor running refreshes as they're submitted, as sqlite's in-memory test database is per thread """
+
+    def submit(self, fn):
+        future = Future()
+        future.set_result(fn())
+        return future
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET, MI_RESPONSE_MAX_STALENESS=600)
+class StaleResponseTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering MI responses served stale while they are worked out again """
+
+    url = reverse('mi:sector_team_detail', kwargs={'team_id': 1})
+
+    def setUp(self):
+        super().setUp()
+        self.alice_client.login(username=self.user.email, password="asdf")
+        self.first = self.alice_client.get(self.url)
+
+    def _create_win(self):
+        WinFactory(user=self.user, hvc='E006', sector=58, date=datetime.datetime(2016, 5, 1))
+
+    def _total(self, response):
+        return response.data['wins']['export']['hvc']['number']['total']
+
+    def _refreshing_in_foreground(self):
+        """ Refreshes run as submitted, recording the views refreshing them and the views they are submitted by """
+
+        views = []
+        refresh_in_background = BaseMIView._refresh_in_background
+        refresh_response = BaseMIView._refresh_response
+
+        def submitted_by(view, *args):
+            views.append(('submitted', view))
+            return refresh_in_background(view, *args)
+
+        def refreshed_by(view, *args):
+            views.append(('refreshed', view))
+            return refresh_response(view, *args)
+
+        patches = [
+            mock.patch('mi.views.base_view.get_refresh_executor', return_value=ForegroundExecutor()),
+            # connections are closed as refresh threads finish, not the test's own
+            mock.patch('mi.views.base_view.connections'),
+            mock.patch.object(BaseMIView, '_refresh_in_background', autospec=True, side_effect=submitted_by),
+            mock.patch.object(BaseMIView, '_refresh_response', autospec=True, side_effect=refreshed_by),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        return views
+
+    def test_stale_response_served_and_refreshed(self):
+        self._create_win()
+        views = self._refreshing_in_foreground()
+        with freeze_time('2016-11-01 00:05:00'):
+            stale = self.alice_client.get(self.url)
+        self.assertEqual([step for step, view in views], ['submitted', 'refreshed'])
+        self.assertEqual(self._total(stale), 0)
+        self.assertEqual(stale['Age'], '300')
+        self.assertEqual(stale['ETag'], self.first['ETag'])
+
+        fresh = self.alice_client.get(self.url)
+        self.assertEqual(self._total(fresh), 1)
+        self.assertFalse(fresh.has_header('Age'))
+        self.assertNotEqual(fresh['ETag'], self.first['ETag'])
+
+    def test_refreshed_by_a_view_of_its_own(self):
+        self._create_win()
+        views = self._refreshing_in_foreground()
+        with freeze_time('2016-11-01 00:05:00'):
+            self.alice_client.get(self.url)
+        (_, submitting), (_, refreshing) = views
+        self.assertIsNot(refreshing, submitting)
+        self.assertIsNot(refreshing.request, submitting.request)
+        self.assertEqual(refreshing.request.path, self.url)
+        self.assertEqual(refreshing.kwargs, submitting.kwargs)
+        self.assertIn('_cube', refreshing.__dict__)
+        self.assertNotIn('_cube', submitting.__dict__)
+
+    def test_refreshes_share_a_bounded_executor(self):
+        executor = get_refresh_executor()
+        self.assertIs(get_refresh_executor(), executor)
+        self.assertEqual(executor._max_workers, settings.MI_RESPONSE_REFRESH_THREADS)
+
+    def test_stale_response_revalidated(self):
+        self._create_win()
+        with mock.patch.object(BaseMIView, '_refresh_in_background', autospec=True):
+            response = self.alice_client.get(self.url, HTTP_IF_NONE_MATCH=self.first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Age'], '0')
+
+    def test_single_refresh_at_a_time(self):
+        self._create_win()
+        with mock.patch.object(BaseMIView, '_refresh_in_background', autospec=True) as refresh:
+            for i in range(3):
+                self.assertEqual(self._total(self.alice_client.get(self.url)), 0)
+        self.assertEqual(refresh.call_count, 1)
+
+    def test_too_stale_worked_out(self):
+        self._create_win()
+        with mock.patch.object(BaseMIView, '_refresh_in_background', autospec=True) as refresh:
+            with freeze_time('2016-11-01 00:10:01'):
+                response = self.alice_client.get(self.url)
+        self.assertFalse(refresh.called)
+        self.assertEqual(self._total(response), 1)
+        self.assertFalse(response.has_header('Age'))
+
+    @override_settings(MI_RESPONSE_MAX_STALENESS=0)
+    def test_not_served_stale_by_default(self):
+        self._create_win()
+        self.assertEqual(self._total(self.alice_client.get(self.url)), 1)
@@ -4,7 +4,9 @@ from django.core.urlresolvers import reverse
 from factory.fuzzy import FuzzyChoice
 from freezegun import freeze_time
 
-from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from mi.models import WinSummary
+from mi.tests.base_test_case import MiApiViewsBaseTestCase, summed_rows
+from mi.views.sector_views import SectorTeamDetailView
 from wins.factories import (
     CustomerResponseFactory,
     NotificationFactory,
@@ -22,6 +24,7 @@ class SectorTeamDetailViewsTestCase(MiApiViewsBaseTestCase):
     expected_response = {}
 
     def setUp(self):
+        super().setUp()
         # initialise for every test
         self.expected_response = {
             "wins": {
@@ -480,3 +483,20 @@ class SectorTeamDetailViewsTestCase(MiApiViewsBaseTestCase):
         avg_time_to_confirm should be 0.0 when there are no wins, not error.
         """
         self.assertEqual(self._api_response_data['avg_time_to_confirm'], 0.0)
+
+    def test_sector_team_detail_1_breakdown_summed_from_cube(self):
+        """ Breakdown of the team's wins sums a rollup cube cell, matching its summary rows added up one by one """
+        for i in range(3):
+            win = WinFactory(user=self.user, hvc=FuzzyChoice(self.TEAM_1_HVCS),
+                             sector=FuzzyChoice(self.TEAM_1_SECTORS))
+            CustomerResponseFactory(win=win, agree_with_win=True)
+            WinFactory(user=self.user, hvc=FuzzyChoice(self.TEAM_1_HVCS), sector=FuzzyChoice(self.TEAM_1_SECTORS))
+            WinFactory(user=self.user, hvc=None, sector=FuzzyChoice(self.TEAM_1_SECTORS))
+
+        view = SectorTeamDetailView()
+        wins = view._get_all_wins(view._hierarchy.sector_teams[1])
+        with self.assertNumQueries(0):
+            breakdowns = view._breakdowns(wins)
+        # all wins are team 1's
+        self.assertEqual(wins.breakdown_sums(), summed_rows(WinSummary.objects.filter(financial_year=2016))[0])
+        self.assertEqual(breakdowns['export']['totals']['number']['grand_total'], 9)
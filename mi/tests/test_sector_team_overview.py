@@ -1,9 +1,15 @@
 import datetime
 
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from factory.fuzzy import FuzzyChoice
 from freezegun import freeze_time
 
+from alice.client import AliceClient
+from mi.columns import get_win_columns
+from mi.hierarchy import get_hierarchy
 from mi.tests.base_test_case import MiApiViewsBaseTestCase
 from wins.factories import (
     CustomerResponseFactory,
@@ -459,4 +465,33 @@ class SectorTeamOverviewTestCase(MiApiViewsBaseTestCase):
         self.assertEqual(team_1_data['values']['totals']['confirmed'], 2000000)
         self.assertEqual(team_1_data['values']['totals']['unconfirmed'], 0)
 
+    @override_settings(MI_SECRET=AliceClient.SECRET, MI_RESPONSE_CACHE_TIMEOUT=0)
+    def _overview_query_count(self):
+        """ Number of queries made working out an overview, after logging in and loading the snapshots """
+
+        self.alice_client.login(username=self.user.email, password="asdf")
+        get_hierarchy()
+        get_win_columns()
+        with CaptureQueriesContext(connection) as queries:
+            self.alice_client.get(self.url)
+        return len(queries)
+
+    def test_query_count_independent_of_wins(self):
+        """
+        Overview is worked out from the win and hierarchy snapshots,
+        so adding wins for every HVC of a team doesn't add queries
+        """
+        no_wins_count = self._overview_query_count()
+
+        for hvc_code in self.TEAM_1_HVCS:
+            self._create_hvc_win(hvc_code=hvc_code, confirm=True)
+            self._create_non_hvc_win()
+
+        self.assertEqual(self._overview_query_count(), no_wins_count)
+
+    def test_query_count_independent_of_teams(self):
+        """ Fewer queries than there are Sector Teams, whatever the number of teams """
+
+        self.assertLess(self._overview_query_count(), len(self._get_api_response(self.url).data))
+
     # further tests for sector team overview: values>totals, hvc_performance - specially zero target ones
@@ -1,11 +1,15 @@
 import datetime
 
 from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from factory.fuzzy import FuzzyChoice
 from freezegun import freeze_time
 
-from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from mi.models import WinSummary
+from mi.tests.base_test_case import MiApiViewsBaseTestCase, summed_rows
 from mi.utils import sort_campaigns_by
+from mi.views.sector_views import SectorTeamMonthsView
 from wins.factories import (
     CustomerResponseFactory,
     NotificationFactory,
@@ -234,6 +238,7 @@ class SectorTeamCampaignViewsTestCase(MiApiViewsBaseTestCase):
     expected_response = {}
 
     def setUp(self):
+        super().setUp()
         self.expected_response = {
             "campaigns": [],
             "name": "Financial & Professional Services",
@@ -351,6 +356,37 @@ class SectorTeamCampaignViewsTestCase(MiApiViewsBaseTestCase):
         api_response = self._get_api_response(st_url)
         self.assertJSONEqual(api_response.content.decode("utf-8"), self.expected_response)
 
+    def test_campaigns_grouped_with_wins_first(self):
+        for hvc_code in ['E160', 'E019']:
+            WinFactory(user=self.user, hvc=hvc_code, sector=FuzzyChoice(self.TEAM_1_SECTORS))
+        view = SectorTeamMonthsView()
+        team = view._hierarchy.sector_teams[1]
+        grouped = view._group_wins_by_campaign(team.targets)
+
+        campaign_ids = [target.campaign_id for target, _ in grouped]
+        self.assertEqual(campaign_ids[:2], ['E019', 'E160'])
+        without_wins = [t.campaign_id for t in team.targets if t.campaign_id not in ('E019', 'E160')]
+        self.assertEqual(campaign_ids[2:], without_wins)
+        self.assertEqual(
+            [wins.breakdown_sums()['hvc_unconfirmed_number'] for _, wins in grouped],
+            [1] * 2 + [0] * (len(team.targets) - 2),
+        )
+
+    def _win_queries(self, queries):
+        return [q for q in queries if 'wins_win' in q['sql'] or 'mi_winsummary' in q['sql']]
+
+    def test_campaigns_queries_flat_in_campaigns_with_wins(self):
+        st_url = reverse('mi:sector_team_campaigns', kwargs={'team_id': 1})
+        WinFactory(user=self.user, hvc=self.TEAM_1_HVCS[0], sector=FuzzyChoice(self.TEAM_1_SECTORS))
+        with CaptureQueriesContext(connection) as one_campaign:
+            self._get_api_response(st_url)
+
+        for hvc_code in self.TEAM_1_HVCS:
+            WinFactory(user=self.user, hvc=hvc_code, sector=FuzzyChoice(self.TEAM_1_SECTORS))
+        with CaptureQueriesContext(connection) as all_campaigns:
+            self._get_api_response(st_url)
+        self.assertEqual(len(self._win_queries(all_campaigns)), len(self._win_queries(one_campaign)))
+
 
 @freeze_time(MiApiViewsBaseTestCase.frozen_date)
 class SectorTeamMonthlyViewsTestCase(MiApiViewsBaseTestCase):
@@ -931,6 +967,7 @@ class SectorTeamMonthlyViewsTestCase(MiApiViewsBaseTestCase):
     }
 
     def setUp(self):
+        super().setUp()
         self.expected_response['hvcs']['target'] = self.CAMPAIGN_TARGET * len(self.TEAM_1_HVCS)
 
     def test_sector_team_month_1(self):
@@ -972,3 +1009,20 @@ class SectorTeamMonthlyViewsTestCase(MiApiViewsBaseTestCase):
         api_response = self._get_api_response(st_url)
 
         self.assertJSONEqual(api_response.content.decode("utf-8"), self.expected_response)
+
+    def test_sector_team_month_1_repeated_on_same_view(self):
+        """ Months breakdown keeps no running totals on the view, so working it out twice gives the same result """
+
+        for i in range(4, 11):
+            WinFactory(user=self.user, hvc=FuzzyChoice(self.TEAM_1_HVCS), date=datetime.datetime(2016, i, 1),
+                       sector=FuzzyChoice(self.TEAM_1_SECTORS))
+            WinFactory(user=self.user, hvc=None, date=datetime.datetime(2016, i, 1),
+                       sector=FuzzyChoice(self.TEAM_1_SECTORS))
+
+        view = SectorTeamMonthsView()
+        wins = view._get_all_wins(view._hierarchy.sector_teams[1])
+        months = view._month_breakdowns(wins)
+        self.assertEqual(view._month_breakdowns(wins), months)
+        # all wins are team 1's, summed row by row
+        self.assertEqual(wins.month_sums(), summed_rows(WinSummary.objects.filter(financial_year=2016))[1])
+        self.assertEqual(months[-1]['totals']['export']['totals']['number']['grand_total'], 14)
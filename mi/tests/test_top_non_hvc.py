@@ -0,0 +1,117 @@
+import datetime
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from mi.hierarchy import get_hierarchy
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.factories import WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class TopNonHvcTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the top non-HVC Win endpoints of Sector Teams and Overseas Regions """
+
+    team_url = reverse('mi:sector_team_top_non_hvc', kwargs={'team_id': 1})
+    teams_url = reverse('mi:sector_teams_top_non_hvc')
+    regions_url = reverse('mi:overseas_regions_top_non_hvc')
+
+    def _create_non_hvc_win(self, sector, country, export_value, date=datetime.datetime(2016, 5, 1)):
+        WinFactory(user=self.user, hvc=None, sector=sector, country=country, date=date,
+                   total_expected_export_value=export_value)
+
+    def _region_url(self, country):
+        region_id = get_hierarchy().country_to_region[country].id
+        return reverse('mi:overseas_region_top_non_hvc', kwargs={'region_id': region_id})
+
+    def test_team_top_non_hvc(self):
+        self._create_non_hvc_win(58, 'CA', 100000)
+        self._create_non_hvc_win(58, 'CA', 300000)
+        self._create_non_hvc_win(59, 'FR', 200000)
+        # an HVC win, a win of another team and one of another financial year don't count
+        WinFactory(user=self.user, hvc='E006', sector=58, country='CA', date=datetime.datetime(2016, 5, 1))
+        self._create_non_hvc_win(1, 'CA', 900000)
+        self._create_non_hvc_win(58, 'CA', 900000, date=datetime.datetime(2016, 1, 1))
+
+        data = self._get_api_response(self.team_url).data
+        self.assertEqual(data, [
+            {
+                'region': 'Canada',
+                'sector': get_hierarchy().sectors[58].name,
+                'totalValue': 400000,
+                'totalWins': 2,
+                'percentComplete': 100,
+                'averageWinValue': 200000,
+                'averageWinPercent': 50,
+            },
+            {
+                'region': 'France',
+                'sector': get_hierarchy().sectors[59].name,
+                'totalValue': 200000,
+                'totalWins': 1,
+                'percentComplete': 50,
+                'averageWinValue': 200000,
+                'averageWinPercent': 50,
+            },
+        ])
+
+    def test_limit(self):
+        for i, sector in enumerate(self.TEAM_1_SECTORS[:8]):
+            self._create_non_hvc_win(sector, 'CA', 100000 * (i + 1))
+
+        self.assertEqual(len(self._get_api_response(self.team_url).data), 5)
+        data = self._get_api_response(self.team_url + '?limit=7').data
+        self.assertEqual([row['totalValue'] for row in data], [100000 * i for i in range(8, 1, -1)])
+
+    def test_invalid_limit(self):
+        for limit in ['0', '-1', 'five', '101']:
+            response = self._get_api_response(self.team_url + '?limit=' + limit, status_code=400)
+            self.assertIn('limit', response.data['error'])
+
+    def test_no_wins(self):
+        self.assertEqual(self._get_api_response(self.team_url).data, [])
+        self.assertEqual(self._get_api_response(self._region_url('CA')).data, [])
+
+    def test_region_top_non_hvc(self):
+        self._create_non_hvc_win(58, 'CA', 100000)
+        self._create_non_hvc_win(58, 'CA', 300000)
+        self._create_non_hvc_win(1, 'US', 200000)
+        self._create_non_hvc_win(1, 'FR', 500000)
+
+        data = self._get_api_response(self._region_url('CA')).data
+        self.assertEqual([(row['region'], row['totalValue']) for row in data], [
+            ('Canada', 400000), ('United States of America', 200000),
+        ])
+        self.assertEqual(data[1]['percentComplete'], 50)
+
+    def test_all_teams_match_each_team(self):
+        for i, sector in enumerate([58, 59, 60, 1, 2, 3, 4, 5]):
+            self._create_non_hvc_win(sector, 'CA', 10000 * (i + 1))
+            self._create_non_hvc_win(sector, 'FR', 20000 * (i + 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self._get_api_response(self.teams_url + '?limit=3').data
+        self.assertEqual(len([q for q in queries if 'wins_win' in q['sql']]), 1)
+
+        hierarchy = get_hierarchy()
+        self.assertEqual([team['id'] for team in data], list(hierarchy.sector_teams))
+        for team in data:
+            url = reverse('mi:sector_team_top_non_hvc', kwargs={'team_id': team['id']}) + '?limit=3'
+            self.assertEqual(team['name'], hierarchy.sector_teams[team['id']].name)
+            self.assertEqual(team['top_non_hvcs'], self._get_api_response(url).data)
+        self.assertEqual(len(data[0]['top_non_hvcs']), 3)
+
+    def test_all_regions_match_each_region(self):
+        for i, country in enumerate(['CA', 'US', 'FR', 'DE', 'IN', 'CN']):
+            self._create_non_hvc_win(58, country, 10000 * (i + 1))
+            self._create_non_hvc_win(59, country, 20000 * (i + 1))
+
+        data = self._get_api_response(self.regions_url).data
+        hierarchy = get_hierarchy()
+        self.assertEqual([region['id'] for region in data], list(hierarchy.overseas_regions))
+        for region in data:
+            url = reverse('mi:overseas_region_top_non_hvc', kwargs={'region_id': region['id']})
+            self.assertEqual(region['top_non_hvcs'], self._get_api_response(url).data)
+        self.assertTrue(any(region['top_non_hvcs'] for region in data))
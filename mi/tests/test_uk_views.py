@@ -0,0 +1,47 @@
+import datetime
+
+from django.core.urlresolvers import reverse
+from freezegun import freeze_time
+
+from mi.models import Target
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+class UKViewsTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering the UK-wide MI endpoints """
+
+    def _create_wins(self):
+        for month, hvc, sector, country in [
+                (4, 'E006', 58, 'CA'),
+                (5, 'E017', 10, 'FR'),
+                (6, None, 60, 'US'),
+                (7, None, 10, 'JP')]:
+            win = WinFactory(user=self.user, hvc=hvc, sector=sector, country=country,
+                             date=datetime.datetime(2016, month, 1))
+            if month % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+
+    def test_uk_detail_no_wins(self):
+        data = self._get_api_response(reverse('mi:uk_detail')).data
+        self.assertEqual(data['name'], 'UK')
+        self.assertEqual(data['hvcs']['target'], sum(Target.objects.values_list('target', flat=True)))
+        self.assertEqual(len(data['hvcs']['campaigns']), Target.objects.count())
+        self.assertEqual(data['wins']['export']['totals']['number']['grand_total'], 0)
+
+    def test_uk_detail_totals_all_wins(self):
+        self._create_wins()
+        wins = self._get_api_response(reverse('mi:uk_detail')).data['wins']
+        self.assertEqual(wins['export']['hvc']['number'], {'confirmed': 1, 'unconfirmed': 1, 'total': 2})
+        self.assertEqual(wins['export']['non_hvc']['number'], {'confirmed': 1, 'unconfirmed': 1, 'total': 2})
+        self.assertEqual(wins['export']['totals']['value']['grand_total'], 400000)
+
+    def test_uk_months(self):
+        self._create_wins()
+        months = self._get_api_response(reverse('mi:uk_months')).data['months']
+        self.assertEqual([m['date'] for m in months], ['2016-{:02d}'.format(m) for m in range(4, 12)])
+        self.assertEqual(
+            [m['totals']['export']['totals']['number']['grand_total'] for m in months],
+            [1, 2, 3, 4, 4, 4, 4, 4],
+        )
@@ -0,0 +1,80 @@
+import datetime
+import json
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from freezegun import freeze_time
+
+from alice.client import AliceClient
+from mi.models import WinSummary
+from mi.tests.base_test_case import MiApiViewsBaseTestCase
+from mi.views.base_view import _WinMemo, BaseWinMIView
+from wins.factories import CustomerResponseFactory, WinFactory
+
+
+@freeze_time(MiApiViewsBaseTestCase.frozen_date)
+@override_settings(MI_SECRET=AliceClient.SECRET)
+class WinMemoTestCase(MiApiViewsBaseTestCase):
+    """ Tests covering wins worked out once per request """
+
+    def setUp(self):
+        super().setUp()
+        self.alice_client.login(username=self.user.email, password="asdf")
+        for month, hvc, sector in [(4, 'E006', 58), (5, 'E006', 59), (6, None, 58), (7, None, 60)]:
+            win = WinFactory(user=self.user, hvc=hvc, sector=sector, date=datetime.datetime(2016, month, 1))
+            if month % 2:
+                CustomerResponseFactory(win=win, agree_with_win=True)
+
+    def test_equal_querysets_share_result(self):
+        memo = _WinMemo()
+        evaluated = []
+
+        def evaluate():
+            evaluated.append(True)
+            return len(evaluated)
+
+        first = WinSummary.objects.filter(hvc='E006', financial_year=2016)
+        second = WinSummary.objects.filter(hvc='E006', financial_year=2016)
+        other = WinSummary.objects.filter(hvc='E017', financial_year=2016)
+        self.assertEqual(memo.get('rows', first, evaluate), 1)
+        self.assertEqual(memo.get('rows', second, evaluate), 1)
+        self.assertEqual(memo.get('rows', other, evaluate), 2)
+        self.assertEqual(memo.get('number', first, evaluate), 3)
+        self.assertEqual((memo.hits, memo.misses), (1, 3))
+
+    def test_breakdown_sums_of_a_cell_worked_out_once(self):
+        view = BaseWinMIView()
+        cell = view._cube.sector_teams[1].hvc()
+        self.assertIs(view._breakdown_sums(cell), view._breakdown_sums(cell))
+        self.assertEqual((view._win_memo.hits, view._win_memo.misses), (1, 1))
+        self.assertEqual(view._breakdown_sums(cell), cell.breakdown_sums())
+
+    @override_settings(DEBUG=True)
+    def test_debug_headers(self):
+        response = self.alice_client.get(reverse('mi:sector_teams_overview'))
+        self.assertEqual(response.status_code, 200)
+        # each team's HVC wins are summed for its values, target and win percentages and colours
+        self.assertGreater(int(response['X-MI-Memo-Hits']), 0)
+        self.assertGreater(int(response['X-MI-Memo-Misses']), 0)
+
+    def test_no_headers_unless_debug(self):
+        response = self.alice_client.get(reverse('mi:sector_teams_overview'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-MI-Memo-Hits'))
+
+    @override_settings(DEBUG=True)
+    def test_batch_evaluates_equal_filters_once(self):
+        path = reverse('mi:sector_team_top_non_hvc', kwargs={'team_id': 1})
+        paths = [path, path + '?limit=5']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.alice_client.post(
+                reverse('mi:batch'), json.dumps({'paths': paths}), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+        first, second = response.data
+        self.assertEqual(first['data'], second['data'])
+        self.assertEqual(len(first['data']), 2)
+        self.assertEqual(len([q for q in queries if 'wins_win' in q['sql']]), 1)
+        self.assertEqual(response['X-MI-Memo-Hits'], '1')
@@ -0,0 +1,154 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from mi.models import WinSummary
+from users.factories import UserFactory
+from wins.factories import CustomerResponseFactory, WinFactory
+from wins.models import Win
+
+
+class WinSummaryTestCase(TestCase):
+    """ Tests covering maintenance of the `WinSummary` MI table """
+
+    def setUp(self):
+        self.user = UserFactory.create()
+
+    def _create_win(self, **kwargs):
+        defaults = {
+            'user': self.user,
+            'hvc': 'E006',
+            'sector': 58,
+            'country': 'CA',
+            'date': datetime.datetime(2016, 5, 25),
+            'total_expected_export_value': 100000,
+            'total_expected_non_export_value': 2300,
+        }
+        defaults.update(kwargs)
+        return WinFactory(**defaults)
+
+    def _summaries(self):
+        return sorted(
+            WinSummary.objects.values_list(
+                'financial_year', 'month', 'hvc', 'sector', 'country', 'confirmed',
+                'number', 'export_value', 'non_export_value',
+            )
+        )
+
+    def test_win_creates_summary(self):
+        self._create_win()
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', False, 1, 100000, 2300),
+        ])
+
+    def test_wins_in_same_month_share_summary(self):
+        self._create_win(date=datetime.datetime(2016, 5, 2))
+        self._create_win(date=datetime.datetime(2016, 5, 30), total_expected_export_value=50000)
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', False, 2, 150000, 4600),
+        ])
+
+    def test_win_in_previous_financial_year(self):
+        self._create_win(date=datetime.datetime(2016, 3, 31))
+        self.assertEqual(self._summaries()[0][:2], (2015, datetime.date(2016, 3, 1)))
+
+    def test_non_hvc_wins_share_summary(self):
+        self._create_win(hvc=None)
+        self._create_win(hvc='')
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), '', 58, 'CA', False, 2, 200000, 4600),
+        ])
+
+    def test_edited_win_moves_summary(self):
+        win = self._create_win()
+        win.hvc = 'E019'
+        win.total_expected_export_value = 300
+        win.save()
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E019', 58, 'CA', False, 1, 300, 2300),
+        ])
+
+    def test_confirmation_moves_summary(self):
+        win = self._create_win()
+        self._create_win()
+        CustomerResponseFactory(win=win, agree_with_win=True)
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', False, 1, 100000, 2300),
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', True, 1, 100000, 2300),
+        ])
+
+    def test_disagreeing_confirmation_is_unconfirmed(self):
+        win = self._create_win()
+        CustomerResponseFactory(win=win, agree_with_win=False)
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', False, 1, 100000, 2300),
+        ])
+
+    def test_soft_delete_removes_summary(self):
+        win = self._create_win()
+        CustomerResponseFactory(win=win, agree_with_win=True)
+        win.soft_delete()
+        self.assertEqual(self._summaries(), [])
+
+        win.un_soft_delete()
+        self.assertEqual(self._summaries(), [
+            (2016, datetime.date(2016, 5, 1), 'E006', 58, 'CA', True, 1, 100000, 2300),
+        ])
+
+    def test_delete_removes_summary(self):
+        win = self._create_win()
+        win.delete(for_real=True)
+        self.assertEqual(self._summaries(), [])
+
+    def test_confirmation_stored_on_win(self):
+        win = self._create_win()
+        self.assertFalse(Win.objects.get(id=win.id).is_confirmed)
+        response = CustomerResponseFactory(win=win, agree_with_win=True)
+        self.assertTrue(Win.objects.get(id=win.id).is_confirmed)
+        response.agree_with_win = False
+        response.save()
+        self.assertFalse(Win.objects.get(id=win.id).is_confirmed)
+
+    def test_soft_delete_keeps_confirmation(self):
+        win = self._create_win()
+        CustomerResponseFactory(win=win, agree_with_win=True)
+        win = Win.objects.get(id=win.id)
+        win.soft_delete()
+        win.un_soft_delete()
+        self.assertTrue(Win.objects.get(id=win.id).is_confirmed)
+        self.assertEqual(self._summaries()[0][5:], (True, 1, 100000, 2300))
+
+    def test_backfill_confirmed_command(self):
+        confirmed_win, unconfirmed_win = self._create_win(), self._create_win(hvc='E019')
+        CustomerResponseFactory(win=confirmed_win, agree_with_win=True)
+        # flags gone out of step, e.g. changed outside of Django
+        Win.objects.filter(id=confirmed_win.id).update(is_confirmed=False)
+        Win.objects.filter(id=unconfirmed_win.id).update(is_confirmed=True)
+        WinSummary.objects.rebuild()
+
+        out = io.StringIO()
+        call_command('backfill_win_confirmed', stdout=out)
+
+        self.assertIn('Marked 1 wins confirmed and 1 wins unconfirmed', out.getvalue())
+        self.assertTrue(Win.objects.get(id=confirmed_win.id).is_confirmed)
+        self.assertFalse(Win.objects.get(id=unconfirmed_win.id).is_confirmed)
+        self.assertEqual(
+            [summary[2:6] for summary in self._summaries()],
+            [('E006', 58, 'CA', True), ('E019', 58, 'CA', False)],
+        )
+
+    def test_rebuild_command(self):
+        for hvc in ['E006', 'E019', None]:
+            win = self._create_win(hvc=hvc)
+            CustomerResponseFactory(win=win, agree_with_win=True)
+            self._create_win(hvc=hvc, date=datetime.datetime(2016, 9, 1))
+        self._create_win(is_active=False)
+        expected = self._summaries()
+
+        WinSummary.objects.all().delete()
+        call_command('rebuild_win_summaries', stdout=io.StringIO())
+
+        self.assertEqual(self._summaries(), expected)
+        self.assertEqual(len(expected), 6)
@@ -1,5 +1,6 @@
 from django.conf.urls import url
 
+from mi.views.batch_views import BatchView
 from mi.views.country_views import (
     CountryListView,
     CountryDetailView,
@@ -9,11 +10,13 @@ from mi.views.parent_views import (
     ParentSectorListView,
 )
 from mi.views.region_views import (
+    AllOverseasRegionsTopNonHvcWinsView,
     OverseasRegionsListView,
     OverseasRegionOverviewView,
     OverseasRegionDetailView,
     OverseasRegionMonthsView,
     OverseasRegionCampaignsView,
+    OverseasRegionStatusHistoryView,
     OverseasRegionsTopNonHvcWinsView,
 )
 from mi.views.hvcgroup_views import (
@@ -23,18 +26,26 @@ from mi.views.hvcgroup_views import (
     HVCGroupCampaignsView,
 )
 from mi.views.sector_views import (
+    AllTopNonHvcSectorCountryWinsView,
     AverageTimeToConfirmView,
     SectorTeamCampaignsView,
     SectorTeamDetailView,
     SectorTeamsListView,
     SectorTeamMonthsView,
+    SectorTeamStatusHistoryView,
     SectorTeamsOverviewView,
     TopNonHvcSectorCountryWinsView,
 )
+from mi.views.uk_views import (
+    UKDetailView,
+    UKMonthsView,
+)
 
 urlpatterns = [
     url(r"^sector_teams/$", SectorTeamsListView.as_view(), name="sector_teams"),
     url(r"^sector_teams/overview/$", SectorTeamsOverviewView.as_view(), name="sector_teams_overview"),
+    url(r"^sector_teams/top_non_hvcs/$", AllTopNonHvcSectorCountryWinsView.as_view(),
+        name="sector_teams_top_non_hvc"),
     url(r"^sector_teams/(?P<team_id>\d+)/$", SectorTeamDetailView.as_view(), name="sector_team_detail"),
     url(r"^sector_teams/(?P<team_id>\d+)/campaigns/$", SectorTeamCampaignsView.as_view(),
         name="sector_team_campaigns"),
@@ -42,15 +53,22 @@ urlpatterns = [
         name="sector_team_months"),
     url(r"^sector_teams/(?P<team_id>\d+)/top_non_hvcs/$", TopNonHvcSectorCountryWinsView.as_view(),
         name="sector_team_top_non_hvc"),
+    url(r"^sector_teams/(?P<team_id>\d+)/status_history/$", SectorTeamStatusHistoryView.as_view(),
+        name="sector_team_status_history"),
 
     url(r"^parent_sectors/$", ParentSectorListView.as_view(), name="parent_sectors"),
 
     url(r"^os_regions/$", OverseasRegionsListView.as_view(), name="overseas_regions"),
     url(r"^os_regions/overview/$", OverseasRegionOverviewView.as_view(), name="overseas_region_overview"),
+    url(r"^os_regions/top_non_hvcs/$", AllOverseasRegionsTopNonHvcWinsView.as_view(),
+        name="overseas_regions_top_non_hvc"),
     url(r"^os_regions/(?P<region_id>\d+)/$", OverseasRegionDetailView.as_view(), name="overseas_region_detail"),
     url(r"^os_regions/(?P<region_id>\d+)/months/$", OverseasRegionMonthsView.as_view()),
     url(r"^os_regions/(?P<region_id>\d+)/campaigns/$", OverseasRegionCampaignsView.as_view()),
-    url(r"^os_regions/(?P<region_id>\d+)/top_non_hvcs/$", OverseasRegionsTopNonHvcWinsView.as_view()),
+    url(r"^os_regions/(?P<region_id>\d+)/top_non_hvcs/$", OverseasRegionsTopNonHvcWinsView.as_view(),
+        name="overseas_region_top_non_hvc"),
+    url(r"^os_regions/(?P<region_id>\d+)/status_history/$", OverseasRegionStatusHistoryView.as_view(),
+        name="overseas_region_status_history"),
 
     url(r"^hvc_groups/$", HVCGroupsListView.as_view(), name="hvc_groups"),
     url(r"^hvc_groups/(?P<group_id>\d+)/$", HVCGroupDetailView.as_view(), name="hvc_group_detail"),
@@ -59,7 +77,12 @@ urlpatterns = [
 
     url(r"^countries/$", CountryListView.as_view(), name="countries"),
     url(r"^countries/(?P<country_id>\d+)/$", CountryDetailView.as_view()),
-    url(r"^countries/wins/$", CountryWinsView.as_view()),
+    url(r"^countries/wins/$", CountryWinsView.as_view(), name="country_wins"),
+
+    url(r"^uk/$", UKDetailView.as_view(), name="uk_detail"),
+    url(r"^uk/months/$", UKMonthsView.as_view(), name="uk_months"),
+
+    url(r"^avg_time_to_confirm/$", AverageTimeToConfirmView.as_view(), name="average_time_to_confirm"),
 
-    url(r"^avg_time_to_confirm/$", AverageTimeToConfirmView.as_view()),
+    url(r"^batch/$", BatchView.as_view(), name="batch"),
 ]
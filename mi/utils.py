@@ -21,6 +21,11 @@ def get_financial_end_date(date=None):
         return datetime.datetime(date.year, 3, 31)
 
 
+def get_month_start(date):
+    """ Returns the date of the first day of the given date's month """
+    return datetime.date(date.year, date.month, 1)
+
+
 def month_iterator(start_date, end_date=None):
     """ Helper generator function to iterate through (year, month) between given dates,
     both dates' months inclusive """
@@ -38,6 +43,46 @@ def month_iterator(start_date, end_date=None):
         yield y, m + 1
 
 
+def days_into_financial_year(financial_year, date=None):
+    """
+    Number of days into the financial year starting in the given calendar year, as of the date (today by default)
+
+    At least 1, so that the first day has a prorated target, and at most 365 for closed years
+    """
+    if not date:
+        date = datetime.date.today()
+    days = (date - datetime.date(financial_year, 4, 1)).days
+    return min(max(days, 1), 365)
+
+
+def prorated_target(target, days_into_year):
+    """ Share of the yearly target due by the given number of days into the financial year """
+    return (target / 365) * days_into_year
+
+
+def status_colour(target, current_value, days_into_year):
+    """
+    HVC performance status colour, of a value against the target prorated to the days into the financial year
+
+    `run_rate` is percentage of value achieved out of `target as of today` i.e. prorated target
+
+    zero: for 0 target campaigns
+    green: when run_rate > 45%
+    red: when run_rate < 25%
+    amber: rest of them
+    """
+    if target == 0:
+        return 'zero'
+
+    run_rate = (current_value * 100) / prorated_target(target, days_into_year)
+    if run_rate > 45:
+        return 'green'
+    elif run_rate < 25:
+        return 'red'
+    else:
+        return 'amber'
+
+
 def two_digit_float(number):
     """ Format given number into two decimal float """
     if not number:
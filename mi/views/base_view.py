@@ -1,27 +1,341 @@
-from collections import Counter
+from collections import Counter, defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import datetime
-from itertools import groupby
-from operator import itemgetter
+import hashlib
+from itertools import accumulate
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Avg, Count, Q, QuerySet, Sum
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags, quote_etag
+from django_countries import countries
 
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from alice.authenticators import IsMIServer, IsMIUser
+from mi.cache import get_win_data_version, mi_cache
+from mi.columns import get_win_columns
+from mi.cube import get_rollup_cube
+from mi.day_index import get_day_index
+from mi.hierarchy import get_hierarchy
+from mi.models import CampaignStatus, FrozenResponse
 from mi.utils import (
-    average,
+    days_into_financial_year,
     get_financial_start_date,
     get_financial_end_date,
+    month_iterator,
     percentage,
+    sort_campaigns_by,
+    status_colour,
     two_digit_float,
 )
 from wins.models import Win
 
 
+logger = logging.getLogger(__name__)
+
+_refresh_executor = None
+_refresh_executor_lock = threading.Lock()
+
+
+def get_refresh_executor():
+    """ Executor stale MI responses are refreshed in the background by, of `MI_RESPONSE_REFRESH_THREADS` threads """
+
+    global _refresh_executor
+
+    if _refresh_executor is None:
+        with _refresh_executor_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(max_workers=settings.MI_RESPONSE_REFRESH_THREADS)
+    return _refresh_executor
+
+
+class _CachedResponse(Exception):
+    """ Raised once permissions are checked, to short-circuit a request with a response that needs no working out """
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class _InvalidQuery(Exception):
+    """ Raised while working out a response, when the request's query parameters don't make sense """
+
+
+class _WinMemo:
+    """
+    Results of evaluating win querysets and summing cells, worked out once for a request
+
+    Querysets are keyed on their SQL and parameters, so equal filters built separately share a result. Cells
+    and selections are keyed on the object itself, which is held on to so that its id isn't reused.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, kind, wins):
+        if isinstance(wins, QuerySet):
+            try:
+                sql, params = wins.query.sql_with_params()
+            except EmptyResultSet:
+                # no SQL to key on, e.g. filtered on an empty list
+                return kind, id(wins)
+            return kind, wins.db, sql, params
+        return kind, id(wins)
+
+    def get(self, kind, wins, evaluate):
+        """ Result of `evaluate`, of the kind of result asked for, for the given wins """
+
+        key = self._key(kind, wins)
+        if key in self.results:
+            self.hits += 1
+            return self.results[key][1]
+        self.misses += 1
+        result = evaluate()
+        self.results[key] = (wins, result)
+        return result
+
+
 class BaseMIView(APIView):
-    """ Base view for other MI endpoints to inherit from """
+    """
+    Base view for other MI endpoints to inherit from
+
+    Successful GET responses are cached in the MI cache, keyed on the endpoint, its URL kwargs and query,
+    the financial year and day, and the version stamps of win data and of the hierarchy. A new version of
+    any of them is a new key, so nothing has to be deleted when data changes. The key also serves as the
+    response's ETag, and a request with a matching `If-None-Match` gets a 304 without any lookups.
+
+    Identical requests arriving while a response is being worked out are coalesced: the first takes a lock
+    in the MI cache, shared by all worker processes, and the others wait for its response to be cached.
+
+    With `MI_RESPONSE_MAX_STALENESS` set, a request whose response isn't cached is instead answered with the
+    endpoint's last worked out response, if no older than that many seconds, while it is worked out again
+    in the background. Such responses carry an `Age` header of the seconds since they were worked out.
+
+    A `year` query parameter asks for a previous financial year, by its starting calendar year. Only the
+    current year is worked out live, closed years are served as frozen by `manage.py freeze_mi_year`.
+    """
 
     permission_classes = (IsMIServer, IsMIUser)
+    _response_cache_key = None
+    _response_etag = None
+    _response_from_cache = False
+    _response_lock_key = None
+    RESPONSE_LOCK_POLL_INTERVAL = 0.1
+
+    def _get_response_cache_keys(self, request, kwargs):
+        """
+        Cache keys for the response as it would be worked out now, and for the last worked out response
+
+        The latter leaves out what changes as data changes, or by the day.
+        """
+
+        endpoint_parts = [
+            type(self).__name__,
+            sorted(kwargs.items()),
+            sorted(request.query_params.lists()),
+            get_financial_start_date().year,
+        ]
+        version_parts = [
+            datetime.date.today().isoformat(),
+            get_win_data_version(),
+            self._hierarchy.version,
+        ]
+        return (
+            'mi-response:' + hashlib.sha1(repr(endpoint_parts + version_parts).encode('utf-8')).hexdigest(),
+            'mi-latest-response:' + hashlib.sha1(repr(endpoint_parts).encode('utf-8')).hexdigest(),
+        )
+
+    @cached_property
+    def _financial_year(self):
+        """ Starting calendar year of the financial year asked for by the `year` query parameter, or the current one """
+
+        current_year = get_financial_start_date().year
+        request = getattr(self, 'request', None)
+        value = request.query_params.get('year') if request is not None else None
+        if value is None:
+            return current_year
+        try:
+            year = int(value)
+        except ValueError:
+            raise _InvalidQuery('year must be the starting year of a financial year e.g. 2016 for 2016/17')
+        if year > current_year:
+            raise _InvalidQuery('year must not be after the current financial year')
+        return year
+
+    def _frozen_response(self, request, kwargs):
+        """ Response of a closed financial year, as frozen by `manage.py freeze_mi_year` """
+
+        if set(request.query_params) != {'year'}:
+            raise _InvalidQuery('a closed financial year can only be asked for as a whole')
+        try:
+            frozen = FrozenResponse.objects.get(
+                financial_year=self._financial_year,
+                endpoint=type(self).__name__,
+                entity=FrozenResponse.entity_key(kwargs),
+            )
+        except FrozenResponse.DoesNotExist:
+            return Response(
+                {'error': 'financial year {} has not been frozen'.format(self._financial_year)},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return self._success(frozen.response_data)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if self._financial_year != get_financial_start_date().year:
+            raise _CachedResponse(self._frozen_response(request, kwargs))
+
+        if request.method != 'GET' or not settings.MI_RESPONSE_CACHE_TIMEOUT:
+            return
+
+        self._response_cache_key, self._latest_response_key = self._get_response_cache_keys(request, kwargs)
+        self._response_etag = self._response_cache_key
+        if self._response_cache_key in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            raise _CachedResponse(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+        data = mi_cache().get(self._response_cache_key)
+        if data is None and settings.MI_RESPONSE_MAX_STALENESS:
+            self._serve_stale_response(request, args, kwargs)
+        if data is None:
+            data = self._wait_for_response_data()
+        if data is not None:
+            raise _CachedResponse(Response(data, status=status.HTTP_200_OK))
+
+    def _serve_stale_response(self, request, args, kwargs):
+        """ Answer with the last worked out response if recent enough, refreshing it in the background """
+
+        cache = mi_cache()
+        latest = cache.get(self._latest_response_key)
+        if latest is None:
+            return
+        age = int(time.time() - latest['worked_out_at'])
+        if age > settings.MI_RESPONSE_MAX_STALENESS:
+            return
+
+        lock_key = self._response_cache_key + ':lock'
+        if cache.add(lock_key, True, settings.MI_RESPONSE_LOCK_TIMEOUT):
+            self._refresh_in_background(lock_key, request, args, kwargs)
+
+        self._response_etag = latest['key']
+        if latest['key'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(latest['data'], status=status.HTTP_200_OK)
+        response['Age'] = age
+        raise _CachedResponse(response)
+
+    def _refresh_in_background(self, lock_key, request, args, kwargs):
+        """
+        Work out the response again on a thread of `get_refresh_executor`
+
+        It is worked out by a view of its own, with a copy of the request, so nothing worked out for the request
+        being answered is shared across threads. Refreshes beyond the executor's threads wait their turn.
+        """
+        view = type(self)()
+        view.request = view.initialize_request(copy.copy(request._request), *args, **kwargs)
+        view.args = args
+        view.kwargs = kwargs
+        view.headers = view.default_response_headers
+        view._response_cache_key = self._response_cache_key
+        view._latest_response_key = self._latest_response_key
+
+        def refresh():
+            try:
+                view._refresh_response(lock_key)
+            finally:
+                connections.close_all()
+
+        return get_refresh_executor().submit(refresh)
+
+    def _refresh_response(self, lock_key):
+        """ Work out and cache the response, holding the lock taken for it """
+
+        try:
+            response = self.get(self.request, *self.args, **self.kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                self._cache_response_data(response.data)
+        except Exception:
+            logger.exception('Refreshing MI response for %s failed', self.request.path)
+        finally:
+            mi_cache().delete(lock_key)
+
+    def _cache_response_data(self, data):
+        cache = mi_cache()
+        cache.set(self._response_cache_key, data, settings.MI_RESPONSE_CACHE_TIMEOUT)
+        if settings.MI_RESPONSE_MAX_STALENESS:
+            latest = {'key': self._response_cache_key, 'data': data, 'worked_out_at': time.time()}
+            cache.set(self._latest_response_key, latest, settings.MI_RESPONSE_MAX_STALENESS)
+
+    def _wait_for_response_data(self):
+        """
+        Take the lock to work out the response, or wait for the request holding it to cache its response
+
+        Return the cached response data, or None when this request is to work it out itself: when it has the
+        lock, or when waiting timed out or the request holding the lock finished without a response to share.
+        """
+
+        cache = mi_cache()
+        lock_key = self._response_cache_key + ':lock'
+        if cache.add(lock_key, True, settings.MI_RESPONSE_LOCK_TIMEOUT):
+            self._response_lock_key = lock_key
+            return None
+
+        deadline = time.monotonic() + settings.MI_RESPONSE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(self.RESPONSE_LOCK_POLL_INTERVAL)
+            data = cache.get(self._response_cache_key)
+            if data is not None:
+                return data
+            if cache.get(lock_key) is None:
+                break
+        return None
+
+    def _release_response_lock(self):
+        if self._response_lock_key:
+            mi_cache().delete(self._response_lock_key)
+            self._response_lock_key = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # once the response is cached, or if it couldn't be worked out
+            self._release_response_lock()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _CachedResponse):
+            self._response_from_cache = True
+            return exc.response
+        if isinstance(exc, _InvalidQuery):
+            return self._invalid(str(exc))
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if self._response_cache_key and response.status_code in (200, 304):
+            if not self._response_from_cache:
+                self._cache_response_data(response.data)
+            response['ETag'] = quote_etag(self._response_etag)
+        return response
+
+    @cached_property
+    def _hierarchy(self):
+        """ Snapshot of Teams, Regions, Targets etc., fixed for the duration of the request """
+
+        return get_hierarchy()
 
     def _invalid(self, msg):
         return Response({'error': msg}, status=status.HTTP_400_BAD_REQUEST)
@@ -39,26 +353,196 @@ class BaseMIView(APIView):
 
 
 class BaseWinMIView(BaseMIView):
-    """ Base view with Win-related MI helpers """
+    """
+    Base view with Win-related MI helpers
+
+    Figures are of the current financial year's wins, or of those from one date to another, inclusive, given
+    as `from` and `to` query parameters in YYYY-MM-DD format. Closed financial years are worked out as date
+    ranges too, when they are frozen.
+    """
+
+    # number of rows of top-n endpoints, unless asked for with `limit`
+    TOP_LIMIT = 5
+    MAX_TOP_LIMIT = 100
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        # how often helpers were handed wins already evaluated for the request
+        if settings.DEBUG and '_win_memo' in self.__dict__:
+            response['X-MI-Memo-Hits'] = self._win_memo.hits
+            response['X-MI-Memo-Misses'] = self._win_memo.misses
+        return response
+
+    @cached_property
+    def _win_memo(self):
+        """
+        Memo of win querysets evaluated and cells summed for the request, see `_evaluate`
+
+        Helpers are often handed the same wins several times over, e.g. a team's HVC wins for its export
+        values, target percentage and win percentages. Each distinct filter is worked out once.
+        """
+        return _WinMemo()
+
+    def _evaluate(self, wins):
+        """ List of the rows of a queryset, evaluated once for the request """
 
-    # cumulative values for `_breakdowns_cumulative` method
-    hvc_confirm_cu_number = hvc_confirm_cu_value = hvc_non_cu_number = hvc_non_cu_value = 0
-    non_hvc_confirm_cu_number = non_hvc_confirm_cu_value = non_hvc_non_cu_number = non_hvc_non_cu_value = 0
-    non_export_confirm_cu_number = non_export_confirm_cu_value = non_export_non_cu_number = non_export_non_cu_value = 0
+        return self._win_memo.get('rows', wins, lambda: list(wins))
+
+    @cached_property
+    def _date_range(self):
+        """
+        (from, to) dates of the request's query parameters, or None for the current financial year
+
+        Either one left out defaults to the start or end of the financial year, and a closed financial
+        year is a range of its own.
+        """
+        request = getattr(self, 'request', None)
+        if request is None:
+            return None
+        query_params = request.query_params
+        year_start = datetime.datetime(self._financial_year, 4, 1)
+        if 'from' not in query_params and 'to' not in query_params:
+            if year_start == get_financial_start_date():
+                return None
+            return year_start.date(), get_financial_end_date(year_start).date()
+
+        dates = []
+        for param, default in (('from', year_start), ('to', get_financial_end_date(year_start))):
+            value = query_params.get(param)
+            if value is None:
+                dates.append(default.date())
+                continue
+            try:
+                dates.append(datetime.datetime.strptime(value, '%Y-%m-%d').date())
+            except ValueError:
+                raise _InvalidQuery('{} must be a date in YYYY-MM-DD format'.format(param))
+
+        date_from, date_to = dates
+        if date_from > date_to:
+            raise _InvalidQuery('from must not be after to')
+        return date_from, date_to
 
     def _wins(self):
-        """ Helper for returning Wins used by all Endpoints """
+        """ Helper for returning Wins of the financial year or date range, for Endpoints needing individual Wins """
 
+        date_from, date_to = self._date_range or (get_financial_start_date(), get_financial_end_date())
         return Win.objects.filter(
-            date__range=(
-                get_financial_start_date(),
-                get_financial_end_date(),
-            ),
-        ).select_related('confirmation')
+            date__range=(date_from, date_to),
+        )
+
+    @cached_property
+    def _top_limit(self):
+        """ Number of top rows asked for by the `limit` query parameter, `TOP_LIMIT` by default """
+
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return self.TOP_LIMIT
+        if not limit.isdigit() or not 1 <= int(limit) <= self.MAX_TOP_LIMIT:
+            raise _InvalidQuery('limit must be a number from 1 to {}'.format(self.MAX_TOP_LIMIT))
+        return int(limit)
+
+    def _non_hvc_totals(self, **filters):
+        """
+        Export value and number of non-HVC Wins by country and CDMS sector, largest export value first
+
+        Worked out in one grouped query, slice it to rank it in the database too.
+        """
+        return self._wins().filter(
+            Q(hvc='') | Q(hvc__isnull=True),
+            **filters
+        ).values(
+            'country',
+            'sector',
+        ).annotate(
+            total_value=Sum('total_expected_export_value'),
+            total_wins=Count('id'),
+        ).order_by('-total_value', 'country', 'sector')
+
+    def _top_non_hvc_by(self, totals, key):
+        """
+        Top `_top_limit` rows of ranked `_non_hvc_totals` for each key of a row, e.g. its Sector Team
+
+        Rows are partitioned in one pass, much like a window function ranking rows within each key
+        """
+        limit = self._top_limit
+        key_to_rows = defaultdict(list)
+        for row in totals:
+            rows = key_to_rows[key(row)]
+            if len(rows) < limit:
+                rows.append(row)
+        return key_to_rows
+
+    @cached_property
+    def _country_names(self):
+        return dict(countries)
+
+    def _top_non_hvc_results(self, rows):
+        """ Results of ranked `_non_hvc_totals` rows, as given by `_top_non_hvc_result` of subclasses """
+
+        if not rows:
+            return []
+        top_value = int(rows[0]['total_value']) or 1
+        return [self._top_non_hvc_result(row, top_value) for row in rows]
+
+    @cached_property
+    def _win_columns(self):
+        """ Columnar snapshot of the financial year's `WinSummary` rows, see `mi.columns` """
+
+        return get_win_columns()
+
+    @cached_property
+    def _cube(self):
+        """
+        Rollup cube of the financial year's wins over the hierarchy, see `mi.cube`
+
+        For a date range, the cube is worked out from the day index of `mi.day_index` instead.
+        """
+        if self._date_range:
+            return self._day_index.cube(*self._date_range, hierarchy=self._hierarchy)
+        return get_rollup_cube(self._win_columns, self._hierarchy)
+
+    @cached_property
+    def _day_index(self):
+        """ Prefix-sum index of all wins by day, see `mi.day_index` """
+
+        return get_day_index()
+
+    def _group_wins_by_campaign(self, targets):
+        """
+        Targets paired with cells of their campaign's wins, those with wins first by campaign id
+
+        Targets without wins are paired with an empty cell, in the order given. Cells are looked up by campaign
+        in the cube, so grouping is one pass over the targets however many campaigns there are.
+        """
+        campaign_to_wins = {}
+        without_wins = []
+        for target in targets:
+            campaign_wins = self._cube.campaigns.get(target.campaign_id)
+            if campaign_wins is None:
+                without_wins.append((target, self._cube.empty()))
+            else:
+                campaign_to_wins[target.campaign_id] = campaign_wins
+
+        campaign_to_target = self._hierarchy.campaign_to_target
+        with_wins = [(campaign_to_target[k], campaign_to_wins[k]) for k in sorted(campaign_to_wins)]
+        return with_wins + without_wins
+
+    def _campaign_breakdowns_of(self, targets, campaign_ids=True):
+        """ Progress of the targets' campaigns toward their targets, furthest along first """
 
-    def _colours(self, hvc_wins, targets):
+        campaigns = []
+        for target, campaign_wins in self._group_wins_by_campaign(targets):
+            campaign = {'campaign': target.name.split(':')[0]}
+            if campaign_ids:
+                campaign['campaign_id'] = target.campaign_id
+            campaign['totals'] = self._progress_breakdown(campaign_wins, target.target)
+            campaigns.append(campaign)
+        return sorted(campaigns, key=sort_campaigns_by, reverse=True)
+
+    def _colours(self, targets):
         """
-        Determine colour of all HVCs
+        Determine colour of all HVCs, from the cells of their campaigns
 
         Return a dict of status colour counts e.g. {'red': 3, 'amber': 2, 'green': 4, 'zero': 2}
 
@@ -70,38 +554,55 @@ class BaseWinMIView(BaseMIView):
             'zero': 0
         }
 
-        hvc_colours = []
-        for t in targets:
-            target_wins = [win for win in hvc_wins if win.hvc == t.campaign_id]
-            current_val = sum(win.total_expected_export_value for win in target_wins if win.confirmed)
-            hvc_colours.append(self._get_status_colour(t.target, current_val))
+        hvc_colours = [
+            self._get_status_colour(t.target, self._cube.campaign(t.campaign_id).confirmed_export_value())
+            for t in targets
+            ]
 
         colours.update(dict(Counter(hvc_colours)))
         return colours
 
-    def _average_confirm_time(self, notifications_qs):
-        """ given a set of notifications, this helper would figure out average confirmation time for subclasses """
-        notifications = notifications_qs.values(
-            'win__id',
-            'created',
-            'win__confirmation__created',
-        ).order_by(
-            'win__id',
-            'created'
-        )
-        confirm_times = []
-        for win_id, dates_grouper in groupby(notifications, itemgetter('win__id')):
-            earliest_dates = next(iter(dates_grouper))
-            confirm_times.append((earliest_dates['win__confirmation__created'] - earliest_dates['created']).days)
+    def _status_history(self, campaign_ids):
+        """
+        Counts of the campaigns' status colours on each day recorded, as `_colours`, oldest first
 
-        avg_confirm_time = average(confirm_times)
+        Read from the `CampaignStatus` snapshots of the financial year, or of the days of the date range.
+        """
+        snapshots = CampaignStatus.objects.filter(campaign_id__in=campaign_ids)
+        if self._date_range:
+            snapshots = snapshots.filter(date__range=self._date_range)
+        else:
+            snapshots = snapshots.filter(financial_year=self._financial_year)
+
+        date_to_colours = OrderedDict()
+        counts = snapshots.values_list('date', 'colour').annotate(Count('id')).order_by('date', 'colour')
+        for date, colour, count in counts:
+            colours = date_to_colours.setdefault(date, dict.fromkeys(('red', 'amber', 'green', 'zero'), 0))
+            colours[colour] = count
+        return [
+            {'date': date.isoformat(), 'hvc_performance': colours}
+            for date, colours in date_to_colours.items()
+        ]
+
+    def _average_confirm_time(self, wins):
+        """
+        Average days from the earliest customer notification to the customer response, of the given Wins
 
-        return avg_confirm_time or 0
+        Given Wins are those of `_wins`, of the financial year or date range, like every other figure. Worked out
+        in the database from each Win's `days_to_confirm`, Wins without a customer response or customer
+        notification are left out.
+        """
+        wins = wins.filter(days_to_confirm__isnull=False)
+        average_days = self._win_memo.get(
+            'average_days_to_confirm', wins, lambda: wins.aggregate(average_days=Avg('days_to_confirm')),
+        )['average_days']
+        return two_digit_float(average_days) or 0
 
     def _overview_target_percentage(self, hvc_wins, total_target):
         """ percentages of confirmed/unconfirmed hvc wins against total target """
-        hvc_export_confirmed = sum(w.total_expected_export_value for w in hvc_wins if w.confirmed)
-        hvc_export_unconfirmed = sum(w.total_expected_export_value for w in hvc_wins if not w.confirmed)
+        hvc_export = self._breakdown_wins(hvc_wins)['value']
+        hvc_export_confirmed = hvc_export['confirmed']
+        hvc_export_unconfirmed = hvc_export['unconfirmed']
 
         confirmed = two_digit_float(percentage(hvc_export_confirmed, total_target)) or 0
         unconfirmed = two_digit_float(percentage(hvc_export_unconfirmed, total_target)) or 0
@@ -114,10 +615,12 @@ class BaseWinMIView(BaseMIView):
     def _overview_win_percentages(self, hvc_wins, non_hvc_wins):
         """ Percentages of total confirmed/unconfirmed value from HVC vs non-HVC, for overview page """
 
-        hvc_confirmed = sum(w.total_expected_export_value for w in hvc_wins if w.confirmed)
-        hvc_unconfirmed = sum(w.total_expected_export_value for w in hvc_wins if not w.confirmed)
-        non_hvc_confirmed = sum(w.total_expected_export_value for w in non_hvc_wins if w.confirmed)
-        non_hvc_unconfirmed = sum(w.total_expected_export_value for w in non_hvc_wins if not w.confirmed)
+        hvc_export = self._breakdown_wins(hvc_wins)['value']
+        non_hvc_export = self._breakdown_wins(non_hvc_wins)['value']
+        hvc_confirmed = hvc_export['confirmed']
+        hvc_unconfirmed = hvc_export['unconfirmed']
+        non_hvc_confirmed = non_hvc_export['confirmed']
+        non_hvc_unconfirmed = non_hvc_export['unconfirmed']
 
         total_confirmed = hvc_confirmed + non_hvc_confirmed
         total_unconfirmed = hvc_unconfirmed + non_hvc_unconfirmed
@@ -142,92 +645,91 @@ class BaseWinMIView(BaseMIView):
         return total_win_percent
 
     def _days_into_year(self):
-        """
-        abstract away identifying number of days we are into the financial year.
+        """ Number of days we are into the financial year, 365 for previous ones """
 
-        Return usual number of days, if we are dealing with current financial year
+        return days_into_financial_year(self._financial_year)
 
-        If in case of previous ones, just return 365
-        """
+    def _get_status_colour(self, target, current_value):
+        """ HVC performance status colour, see `mi.utils.status_colour` """
 
-        days_into_year = (datetime.datetime.today() - get_financial_start_date()).days
+        return status_colour(target, current_value, self._days_into_year())
 
-        if days_into_year > 365:
-            return 365
+    def _breakdown_sums(self, wins):
+        """
+        Sums of `BREAKDOWN_FIELDS` for each of HVC/non-HVC and confirmed/unconfirmed, of a `CubeCell`
 
-        return days_into_year
+        Return a dict keyed by e.g. 'hvc_confirmed_export_value' or 'non_hvc_unconfirmed_number'.
+        Sums are worked out once for the request and shared, so they mustn't be changed.
 
-    def _get_status_colour(self, target, current_value):
         """
-        Algorithm to determine HVC performance status colour
+        return self._win_memo.get('breakdown_sums', wins, wins.breakdown_sums)
 
-        `run_rate` is percentage of value achieved out of `target as of today` i.e. prorated target
-
-        zero: for 0 target campaigns
-        green: when run_rate > 45%
-        red: when run_rate < 25%
-        amber: rest of them
+    def _month_sums(self, wins):
         """
+        `_breakdown_sums` of a `CubeCell` for each month of the financial year until the current month, in order
 
-        if target == 0:
-            return 'zero'
+        With a date range, months are those of the range until the current month. Months without wins get
+        zero sums.
 
-        # calculate prorated target based on number of days
-        prorated_target = (target / 365) * self._days_into_year()
-        run_rate = (current_value * 100) / prorated_target
+        """
+        month_to_sums = self._win_memo.get('month_sums', wins, wins.month_sums)
 
-        if run_rate > 45:
-            return 'green'
-        elif run_rate < 25:
-            return 'red'
+        empty_sums = self._cube.empty().breakdown_sums()
+        if self._date_range:
+            date_from, date_to = self._date_range
+            year_months = month_iterator(date_from, min(date_to, datetime.date.today()))
         else:
-            return 'amber'
+            year_months = month_iterator(get_financial_start_date())
+        months = set(month_to_sums)
+        months.update(datetime.date(year, month, 1) for year, month in year_months)
+        return [(month, month_to_sums.get(month, empty_sums)) for month in sorted(months)]
 
-    def _breakdown_wins(self, wins, non_export=False):
-        """
-        Breakdown Wins by confirmed and non-confirmed
-        Clarification on not including non-export for non-HVC wins:
-        Non-export value is the value of a win entered into the export win system that is not technically an export
-        by definitions of export e.g. when we lobby a government to reduce corporate taxes – that profit back to
-        the UK is a benefit to us but not an export. It has nothing to do with Non-HVC wins which are export wins,
-        which could contain 0 or lots of non-export value as with any export win, but do not fall within a HVC.
-        """
+    def _breakdown_from_sums(self, sums, hvc_groups, non_export=False):
+        """ Breakdown dict from `_breakdown_sums`, over the given `hvc_groups` i.e. 'hvc' and/or 'non_hvc' """
 
-        confirmed = []
-        unconfirmed = []
+        value_field = 'non_export_value' if non_export else 'export_value'
 
-        for win in wins:
-            if non_export:
-                value = win.total_expected_non_export_value
-            else:
-                value = win.total_expected_export_value
+        def total(confirmed, field):
+            return sum(sums['{}_{}_{}'.format(group, confirmed, field)] for group in hvc_groups)
 
-            if win.confirmed:
-                confirmed.append(value)
-            else:
-                unconfirmed.append(value)
+        confirmed_value = total('confirmed', value_field)
+        unconfirmed_value = total('unconfirmed', value_field)
+        confirmed_number = total('confirmed', 'number')
+        unconfirmed_number = total('unconfirmed', 'number')
 
         return {
             'value': {
-                'confirmed': sum(confirmed),
-                'unconfirmed': sum(unconfirmed),
-                'total': sum(confirmed) + sum(unconfirmed),
+                'confirmed': confirmed_value,
+                'unconfirmed': unconfirmed_value,
+                'total': confirmed_value + unconfirmed_value,
             },
             'number': {
-                'confirmed': len(confirmed),
-                'unconfirmed': len(unconfirmed),
-                'total': len(confirmed) + len(unconfirmed),
+                'confirmed': confirmed_number,
+                'unconfirmed': unconfirmed_number,
+                'total': confirmed_number + unconfirmed_number,
             },
 
         }
 
+    def _breakdown_wins(self, wins, non_export=False):
+        """
+        Breakdown Wins by confirmed and non-confirmed
+        Clarification on not including non-export for non-HVC wins:
+        Non-export value is the value of a win entered into the export win system that is not technically an export
+        by definitions of export e.g. when we lobby a government to reduce corporate taxes – that profit back to
+        the UK is a benefit to us but not an export. It has nothing to do with Non-HVC wins which are export wins,
+        which could contain 0 or lots of non-export value as with any export win, but do not fall within a HVC.
+        """
+
+        return self._breakdown_from_sums(self._breakdown_sums(wins), ('hvc', 'non_hvc'), non_export=non_export)
+
     def _breakdowns(self, wins, include_non_hvc=True):
-        hvc_wins = [win for win in wins if win.hvc]
+        sums = self._breakdown_sums(wins)
         result = {
             'export': {
-                'hvc': self._breakdown_wins(hvc_wins),
+                'hvc': self._breakdown_from_sums(sums, ('hvc',)),
             },
-            'non_export': self._breakdown_wins(hvc_wins, non_export=True),
+            'non_export': self._breakdown_from_sums(sums, ('hvc',), non_export=True),
         }
 
         total_confirmed_value = result['export']['hvc']['value']['confirmed']
@@ -236,8 +738,7 @@ class BaseWinMIView(BaseMIView):
         total_unconfirmed_number = result['export']['hvc']['number']['unconfirmed']
 
         if include_non_hvc:
-            non_hvc_wins = [win for win in wins if not win.hvc]
-            result['export']['non_hvc'] = self._breakdown_wins(non_hvc_wins)
+            result['export']['non_hvc'] = self._breakdown_from_sums(sums, ('non_hvc',))
 
             total_confirmed_value += result['export']['non_hvc']['value']['confirmed']
             total_unconfirmed_value += result['export']['non_hvc']['value']['unconfirmed']
@@ -276,112 +777,48 @@ class BaseWinMIView(BaseMIView):
             },
         }
 
-    def _breakdowns_cumulative(self, wins, include_non_hvc=True):
-        """ Breakdown wins by HVC, confirmed and non-export - cumulative"""
-
-        hvc_confirmed = []
-        hvc_unconfirmed = []
-        non_hvc_confirmed = []
-        non_hvc_unconfirmed = []
-        non_export_confirmed = []
-        non_export_unconfirmed = []
-
-        for win in wins:
-            export_value = win.total_expected_export_value
-            if win.hvc:
-                if win.confirmed:
-                    hvc_confirmed.append(export_value)
-                else:
-                    hvc_unconfirmed.append(export_value)
-            else:
-                if win.confirmed:
-                    non_hvc_confirmed.append(export_value)
-                else:
-                    non_hvc_unconfirmed.append(export_value)
-
-            non_export_value = win.total_expected_non_export_value
-            if win.confirmed:
-                non_export_confirmed.append(non_export_value)
-            else:
-                non_export_unconfirmed.append(non_export_value)
-
-        # these store cumulative values of each month (see class definition)
-        self.hvc_confirm_cu_number += len(hvc_confirmed)
-        self.hvc_non_cu_number += len(hvc_unconfirmed)
-        self.hvc_confirm_cu_value += sum(hvc_confirmed)
-        self.hvc_non_cu_value += sum(hvc_unconfirmed)
-        self.non_hvc_confirm_cu_number += len(non_hvc_confirmed)
-        self.non_hvc_non_cu_number += len(non_hvc_unconfirmed)
-        self.non_hvc_confirm_cu_value += sum(non_hvc_confirmed)
-        self.non_hvc_non_cu_value += sum(non_hvc_unconfirmed)
-        self.non_export_confirm_cu_number += len(non_export_confirmed)
-        self.non_export_non_cu_number += len(non_export_unconfirmed)
-        self.non_export_confirm_cu_value += sum(non_export_confirmed)
-        self.non_export_non_cu_value += sum(non_export_unconfirmed)
-
-        total_hvc_value = self.hvc_confirm_cu_value + self.hvc_non_cu_value
-        total_non_hvc_value = self.non_hvc_confirm_cu_value + self.non_hvc_non_cu_value
-        total_confirm_value = self.hvc_confirm_cu_value + self.non_hvc_confirm_cu_value
-        total_non_conf_value = self.hvc_non_cu_value + self.non_hvc_non_cu_value
-
-        total_hvc_number = self.hvc_confirm_cu_number + self.hvc_non_cu_number
-        total_non_hvc_number = self.non_hvc_confirm_cu_number + self.non_hvc_non_cu_number
-        total_confirm_number = self.hvc_confirm_cu_number + self.non_hvc_confirm_cu_number
-        total_non_conf_number = self.hvc_non_cu_number + self.non_hvc_non_cu_number
+    def _month_breakdowns(self, wins, include_non_hvc=True):
+        """ Cumulative breakdowns of wins at each month of the financial year until the current month """
+
+        month_sums = self._month_sums(wins)
+        running_sums = accumulate(Counter(sums) for month, sums in month_sums)
+        return [
+            {
+                'date': month.strftime('%Y-%m'),
+                'totals': self._breakdowns_cumulative(sums, include_non_hvc=include_non_hvc),
+            }
+            for (month, _), sums in zip(month_sums, running_sums)
+            ]
+
+    def _breakdowns_cumulative(self, sums, include_non_hvc=True):
+        """ Breakdown by HVC, confirmed and non-export, from `_breakdown_sums` totalled up to a month """
+
+        hvc = self._breakdown_from_sums(sums, ('hvc',))
+        non_hvc = self._breakdown_from_sums(sums, ('non_hvc',))
 
         result = {
             'export': {
-                'hvc': {
-                    'value': {
-                        'confirmed': self.hvc_confirm_cu_value,
-                        'unconfirmed': self.hvc_non_cu_value,
-                        'total': total_hvc_value,
-                    },
-                    'number': {
-                        'confirmed': self.hvc_confirm_cu_number,
-                        'unconfirmed': self.hvc_non_cu_number,
-                        'total': total_hvc_number,
-                    },
-                },
+                'hvc': hvc,
             },
-            'non_export': {
-                'value': {
-                    'confirmed': self.non_export_confirm_cu_value,
-                    'unconfirmed': self.non_export_non_cu_value,
-                    'total': (self.non_export_confirm_cu_value + self.non_export_non_cu_value),
-                },
-                'number': {
-                    'confirmed': self.non_export_confirm_cu_number,
-                    'unconfirmed': self.non_export_non_cu_number,
-                    'total': (self.non_export_confirm_cu_number + self.non_export_non_cu_number),
-                }
-            }
+            'non_export': self._breakdown_from_sums(sums, ('hvc', 'non_hvc'), non_export=True),
         }
 
         if include_non_hvc:
-            result['export']['non_hvc'] = {
-                'value': {
-                    'confirmed': self.non_hvc_confirm_cu_value,
-                    'unconfirmed': self.non_hvc_non_cu_value,
-                    'total': total_non_hvc_value,
-                },
-                'number': {
-                    'confirmed': self.non_hvc_confirm_cu_number,
-                    'unconfirmed': self.non_hvc_non_cu_number,
-                    'total': total_non_hvc_number,
-                }
-            }
+            result['export']['non_hvc'] = non_hvc
+            totals = self._breakdown_from_sums(sums, ('hvc', 'non_hvc'))
+        else:
+            totals = hvc
 
         result['export']['totals'] = {
             'value': {
-                'confirmed': total_confirm_value if include_non_hvc else self.hvc_confirm_cu_value,
-                'unconfirmed': total_non_conf_value if include_non_hvc else self.hvc_non_cu_value,
-                'grand_total': total_hvc_value + total_non_hvc_value if include_non_hvc else total_hvc_value,
+                'confirmed': totals['value']['confirmed'],
+                'unconfirmed': totals['value']['unconfirmed'],
+                'grand_total': totals['value']['total'],
             },
             'number': {
-                'confirmed': total_confirm_number if include_non_hvc else self.hvc_confirm_cu_number,
-                'unconfirmed': total_non_conf_number if include_non_hvc else self.hvc_non_cu_number,
-                'grand_total': total_hvc_number + total_non_hvc_number if include_non_hvc else total_hvc_number,
+                'confirmed': totals['number']['confirmed'],
+                'unconfirmed': totals['number']['unconfirmed'],
+                'grand_total': totals['number']['total'],
             },
         }
         return result
@@ -0,0 +1,102 @@
+from collections import OrderedDict
+import logging
+from urllib.parse import urlsplit
+
+from django.core.urlresolvers import resolve, Resolver404
+from django.http import HttpRequest, QueryDict
+from rest_framework import status
+from rest_framework.views import APIView
+
+from mi.views.base_view import BaseWinMIView
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchView(BaseWinMIView):
+    """
+    Responses of several MI resources in one round trip
+
+    POST a JSON object with a list of `paths` of MI GET endpoints, e.g.
+    {"paths": ["/mi/sector_teams/1/", "/mi/sector_teams/1/months/?year=2015"]}, and get back a list of
+    {"path", "status", "data"} objects in the same order.
+
+    Permissions are checked once, for the batch, and every resource is worked out against the same snapshots
+    of the hierarchy and wins, and each distinct filter of wins is evaluated once for the whole batch.
+    Resources are still served from, and stored in, the MI response cache.
+    """
+
+    MAX_PATHS = 200
+    # snapshots, and the memo of wins worked out, shared by the views of all resources
+    SHARED_SNAPSHOTS = ('_hierarchy', '_win_columns', '_day_index', '_win_memo')
+
+    def _shared_snapshots(self, view_class, query_params):
+        """
+        Attributes handing a view the batch's snapshots in place of its own
+
+        The day index is only loaded for resources of a date range.
+        """
+        shared = OrderedDict()
+        for name in self.SHARED_SNAPSHOTS:
+            if name == '_day_index' and 'from' not in query_params and 'to' not in query_params:
+                continue
+            if hasattr(view_class, name):
+                shared[name] = getattr(self, name)
+        return shared
+
+    def _resolve(self, path):
+        """ MI view class and URL kwargs of the path, or None if it isn't an MI endpoint """
+
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        view_class = getattr(match.func, 'view_class', None)
+        if match.namespace != 'mi' or view_class is None or not issubclass(view_class, APIView):
+            return None
+        if issubclass(view_class, BatchView):
+            return None
+        return view_class, match.kwargs
+
+    def _resource_request(self, request, path, query_params):
+        """ GET request for a resource, on behalf of the batch request's user """
+
+        resource_request = HttpRequest()
+        resource_request.method = 'GET'
+        resource_request.path = resource_request.path_info = path
+        resource_request.GET = query_params
+        query = query_params.urlencode()
+        resource_request.META = {'REQUEST_METHOD': 'GET', 'QUERY_STRING': query}
+        for name in ('user', 'session', 'server_name'):
+            if hasattr(request._request, name):
+                setattr(resource_request, name, getattr(request._request, name))
+        return resource_request
+
+    def _get_resource(self, request, full_path):
+        path, query = urlsplit(full_path)[2:4]
+        resolved = self._resolve(path)
+        if resolved is None:
+            return status.HTTP_404_NOT_FOUND, {'error': 'not an MI resource'}
+        view_class, kwargs = resolved
+
+        query_params = QueryDict(query)
+        view = view_class.as_view(permission_classes=(), **self._shared_snapshots(view_class, query_params))
+        try:
+            response = view(self._resource_request(request, path, query_params), **kwargs)
+        except Exception:
+            logger.exception('MI batch resource %s failed', full_path)
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': 'could not be worked out'}
+        return response.status_code, response.data
+
+    def post(self, request):
+        paths = request.data.get('paths') if hasattr(request.data, 'get') else None
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            return self._invalid('paths must be a list of MI resource paths')
+        if len(paths) > self.MAX_PATHS:
+            return self._invalid('at most {} paths can be batched'.format(self.MAX_PATHS))
+
+        results = []
+        for path in paths:
+            status_code, data = self._get_resource(request, path)
+            results.append({'path': path, 'status': status_code, 'data': data})
+        return self._success(results)
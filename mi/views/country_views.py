@@ -1,35 +1,32 @@
-from django_countries.fields import Country as DjangoCountry
+from rest_framework.pagination import PageNumberPagination
 
-from mi.models import Country, Target
-from mi.utils import (
-    get_financial_start_date,
-    get_financial_end_date,
-)
 from mi.views.base_view import BaseWinMIView, BaseMIView
-from wins.models import Win
+
+
+class CountryWinsPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page-size"
+    max_page_size = 250
 
 
 class BaseCountriesMIView(BaseWinMIView):
     """ Abstract Base for other Country-related MI endpoints to inherit from """
 
     def _get_country(self, country_id):
-        try:
-            return Country.objects.get(id=int(country_id))
-        except Country.DoesNotExist:
-            return False
+        """ Return `CountryInfo` from the hierarchy snapshot for the given country_id """
+
+        return self._hierarchy.countries.get(int(country_id), False)
 
     def _get_country_wins(self, country):
-        dj_country = DjangoCountry(country.country.code)
-        return Win.objects.filter(
-            country__exact=dj_country,
-            date__range=(get_financial_start_date(), get_financial_end_date()),
-        ).select_related('confirmation')
+        """ All HVC and non-HVC wins for the `Country`, as a cell of the rollup cube """
+
+        return self._cube.country(country.code)
 
     def _country_result(self, country):
         """ Basic data about countries - name & hvc's """
         return {
-            'name': country.country.name,
-            'hvcs': self._hvc_overview(country.targets.all()),
+            'name': country.name,
+            'hvcs': self._hvc_overview(country.targets),
         }
 
 
@@ -38,10 +35,10 @@ class CountryListView(BaseMIView):
         results = [
             {
                 'id': c.id,
-                'code': c.country.code,
-                'name': c.country.name
+                'code': c.code,
+                'name': c.name
             }
-            for c in Country.objects.all()
+            for c in self._hierarchy.countries.values()
             ]
         return self._success(results)
 
@@ -53,11 +50,6 @@ class CountryDetailView(BaseCountriesMIView):
         if not country:
             return self._invalid('team not found')
 
-        targets = Target.objects.filter(country=country)
-        total_target = 0
-        for target in targets:
-            total_target += target.target
-
         results = self._country_result(country)
         wins = self._get_country_wins(country)
         results['wins'] = self._breakdowns(wins)
@@ -65,14 +57,47 @@ class CountryDetailView(BaseCountriesMIView):
 
 
 class CountryWinsView(BaseCountriesMIView):
+    """
+    Win breakdowns of every country, or of those given as comma separated codes by `countries`
+
+    Breakdowns are read off country cells of the rollup cube, all worked out in one pass over the wins,
+    so the number of queries doesn't grow with the number of countries. Results are paginated when a
+    `page` or `page-size` is asked for.
+    """
+
+    pagination_class = CountryWinsPagination
+
+    def _country_codes(self):
+        """ Set of country codes asked for, or None for all countries """
+
+        codes = self.request.query_params.get('countries')
+        if codes is None:
+            return None
+        return {code.strip().upper() for code in codes.split(',') if code.strip()}
+
     def get(self, request):
+        countries = list(self._hierarchy.countries.values())
+        codes = self._country_codes()
+        if codes is not None:
+            unknown = codes - {c.code for c in countries}
+            if unknown:
+                return self._invalid('unknown countries: {}'.format(', '.join(sorted(unknown))))
+            countries = [c for c in countries if c.code in codes]
+
+        paginator = None
+        if 'page' in request.query_params or self.pagination_class.page_size_query_param in request.query_params:
+            paginator = self.pagination_class()
+            countries = paginator.paginate_queryset(countries, request, view=self)
+
         results = [
             {
                 'id': c.id,
-                'code': c.country.code,
-                'name': c.country.name,
+                'code': c.code,
+                'name': c.name,
                 'wins': self._breakdowns(self._get_country_wins(c))
             }
-            for c in Country.objects.all()
+            for c in countries
             ]
+        if paginator is not None:
+            return self._success(paginator.get_paginated_response(results).data)
         return self._success(results)
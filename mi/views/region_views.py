@@ -1,80 +1,45 @@
-from itertools import groupby
-from operator import attrgetter
-
-from django.db.models import Sum, Count, Q, Min
-from django_countries.fields import Country as DjangoCountry
-
 from rest_framework.generics import ListAPIView
 
 from alice.authenticators import IsMIServer, IsMIUser
-from mi.models import OverseasRegion, Target, Sector
+from mi.models import OverseasRegion
 from mi.serializers import OverseasRegionSerializer
-from mi.utils import (
-    get_financial_start_date,
-    month_iterator,
-    sort_campaigns_by,
-    two_digit_float,
-)
+from mi.utils import two_digit_float
 from mi.views.base_view import BaseWinMIView
-from wins.models import Notification
 
 
 class BaseOverseasRegionsMIView(BaseWinMIView):
     """ Abstract Base for other Region-related MI endpoints to inherit from """
 
     def _get_region(self, region_id):
-        """ Return `OverseasRegion` object for the given region_id"""
+        """ Return `OverseasRegionInfo` from the hierarchy snapshot for the given region_id"""
 
-        try:
-            return OverseasRegion.objects.get(id=int(region_id))
-        except OverseasRegion.DoesNotExist:
-            return False
+        return self._hierarchy.overseas_regions.get(int(region_id), False)
 
     def _get_region_wins(self, region):
         """
-        All HVC and non-HVC wins for the `OverseasRegion`
+        All HVC and non-HVC wins for the `OverseasRegion`, as a cell of the rollup cube
 
         """
 
-        return self._wins().filter(
-            country__in=region.country_ids,
-        ).select_related('confirmation')
+        return self._cube.overseas_regions[region.id]
 
     def _get_region_hvc_wins(self, region):
         """
-        HVC wins alone for the `OverseasRegion`
+        HVC wins alone for the `OverseasRegion`, as a cell of the rollup cube
         """
-        return self._wins().filter(
-            hvc__in=region.campaign_ids,
-        ).select_related('confirmation')
+        return self._cube.campaigns_total(region.campaign_ids)
 
     def _get_region_non_hvc_wins(self, region):
         """
-        non-HVC wins alone for the `OverseasRegion`
+        non-HVC wins alone for the `OverseasRegion`, as a cell of the rollup cube
         """
-        return self._wins().filter(
-            Q(country__in=region.country_ids),
-            Q(hvc__isnull=True) | Q(hvc=''),
-        ).select_related('confirmation')
+        return self._cube.overseas_regions[region.id].non_hvc()
 
     def _get_avg_confirm_time(self, region):
         """
             Average of (earliest CUSTOMER notification created date - customer response date) for given team
         """
-        notifications = Notification.objects.filter(
-            type__exact='c',
-            win__country__in=region.country_ids,
-            win__confirmation__created__isnull=False
-        ).annotate(Min('created')).select_related('win__confirmation')
-
-        if notifications.count() == 0:
-            return two_digit_float(0)
-
-        confirm_delay = [(notification.win.confirmation.created - notification.created).days
-                         for notification in notifications]
-        total_days = sum(confirm_delay)
-        average_time = total_days / notifications.count()
-
+        average_time = self._average_confirm_time(self._wins().filter(country__in=region.country_ids))
         return two_digit_float(average_time)
 
     def _region_result(self, region):
@@ -109,35 +74,6 @@ class OverseasRegionDetailView(BaseOverseasRegionsMIView):
 class OverseasRegionMonthsView(BaseOverseasRegionsMIView):
     """ Overseas Region name, hvcs and wins broken down by month """
 
-    def _month_breakdowns(self, wins):
-        month_to_wins = self._group_wins_by_month(wins)
-        return [
-            {
-                'date': date_str,
-                'totals': self._breakdowns_cumulative(month_wins),
-            }
-            for date_str, month_wins in month_to_wins
-            ]
-
-    def _group_wins_by_month(self, wins):
-        date_attrgetter = attrgetter('date')
-        sorted_wins = sorted(wins, key=date_attrgetter)
-        month_to_wins = []
-        for k, g in groupby(sorted_wins, key=date_attrgetter):
-            month_wins = list(g)
-            date_str = month_wins[0].date.strftime('%Y-%m')
-            month_to_wins.append((date_str, month_wins))
-
-        # Add missing months within the financial year until current month
-        for item in month_iterator(get_financial_start_date()):
-            date_str = '{:d}-{:02d}'.format(*item)
-            existing = [m for m in month_to_wins if m[0] == date_str]
-            if len(existing) == 0:
-                # add missing month and an empty list
-                month_to_wins.append((date_str, list()))
-
-        return sorted(month_to_wins, key=lambda tup: tup[0])
-
     def get(self, request, region_id):
 
         region = self._get_region(region_id)
@@ -154,96 +90,84 @@ class OverseasRegionCampaignsView(BaseOverseasRegionsMIView):
     """ Overseas Region's HVC's view along with their win-breakdown """
 
     def _campaign_breakdowns(self, region):
-        campaign_to_wins = self._group_wins_by_campaign(region)
-        campaigns = [
-            {
-                'campaign': campaign.name.split(":")[0],
-                'totals': self._progress_breakdown(campaign_wins, campaign.target),
-            }
-            for campaign, campaign_wins in campaign_to_wins
-            ]
-
-        sorted_campaigns = sorted(campaigns, key=sort_campaigns_by, reverse=True)
-        return sorted_campaigns
+        return self._campaign_breakdowns_of(region.targets, campaign_ids=False)
 
-    def _group_wins_by_campaign(self, region):
-        wins = self._get_region_hvc_wins(region)
-        hvc_attrgetter = attrgetter('hvc')
-        sorted_wins = sorted(wins, key=hvc_attrgetter)
-        campaign_to_wins = []
+    def get(self, request, region_id):
 
-        # group existing wins by campaign
-        for k, g in groupby(sorted_wins, key=hvc_attrgetter):
-            campaign_wins = list(g)
-            campaign_to_wins.append((Target.objects.get(campaign_id=k), campaign_wins))
+        region = self._get_region(region_id)
+        if not region:
+            return self._invalid('region not found')
 
-        # add remaining campaigns
+        results = self._region_result(region)
+        results['campaigns'] = self._campaign_breakdowns(region)
+        return self._success(results)
 
-        for target in region.targets:
-            if not any(target in campaign_to_win for campaign_to_win in campaign_to_wins):
-                campaign_to_wins.append((target, []))
 
-        return campaign_to_wins
+class OverseasRegionStatusHistoryView(BaseOverseasRegionsMIView):
+    """ Overseas Region's HVC status colour counts on each day, as recorded nightly """
 
     def get(self, request, region_id):
-
         region = self._get_region(region_id)
         if not region:
             return self._invalid('region not found')
 
-        results = self._region_result(region)
-        results['campaigns'] = self._campaign_breakdowns(region)
-        return self._success(results)
+        return self._success({
+            'id': region.id,
+            'name': region.name,
+            'status_history': self._status_history(region.campaign_ids),
+        })
 
 
 class OverseasRegionsTopNonHvcWinsView(BaseOverseasRegionsMIView):
-    """ Top n HVCs with win-breakdown for given Overseas Region"""
+    """ Top `limit` (5 by default) non-HVC country and sector breakdowns by value for given Overseas Region """
 
-    def _breakdown(self, agg_win):
-        return {
-            'region': agg_win.country.name,
-            'sector': agg_win.sector.name,
-            'totalValue': agg_win.total_value,
-            'totalWins': agg_win.total_wins
-        }
-
-    def get(self, request, region_id):
+    def _top_non_hvc_result(self, row, top_value):
         """
             percentComplete is based on the top value being 100%
             averageWinValue is total non_hvc win value for the sector/total number of wins during the financial year
             averageWinPercent is therefore averageWinValue * 100/Total win value for the sector/market
         """
+        return {
+            'region': self._country_names.get(row['country'], ''),
+            'sector': self._hierarchy.sectors[row['sector']].name,
+            'totalValue': row['total_value'],
+            'totalWins': row['total_wins'],
+            'percentComplete': int(int(row['total_value']) * 100 / top_value),
+            'averageWinValue': row['total_value'] / row['total_wins'],
+            'averageWinPercent': two_digit_float(
+                (row['total_value'] / row['total_wins']) * 100 / (int(row['total_value']) or 1))
+        }
+
+    def get(self, request, region_id):
         region = self._get_region(region_id)
         if not region:
             return self._invalid('region not found')
-        country_ids = [s.country for s in region.countries.all()]
-        records_to_retreive = 5
-        non_hvc_wins = self._wins().filter(
-            Q(hvc='') | Q(hvc__isnull=True),
-            country__in=country_ids,
-        ).values(
-            'country',
-            'sector'
-        ).annotate(
-            total_value=Sum('total_expected_export_value'),
-            total_wins=Count('id')
-        ).order_by('-total_value')[:records_to_retreive]
-
-        top_value = int(non_hvc_wins[0]['total_value'])
 
+        rows = self._evaluate(self._non_hvc_totals(country__in=region.country_ids)[:self._top_limit])
+        return self._success(self._top_non_hvc_results(rows))
+
+
+class AllOverseasRegionsTopNonHvcWinsView(OverseasRegionsTopNonHvcWinsView):
+    """
+    Top non-HVC country and sector breakdowns of every Overseas Region, as of `OverseasRegionsTopNonHvcWinsView`
+
+    Worked out from one grouped query of all regions' non-HVC Wins, ranked within each region.
+    """
+
+    def get(self, request):
+        country_to_region = self._hierarchy.country_to_region
+        region_to_rows = self._top_non_hvc_by(
+            self._evaluate(self._non_hvc_totals(country__in=list(country_to_region))),
+            lambda row: country_to_region[row['country']].id,
+        )
         results = [
             {
-                'region': DjangoCountry(agg_win['country']).name,
-                'sector': Sector.objects.get(id=agg_win['sector']).name,
-                'totalValue': agg_win['total_value'],
-                'totalWins': agg_win['total_wins'],
-                'percentComplete': int(int(agg_win['total_value']) * 100 / top_value),
-                'averageWinValue': agg_win['total_value'] / agg_win['total_wins'],
-                'averageWinPercent': two_digit_float(
-                    (agg_win['total_value'] / agg_win['total_wins']) * 100 / int(agg_win['total_value']))
+                'id': region.id,
+                'name': region.name,
+                'top_non_hvcs': self._top_non_hvc_results(region_to_rows[region.id]),
             }
-            for agg_win in non_hvc_wins
-            ]
+            for region in self._hierarchy.overseas_regions.values()
+        ]
         return self._success(results)
 
 
@@ -260,17 +184,19 @@ class OverseasRegionOverviewView(BaseOverseasRegionsMIView):
         total_target = sum(t.target for t in targets)
 
         hvc_wins = self._get_region_hvc_wins(region_obj)
-        hvc_confirmed = sum(w.total_expected_export_value for w in hvc_wins if w.confirmed)
-        hvc_unconfirmed = sum(w.total_expected_export_value for w in hvc_wins if not w.confirmed)
+        hvc_export = self._breakdown_wins(hvc_wins)['value']
+        hvc_confirmed = hvc_export['confirmed']
+        hvc_unconfirmed = hvc_export['unconfirmed']
         non_hvc_wins = self._get_region_non_hvc_wins(region_obj)
-        non_hvc_confirmed = sum(w.total_expected_export_value for w in non_hvc_wins if w.confirmed)
-        non_hvc_unconfirmed = sum(w.total_expected_export_value for w in non_hvc_wins if not w.confirmed)
+        non_hvc_export = self._breakdown_wins(non_hvc_wins)['value']
+        non_hvc_confirmed = non_hvc_export['confirmed']
+        non_hvc_unconfirmed = non_hvc_export['unconfirmed']
 
         target_percentage = self._overview_target_percentage(hvc_wins, total_target)
 
         total_win_percent = self._overview_win_percentages(hvc_wins, non_hvc_wins)
 
-        hvc_colours_count = self._colours(hvc_wins, targets)
+        hvc_colours_count = self._colours(targets)
 
         result = {
             'id': region_obj.id,
@@ -300,5 +226,5 @@ class OverseasRegionOverviewView(BaseOverseasRegionsMIView):
         return result
 
     def get(self, request):
-        result = [self._region_data(region) for region in OverseasRegion.objects.all()]
+        result = [self._region_data(region) for region in self._hierarchy.overseas_regions.values()]
         return self._success(result)
@@ -1,34 +1,21 @@
-from itertools import groupby
-from operator import attrgetter, itemgetter
-
-from django.db.models import Count, Min, Q, Sum
-from django_countries.fields import Country as DjangoCountry
-
-from mi.models import (
-    Sector,
-    SectorTeam,
-    Target,
-)
-from mi.utils import (
-    get_financial_start_date,
-    month_iterator,
-    sort_campaigns_by,
-    two_digit_float,
-)
+from operator import itemgetter
+
+from mi.utils import two_digit_float
 from mi.views.base_view import BaseWinMIView
-from wins.models import Notification
 
 
 class BaseSectorMIView(BaseWinMIView):
     """ Abstract Base for other Sector-related MI endpoints to inherit from """
 
     def _get_team(self, team_id):
-        """ Get SectorTeam object or False if invalid ID """
+        """ Get `SectorTeamInfo` of the hierarchy or False if invalid ID """
+
+        return self._hierarchy.sector_teams.get(int(team_id), False)
+
+    def _get_hvc_groups(self, team):
+        """ `HVCGroupInfo`s of the hierarchy belonging to the team """
 
-        try:
-            return SectorTeam.objects.get(id=int(team_id))
-        except SectorTeam.DoesNotExist:
-            return False
+        return [self._hierarchy.hvc_groups[group_id] for group_id in team.hvc_group_ids]
 
     def _team_wins_breakdown(self, sector_team):
         """ Breakdown of team's HVC, non-HVC and non-export Wins """
@@ -36,50 +23,38 @@ class BaseSectorMIView(BaseWinMIView):
         return self._breakdowns(self._get_all_wins(sector_team))
 
     def _get_group_wins(self, group):
-        """ HVC wins of the HVC Group """
-        return self._wins().filter(
-            hvc__in=group.campaign_ids,
-        ).select_related('confirmation')
+        """ HVC wins of the HVC Group, as a cell of the rollup cube """
+
+        return self._cube.hvc_groups[group.id]
 
     def _get_hvc_wins(self, team):
         """
-        HVC wins alone for the `SectorTeam`
+        HVC wins alone for the `SectorTeam`, as a cell of the rollup cube
 
-        A `Win` is considered HVC for this team, when it falls under a Campaign that belongs to this `SectorTeam`
+        A `Win` is considered HVC for this team, when it falls under a Campaign of one of the team's HVC Groups
         """
-        return self._wins().filter(
-            hvc__in=team.campaign_ids
-        ).select_related('confirmation')
+        return self._cube.sector_teams[team.id].hvc()
 
     def _get_non_hvc_wins(self, team):
         """
-        non-HVC wins alone for the `SectorTeam`
+        non-HVC wins alone for the `SectorTeam`, as a cell of the rollup cube
 
         A `Win` is a non-HVC, if no HVC was mentioned while recording it
         but it belongs to a CDMS Sector that is within this `SectorTeam`s range
         """
-        return self._wins().filter(
-            Q(sector__in=team.sector_ids),
-            Q(hvc__isnull=True) | Q(hvc='')
-        ).select_related('confirmation')
+        return self._cube.sector_teams[team.id].non_hvc()
 
     def _get_all_wins(self, sector_team):
-        """ Get HVC and non-HVC Wins of a Sector Team """
+        """ Get HVC and non-HVC Wins of a Sector Team, as a cell of the rollup cube """
 
-        return (list(self._get_hvc_wins(sector_team)) +
-                list(self._get_non_hvc_wins(sector_team)))
+        return self._cube.sector_teams[sector_team.id]
 
     def _get_avg_confirm_time(self, team):
         """
         Average of (earliest CUSTOMER notification created date - customer response date) for given team
         """
 
-        notifications_qs = Notification.objects.filter(
-            type__exact='c',
-            win__sector__in=team.sector_ids,
-            win__confirmation__isnull=False,
-        )
-        return self._average_confirm_time(notifications_qs)
+        return self._average_confirm_time(self._wins().filter(sector__in=team.sector_ids))
 
     def _sector_result(self, team):
         """ Basic data about sector team - name & hvc's """
@@ -87,50 +62,59 @@ class BaseSectorMIView(BaseWinMIView):
         return {
             'name': team.name,
             'avg_time_to_confirm': self._get_avg_confirm_time(team),
-            'hvcs': self._hvc_overview(team.targets.all()),
+            'hvcs': self._hvc_overview(team.targets),
         }
 
 
 class TopNonHvcSectorCountryWinsView(BaseSectorMIView):
-    """ Sector Team non-HVC Win data broken down by country """
+    """ Sector Team non-HVC Win data broken down by country, top `limit` (5 by default) by value """
 
-    def get(self, request, team_id):
+    def _top_non_hvc_result(self, row, top_value):
         """
         percentComplete is based on the top value being 100%
         averageWinValue is total non_hvc win value for the sector/total number of wins during the financial year
         averageWinPercent is therefore averageWinValue * 100/Total win value for the sector/market
         """
+        return {
+            'region': self._country_names.get(row['country'], ''),
+            'sector': self._hierarchy.sectors[row['sector']].name,
+            'totalValue': row['total_value'],
+            'totalWins': row['total_wins'],
+            'percentComplete': int(int(row['total_value']) * 100 / top_value),
+            'averageWinValue': int(row['total_value'] / row['total_wins']),
+            'averageWinPercent': int((row['total_value'] / row['total_wins']) * 100 / top_value)
+        }
+
+    def get(self, request, team_id):
         team = self._get_team(team_id)
         if not team:
             return self._invalid('team not found')
 
-        records_to_retreive = 5
+        rows = self._evaluate(self._non_hvc_totals(sector__in=team.sector_ids)[:self._top_limit])
+        return self._success(self._top_non_hvc_results(rows))
 
-        wins = self._wins().filter(
-            Q(hvc='') | Q(hvc__isnull=True),
-            sector__in=team.sector_ids,
-        ).values(
-            'country',
-            'sector'
-        ).annotate(
-            total_value=Sum('total_expected_export_value'),
-            total_wins=Count('id')
-        ).order_by('-total_value')[:records_to_retreive]
 
-        top_value = int(wins[0]['total_value'])
+class AllTopNonHvcSectorCountryWinsView(TopNonHvcSectorCountryWinsView):
+    """
+    Top non-HVC Win data of every Sector Team, as of `TopNonHvcSectorCountryWinsView`
 
+    Worked out from one grouped query of all teams' non-HVC Wins, ranked within each team.
+    """
+
+    def get(self, request):
+        sector_to_team = self._hierarchy.sector_to_team
+        team_to_rows = self._top_non_hvc_by(
+            self._evaluate(self._non_hvc_totals(sector__in=list(sector_to_team))),
+            lambda row: sector_to_team[row['sector']].id,
+        )
         results = [
             {
-                'region': DjangoCountry(agg_win['country']).name,
-                'sector': Sector.objects.get(id=agg_win['sector']).name,
-                'totalValue': agg_win['total_value'],
-                'totalWins': agg_win['total_wins'],
-                'percentComplete': int(int(agg_win['total_value']) * 100 / top_value),
-                'averageWinValue': int(agg_win['total_value'] / agg_win['total_wins']),
-                'averageWinPercent': int((agg_win['total_value'] / agg_win['total_wins']) * 100 / top_value)
+                'id': team.id,
+                'name': team.name,
+                'top_non_hvcs': self._top_non_hvc_results(team_to_rows[team.id]),
             }
-            for agg_win in wins
-            ]
+            for team in self._hierarchy.sector_teams.values()
+        ]
         return self._success(results)
 
 
@@ -143,15 +127,7 @@ class AverageTimeToConfirmView(BaseWinMIView):
         """
             Average of (earliest CUSTOMER notification created date - customer response date)
         """
-        notifications = Notification.objects.filter(
-            type__exact='c',
-            win__confirmation__created__isnull=False
-        ).annotate(Min('created')).select_related('win__confirmation')
-
-        confirm_delay = [(notification.win.confirmation.created - notification.created).days
-                         for notification in notifications]
-        total_days = sum(confirm_delay)
-        average_time = total_days / notifications.count()
+        average_time = self._average_confirm_time(self._wins())
 
         results = {
             'average': two_digit_float(average_time),
@@ -170,7 +146,7 @@ class SectorTeamsListView(BaseSectorMIView):
                 'id': hvc_group.id,
                 'name': hvc_group.name,
             }
-            for hvc_group in team.hvc_groups.all()
+            for hvc_group in self._get_hvc_groups(team)
             ]
         return sorted(results, key=itemgetter('name'))
 
@@ -181,7 +157,7 @@ class SectorTeamsListView(BaseSectorMIView):
                 'name': sector_team.name,
                 'hvc_groups': self._get_hvc_groups_for_team(sector_team)
             }
-            for sector_team in SectorTeam.objects.all()
+            for sector_team in self._hierarchy.sector_teams.values()
             ]
         return self._success(sorted(results, key=itemgetter('name')))
 
@@ -202,35 +178,6 @@ class SectorTeamDetailView(BaseSectorMIView):
 class SectorTeamMonthsView(BaseSectorMIView):
     """ Sector Team name, hvcs and wins broken down by month """
 
-    def _month_breakdowns(self, wins):
-        month_to_wins = self._group_wins_by_month(wins)
-        return [
-            {
-                'date': date_str,
-                'totals': self._breakdowns_cumulative(month_wins),
-            }
-            for date_str, month_wins in month_to_wins
-            ]
-
-    def _group_wins_by_month(self, wins):
-        date_attrgetter = attrgetter('date')
-        sorted_wins = sorted(wins, key=date_attrgetter)
-        month_to_wins = []
-        # group wins by date (month-year)
-        for k, g in groupby(sorted_wins, key=date_attrgetter):
-            month_wins = list(g)
-            date_str = month_wins[0].date.strftime('%Y-%m')
-            month_to_wins.append((date_str, month_wins))
-
-        # Add missing months within the financial year until current month
-        for item in month_iterator(get_financial_start_date()):
-            date_str = '{:d}-{:02d}'.format(*item)
-            existing = [m for m in month_to_wins if m[0] == date_str]
-            if len(existing) == 0:
-                month_to_wins.append((date_str, list()))
-
-        return sorted(month_to_wins, key=lambda tup: tup[0])
-
     def get(self, request, team_id):
         team = self._get_team(team_id)
         if not team:
@@ -246,64 +193,52 @@ class SectorTeamCampaignsView(BaseSectorMIView):
     """ Sector Team Wins broken down by individual HVC """
 
     def _campaign_breakdowns(self, team):
+        return self._campaign_breakdowns_of(team.targets)
 
-        wins = self._get_hvc_wins(team)
-        targets = team.targets.all()
-        campaign_to_wins = self._group_wins_by_campaign(wins, targets)
-        campaigns = [
-            {
-                'campaign': campaign.name.split(':')[0],
-                'campaign_id': campaign.campaign_id,
-                'totals': self._progress_breakdown(campaign_wins, campaign.target),
-            }
-            for campaign, campaign_wins in campaign_to_wins
-            ]
-
-        sorted_campaigns = sorted(campaigns, key=sort_campaigns_by, reverse=True)
-        return sorted_campaigns
-
-    def _group_wins_by_campaign(self, wins, targets):
-        hvc_attrgetter = attrgetter('hvc')
-        sorted_wins = sorted(wins, key=hvc_attrgetter)
-        campaign_to_wins = []
+    def get(self, request, team_id):
+        team = self._get_team(team_id)
+        if not team:
+            return self._invalid('team not found')
 
-        # group existing wins by campaign
-        for k, g in groupby(sorted_wins, key=hvc_attrgetter):
-            campaign_wins = list(g)
-            campaign_to_wins.append((Target.objects.get(campaign_id=k), campaign_wins))
+        results = self._sector_result(team)
+        results['campaigns'] = self._campaign_breakdowns(team)
+        return self._success(results)
 
-        # add remaining campaigns
-        for target in targets:
-            target_campaign = Target.objects.get(campaign_id=target.campaign_id)
-            if not any(target_campaign in campaign_to_win for campaign_to_win in campaign_to_wins):
-                campaign_to_wins.append((target_campaign, []))
 
-        return campaign_to_wins
+class SectorTeamStatusHistoryView(BaseSectorMIView):
+    """ Sector Team's HVC status colour counts on each day, as recorded nightly """
 
     def get(self, request, team_id):
         team = self._get_team(team_id)
         if not team:
             return self._invalid('team not found')
 
-        results = self._sector_result(team)
-        results['campaigns'] = self._campaign_breakdowns(team)
-        return self._success(results)
+        return self._success({
+            'id': team.id,
+            'name': team.name,
+            'status_history': self._status_history(team.campaign_ids),
+        })
 
 
 class SectorTeamsOverviewView(BaseSectorMIView):
-    """ Overview of HVCs, targets etc. for each SectorTeam """
+    """
+    Overview of HVCs, targets etc. for each SectorTeam
+
+    Teams and groups are rolled up once in the rollup cube, and teams, groups and their targets come from the
+    hierarchy snapshot, so the number of queries doesn't grow with the number of teams and groups.
+    """
 
-    def _sector_obj_data(self, sector_obj):
-        """ Get general data from SectorTeam or HVCGroup """
+    def _sector_obj_data(self, sector_obj, hvc_wins):
+        """ Get general data from SectorTeam or HVCGroup, given its HVC wins """
 
-        targets = sector_obj.targets.all()
-        hvc_wins = self._get_hvc_wins(sector_obj)
+        targets = sector_obj.targets
 
-        hvc_export_confirmed = sum(w.total_expected_export_value for w in hvc_wins if w.confirmed)
-        hvc_export_unconfirmed = sum(w.total_expected_export_value for w in hvc_wins if not w.confirmed)
+        hvc_export = self._breakdown_wins(hvc_wins)['value']
+        hvc_export_confirmed = hvc_export['confirmed']
+        hvc_export_unconfirmed = hvc_export['unconfirmed']
         total_target = sum(t.target for t in targets)
 
-        hvc_colours_count = self._colours(hvc_wins, targets)
+        hvc_colours_count = self._colours(targets)
 
         return {
             'id': sector_obj.id,
@@ -324,12 +259,13 @@ class SectorTeamsOverviewView(BaseSectorMIView):
     def _sector_data(self, sector_team):
         """ Calculate overview for a sector team """
 
-        result = self._sector_obj_data(sector_team)
-
         hvc_wins = self._get_hvc_wins(sector_team)
+        result = self._sector_obj_data(sector_team, hvc_wins)
+
         non_hvc_wins = self._get_non_hvc_wins(sector_team)
-        non_hvc_confirmed = sum(w.total_expected_export_value for w in non_hvc_wins if w.confirmed)
-        non_hvc_unconfirmed = sum(w.total_expected_export_value for w in non_hvc_wins if not w.confirmed)
+        non_hvc_export = self._breakdown_wins(non_hvc_wins)['value']
+        non_hvc_confirmed = non_hvc_export['confirmed']
+        non_hvc_unconfirmed = non_hvc_export['unconfirmed']
         hvc_confirmed = result['values']['hvc']['current']['confirmed']
         hvc_unconfirmed = result['values']['hvc']['current']['unconfirmed']
 
@@ -353,11 +289,14 @@ class SectorTeamsOverviewView(BaseSectorMIView):
         result['values']['hvc']['total_win_percent'] = total_win_percent['hvc']
 
         result['hvc_groups'] = [
-            self._sector_obj_data(parent)
-            for parent in sector_team.hvc_groups.all()
+            self._sector_obj_data(group, self._get_group_wins(group))
+            for group in self._get_hvc_groups(sector_team)
             ]
         return result
 
     def get(self, request):
-        result = [self._sector_data(team) for team in SectorTeam.objects.all()]
+        result = [
+            self._sector_data(team)
+            for team in self._hierarchy.sector_teams.values()
+            ]
         return self._success(sorted(result, key=lambda x: (x['name'])))
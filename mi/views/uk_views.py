@@ -0,0 +1,36 @@
+from mi.views.base_view import BaseWinMIView
+
+
+class BaseUKMIView(BaseWinMIView):
+    """ Abstract Base for UK-wide MI endpoints, totalling up wins of all Sector Teams and Overseas Regions """
+
+    def _get_uk_wins(self):
+        """ All HVC and non-HVC wins, as a cell of the rollup cube """
+
+        return self._cube.uk
+
+    def _uk_result(self):
+        """ Basic data about the UK as a whole - name & hvc's """
+
+        return {
+            'name': 'UK',
+            'hvcs': self._hvc_overview(self._hierarchy.targets.values()),
+        }
+
+
+class UKDetailView(BaseUKMIView):
+    """ UK-wide targets and win-breakdown """
+
+    def get(self, request):
+        results = self._uk_result()
+        results['wins'] = self._breakdowns(self._get_uk_wins())
+        return self._success(results)
+
+
+class UKMonthsView(BaseUKMIView):
+    """ UK-wide hvcs and wins broken down by month """
+
+    def get(self, request):
+        results = self._uk_result()
+        results['months'] = self._month_breakdowns(self._get_uk_wins())
+        return self._success(results)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 21:55
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def populate_confirmation_latency(apps, schema_editor):
+    Win = apps.get_model('wins', 'Win')
+    Notification = apps.get_model('wins', 'Notification')
+    CustomerResponse = apps.get_model('wins', 'CustomerResponse')
+
+    first_notified = dict(
+        Notification.objects.filter(is_active=True, type='c').values('win_id').annotate(
+            first=Min('created'),
+        ).order_by().values_list('win_id', 'first')
+    )
+    confirmed = dict(CustomerResponse.objects.values_list('win_id', 'created'))
+
+    for win_id, first in first_notified.items():
+        days_to_confirm = None
+        if win_id in confirmed:
+            days_to_confirm = (confirmed[win_id] - first).days
+        Win.objects.filter(id=win_id).update(
+            first_customer_notification_at=first,
+            days_to_confirm=days_to_confirm,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wins', '0032_hvc'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='win',
+            name='days_to_confirm',
+            field=models.IntegerField(db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='win',
+            name='first_customer_notification_at',
+            field=models.DateTimeField(db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_confirmation_latency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 21:58
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def populate_is_confirmed(apps, schema_editor):
+    Win = apps.get_model('wins', 'Win')
+    Win.objects.filter(confirmation__agree_with_win=True).update(is_confirmed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wins', '0033_win_confirmation_latency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='win',
+            name='is_confirmed',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AlterIndexTogether(
+            name='win',
+            index_together=set([('is_active', 'date', 'is_confirmed', 'hvc', 'sector', 'country')]),
+        ),
+        migrations.RunPython(populate_is_confirmed, migrations.RunPython.noop),
+    ]
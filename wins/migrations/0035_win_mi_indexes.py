@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.6 on 2026-10-17 22:01
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# partial indexes, in SQL both PostgreSQL and SQLite understand. Given as
+# lists of statements, which Django runs without having to split them
+
+# non-HVC Wins by date range and CDMS sector or country, for top non-HVC
+NON_HVC_INDEX = """
+    CREATE INDEX wins_win_non_hvc_date ON wins_win (date, sector, country)
+    WHERE is_active AND (hvc IS NULL OR hvc = '')
+"""
+
+# Wins with a confirmation time, covering the average time to confirm
+DAYS_TO_CONFIRM_INDEX = """
+    CREATE INDEX wins_win_days_to_confirm ON wins_win (sector, hvc, country, days_to_confirm)
+    WHERE is_active AND days_to_confirm IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wins', '0034_win_is_confirmed'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='win',
+            index_together=set([('is_active', 'date', 'is_confirmed', 'hvc', 'sector', 'country'), ('hvc', 'date'), ('sector', 'country', 'date'), ('country', 'date')]),
+        ),
+        migrations.RunSQL([NON_HVC_INDEX], ['DROP INDEX wins_win_non_hvc_date']),
+        migrations.RunSQL([DAYS_TO_CONFIRM_INDEX], ['DROP INDEX wins_win_days_to_confirm']),
+    ]
@@ -86,6 +86,17 @@ class Win(SoftDeleteModel):
         ordering = ['created']
         verbose_name = "Export Win"
         verbose_name_plural = "Export Wins"
+        # MI filters active Wins on date and confirmation, and groups them
+        # by the rest. Wins of campaigns, of CDMS sectors and countries (as
+        # summary slots are refreshed) and of countries alone are found by
+        # date range too. Partial indexes for non-HVC Wins and confirmation
+        # times are added in migrations, as Django can't declare them
+        index_together = [
+            ('is_active', 'date', 'is_confirmed', 'hvc', 'sector', 'country'),
+            ('hvc', 'date'),
+            ('sector', 'country', 'date'),
+            ('country', 'date'),
+        ]
 
     def __init__(self,  *args, **kwargs):
         super(Win, self).__init__(*args, **kwargs)
@@ -207,6 +218,13 @@ class Win(SoftDeleteModel):
     complete = models.BooleanField()  # has an email been sent to the customer?
     audit = models.TextField(null=True)
 
+    # confirmation latency, kept in step with notifications and customer
+    # responses by MI (see `mi.signals`)
+    first_customer_notification_at = models.DateTimeField(null=True, editable=False, db_index=True)
+    days_to_confirm = models.IntegerField(null=True, editable=False, db_index=True)
+    # stored copy of `confirmed`, so MI doesn't have to join customer responses
+    is_confirmed = models.BooleanField(default=False, editable=False, db_index=True)
+
     def add_audit(self, text):
         """ Add text to audit field with timestamp """
 
@@ -262,6 +280,7 @@ class Win(SoftDeleteModel):
 
         """
         self.is_active = is_active
+        self.is_confirmed = bool(self.confirmed)
         self.save()
 
         foreignkey_fields = [
@@ -16,7 +16,7 @@ from ..factories import (
     WIN_TYPES_DICT,
     WinFactory,
 )
-from alice.tests.client import AliceClient
+from alice.client import AliceClient
 from users.factories import UserFactory
 from wins.views.flat_csv import CSVView
 
@@ -4,10 +4,10 @@ from django.core import mail
 from django.core.urlresolvers import reverse
 from django.test import TestCase, Client, override_settings
 
-from ..factories import WinFactory
-from ..models import Breakdown, Win
+from ..factories import NotificationFactory, WinFactory
+from ..models import Breakdown, Notification, Win
 from ..notifications import generate_customer_email
-from alice.tests.client import AliceClient
+from alice.client import AliceClient
 from users.factories import UserFactory
 
 
@@ -415,6 +415,26 @@ class AlicePermissionTestCase(TestCase):
             self.CUSTOMER_RESPONSES_POST_SAMPLE,
         )
 
+    def test_customerresponses_post_marks_win_confirmed(self):
+        data = dict(self.CUSTOMER_RESPONSES_POST_SAMPLE, agree_with_win=True)
+        self._test_post_pass(self.customerresponses_list, data)
+        self.win.refresh_from_db()
+        self.assertTrue(self.win.is_confirmed)
+        self.assertTrue(self.win.complete)
+
+    def test_customerresponses_post_keeps_confirmation_latency(self):
+        # an incomplete win is saved again as the response is created
+        self.win.complete = False
+        self.win.save()
+        NotificationFactory(win=self.win, type=Notification.TYPE_CUSTOMER)
+        data = dict(self.CUSTOMER_RESPONSES_POST_SAMPLE, agree_with_win=True)
+        self._test_post_pass(self.customerresponses_list, data)
+        self.win.refresh_from_db()
+        self.assertTrue(self.win.complete)
+        self.assertTrue(self.win.is_confirmed)
+        self.assertIsNotNone(self.win.first_customer_notification_at)
+        self.assertEqual(self.win.days_to_confirm, 0)
+
     @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
     def test_customerresponses_post_pass_send_confirmation(self):
         self.win.lead_officer_email_address = 'lead@example.com'
@@ -121,7 +121,9 @@ class ConfirmationViewSet(AliceMixin, ModelViewSet):
         win = instance.win
         if not win.complete:
             win.complete = True
-            win.save()
+            # only the flag, the win was loaded before MI stored the
+            # response's confirmation on it (see `mi.signals`)
+            win.save(update_fields=['complete'])
 
         return instance
 